@@ -0,0 +1,13 @@
+"""
+Benchmarks of the dataset pipeline on synthetic, deterministic data.
+
+Run from the backend directory:
+
+    python -m benchmarks.run --rows 20000 --locations 500
+    python -m benchmarks.run --baseline benchmarks/results/main.json
+
+Geocoding uses an in-process stub instead of Nominatim, so runs are offline
+and repeatable. Each stage's timings and peak memory are written to a JSON
+results file; with --baseline the run fails on slowdowns or memory growth
+beyond the thresholds.
+"""
@@ -0,0 +1,71 @@
+import numpy as np
+
+# How a missing value appears in the generated rows
+NULL_STYLES = ('none', 'empty', 'missing')
+
+
+def location_names(count):
+    """Returns the synthetic location names known to the stub geocoder."""
+    return [f"Location {i:05d}" for i in range(count)]
+
+
+def generate_records(rows=10000, numeric_columns=4, text_columns=1, locations=200,
+                     null_rate=0.02, stringify=True, null_style='none', seed=0):
+    """
+    Generates a synthetic upload shaped like the frontend's parsed CSV rows.
+
+    Columns are an id, a 'city' location column, numeric metrics (alternately
+    integer and float) and categorical text columns. Locations follow a
+    Zipf-like distribution, so a few of them hold most rows like real data.
+
+    Args:
+        rows (int): Number of rows
+        numeric_columns (int): Numeric columns after the location column
+        text_columns (int): Categorical text columns at the end
+        locations (int): Distinct location names
+        null_rate (float): Fraction of metric and text values left missing
+        stringify (bool): Send every value as a string, like Papa Parse does
+        null_style (str): 'none' (JSON null), 'empty' (empty string) or
+            'missing' (key left out of the row)
+        seed (int): Random seed; equal arguments give identical datasets
+
+    Returns:
+        list: JSON data (list of dicts)
+    """
+    if null_style not in NULL_STYLES:
+        raise ValueError(f"Unknown null style: {null_style}")
+
+    rng = np.random.default_rng(seed)
+    names = np.array(location_names(locations), dtype=object)
+    weights = 1 / np.arange(1, locations + 1)
+    columns = {
+        'id': np.arange(rows),
+        'city': names[rng.choice(locations, size=rows, p=weights / weights.sum())]
+    }
+    for i in range(numeric_columns):
+        if i % 2 == 0:
+            columns[f"metric_{i}"] = rng.integers(0, 1000, size=rows)
+        else:
+            columns[f"metric_{i}"] = rng.normal(100, 25, size=rows).round(2)
+    for i in range(text_columns):
+        categories = np.array([f"category_{i}_{j}" for j in range(8)], dtype=object)
+        columns[f"segment_{i}"] = categories[rng.integers(0, len(categories), size=rows)]
+
+    # Keep id and location complete so the shape of the aggregate stays fixed
+    nullable = [col for col in columns if col not in ('id', 'city')]
+    null_masks = {col: rng.random(rows) < null_rate for col in nullable}
+
+    records = []
+    for row in range(rows):
+        record = {}
+        for col, values in columns.items():
+            if col in null_masks and null_masks[col][row]:
+                if null_style == 'none':
+                    record[col] = None
+                elif null_style == 'empty':
+                    record[col] = ''
+                continue
+            value = values[row].item() if hasattr(values[row], 'item') else values[row]
+            record[col] = str(value) if stringify else value
+        records.append(record)
+    return records
@@ -0,0 +1,303 @@
+import argparse
+import atexit
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# The service reads its settings at import time, so configure it first:
+# offline stub geocoder, fresh geocode cache, no response cache on disk and
+# a dataset store in the same temporary directory, never the caller's data/
+_cache_dir = tempfile.mkdtemp(prefix="benchmark-")
+atexit.register(shutil.rmtree, _cache_dir, ignore_errors=True)
+os.environ.setdefault("FRONTEND_URI", "http://localhost:3000")
+os.environ["GEOCODER_BACKENDS"] = "stub"
+os.environ["GEOCODE_CACHE_PATH"] = os.path.join(_cache_dir, "geocode_cache.db")
+os.environ["RESPONSE_CACHE_PATH"] = ""
+os.environ["DATASET_STORE_PATH"] = os.path.join(_cache_dir, "datasets")
+os.environ["MAX_REMOTE_GEOCODE_LOCATIONS"] = str(10 ** 9)
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from benchmarks.generator import NULL_STYLES, generate_records
+from benchmarks.stub_geocoder import install_stub_geocoder
+from src.helper.dtype_converter import build_typed_frame, convert_values
+from src.main import app
+from src.services.analytical_data import get_analytical_data
+from src.services.core import get_coordinates_for_json, get_major_location_column, get_numeric_columns_after_location
+from src.services.dataset import Dataset
+from src.services.geocode_cache import geocode_cache
+from src.services.pipeline import build_dataset_response
+from src.services.response_cache import response_cache
+
+RESULTS_VERSION = 1
+DEFAULT_MAX_SLOWDOWN = 0.25  # Allowed relative increase of a stage's fastest run
+DEFAULT_MAX_MEMORY_GROWTH = 0.25  # Allowed relative increase of a stage's peak memory
+MIN_COMPARABLE_SECONDS = 0.005  # Faster stages are too noisy to flag
+
+
+def quiet_progress(stage, done, total, message):
+    pass
+
+
+def reset_caches():
+    """Makes the next run geocode and compute from scratch."""
+    geocode_cache.clear()
+    response_cache.clear()
+
+
+def build_stages(data):
+    """
+    Lists the benchmarked stages in pipeline order.
+
+    Every stage is (name, setup, func): setup runs untimed before each run and
+    its return value is passed to func. Inputs of later stages are prepared
+    once here, outside the measurements.
+    """
+    dataset = Dataset.from_records(data)
+    reset_caches()
+    response = get_coordinates_for_json(dataset, quiet_progress)
+    analytics = get_analytical_data(dataset)
+    client = TestClient(app)
+
+    def post_dataset(_):
+        result = client.post("/api/v1/dataset/", json=data)
+        if result.status_code != 200 or result.headers.get("content-type") != "application/json":
+            raise RuntimeError(f"Endpoint failed: {result.text[:200]}")
+        return result
+
+    return [
+        ('convert_values', None, lambda _: convert_values(data)),
+        ('build_typed_frame', None, lambda _: build_typed_frame(data)),
+        ('get_major_location_column', None, lambda _: get_major_location_column(data)),
+        ('get_numeric_columns_after_location', None,
+         lambda _: get_numeric_columns_after_location(dataset.frame, dataset.location_column)),
+        ('dataset_from_records', None, lambda _: Dataset.from_records(data)),
+        ('get_coordinates_for_json', reset_caches, lambda _: get_coordinates_for_json(dataset, quiet_progress)),
+        ('get_analytical_data', None, lambda _: get_analytical_data(dataset)),
+        ('get_analytical_data_approximate', None, lambda _: get_analytical_data(dataset, approximate=True)),
+        ('build_dataset_response', None, lambda _: build_dataset_response(response, analytics)),
+        ('endpoint_post_dataset', reset_caches, post_dataset)
+    ]
+
+
+def measure(setup, func, repeat):
+    """
+    Times a stage and records its peak traced memory.
+
+    Timing runs are separate from the single traced run, since tracemalloc
+    slows allocation-heavy code down considerably.
+
+    Returns:
+        dict: Median, fastest and all run times in seconds, and peak bytes
+    """
+    runs = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            state = setup() if setup else None
+            start = time.perf_counter()
+            func(state)
+            runs.append(time.perf_counter() - start)
+
+        state = setup() if setup else None
+        tracemalloc.start()
+        try:
+            func(state)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'seconds': statistics.median(runs),
+        'min_seconds': min(runs),
+        'runs': runs,
+        'peak_bytes': peak
+    }
+
+
+def check_convert_values_parity(data):
+    """Checks that build_typed_frame matches the row-wise convert_values path."""
+    try:
+        pd.testing.assert_frame_equal(build_typed_frame(data), pd.DataFrame(convert_values(data)))
+        return {'passed': True}
+    except AssertionError as e:
+        return {'passed': False, 'message': str(e)}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(config, stage_names=None):
+    """
+    Generates the dataset and measures every selected stage.
+
+    Args:
+        config (dict): Arguments for generate_records plus 'repeat',
+            'geocode_latency' and 'geocode_miss_rate'
+        stage_names (list): Stages to run, or None for all
+
+    Returns:
+        dict: The results document written to the results file
+    """
+    install_stub_geocoder(config['geocode_latency'], config['geocode_miss_rate'])
+    data = generate_records(
+        rows=config['rows'],
+        numeric_columns=config['numeric_columns'],
+        text_columns=config['text_columns'],
+        locations=config['locations'],
+        null_rate=config['null_rate'],
+        stringify=config['stringify'],
+        null_style=config['null_style'],
+        seed=config['seed']
+    )
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        stages = build_stages(data)
+
+    results = {}
+    for name, setup, func in stages:
+        if stage_names and name not in stage_names:
+            continue
+        results[name] = measure(setup, func, config['repeat'])
+        print(f"{name:<40} {results[name]['seconds'] * 1000:>10.1f} ms {results[name]['peak_bytes'] / 2 ** 20:>10.1f} MiB")
+
+    return {
+        'version': RESULTS_VERSION,
+        'commit': git_commit(),
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform()
+        },
+        'config': config,
+        'stages': results,
+        'checks': {'convert_values_parity': check_convert_values_parity(data)}
+    }
+
+
+def compare_results(current, baseline, max_slowdown=DEFAULT_MAX_SLOWDOWN, max_memory_growth=DEFAULT_MAX_MEMORY_GROWTH):
+    """
+    Compares two results documents stage by stage.
+
+    Stages are compared on their fastest run, which is the least noisy
+    estimate, and on peak memory. Results from different configurations are
+    not comparable.
+
+    Args:
+        current (dict): Results of this run
+        baseline (dict): Results of a previous run, e.g. from the main branch
+        max_slowdown (float): Allowed relative increase in time
+        max_memory_growth (float): Allowed relative increase in peak memory
+
+    Returns:
+        list: Human-readable regressions; empty if there are none
+
+    Raises:
+        ValueError: If the two runs used different configurations
+    """
+    if current['config'] != baseline['config']:
+        raise ValueError("Baseline was run with a different configuration")
+
+    regressions = []
+    for name, stage in current['stages'].items():
+        previous = baseline['stages'].get(name)
+        if previous is None:
+            continue
+
+        if stage['min_seconds'] >= MIN_COMPARABLE_SECONDS and \
+                stage['min_seconds'] > previous['min_seconds'] * (1 + max_slowdown):
+            regressions.append(
+                f"{name}: {previous['min_seconds'] * 1000:.1f} ms -> {stage['min_seconds'] * 1000:.1f} ms"
+            )
+        if stage['peak_bytes'] > previous['peak_bytes'] * (1 + max_memory_growth):
+            regressions.append(
+                f"{name}: peak {previous['peak_bytes'] / 2 ** 20:.1f} MiB -> {stage['peak_bytes'] / 2 ** 20:.1f} MiB"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dataset pipeline on synthetic data.")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--numeric-columns', type=int, default=6)
+    parser.add_argument('--text-columns', type=int, default=2)
+    parser.add_argument('--locations', type=int, default=500)
+    parser.add_argument('--null-rate', type=float, default=0.02)
+    parser.add_argument('--null-style', choices=NULL_STYLES, default='none')
+    parser.add_argument('--no-stringify', dest='stringify', action='store_false',
+                        help="Send numbers as JSON numbers instead of strings")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per stage")
+    parser.add_argument('--geocode-latency', type=float, default=0.0, help="Simulated seconds per remote lookup")
+    parser.add_argument('--geocode-miss-rate', type=float, default=0.0)
+    parser.add_argument('--stages', help="Comma-separated stages to run (default: all)")
+    parser.add_argument('--output', default=os.path.join('benchmarks', 'results', 'latest.json'))
+    parser.add_argument('--baseline', help="Results file to compare against")
+    parser.add_argument('--max-slowdown', type=float, default=DEFAULT_MAX_SLOWDOWN)
+    parser.add_argument('--max-memory-growth', type=float, default=DEFAULT_MAX_MEMORY_GROWTH)
+    args = parser.parse_args(argv)
+
+    config = {
+        'rows': args.rows,
+        'numeric_columns': args.numeric_columns,
+        'text_columns': args.text_columns,
+        'locations': args.locations,
+        'null_rate': args.null_rate,
+        'null_style': args.null_style,
+        'stringify': args.stringify,
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'geocode_latency': args.geocode_latency,
+        'geocode_miss_rate': args.geocode_miss_rate
+    }
+    stage_names = args.stages.split(',') if args.stages else None
+    results = run_benchmarks(config, stage_names)
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    failed = False
+    parity = results['checks']['convert_values_parity']
+    if not parity['passed']:
+        print("convert_values parity check failed:", parity['message'])
+        failed = True
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.max_slowdown, args.max_memory_growth)
+        for regression in regressions:
+            print("Regression:", regression)
+        if regressions:
+            failed = True
+        else:
+            print(f"No regressions against {args.baseline}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
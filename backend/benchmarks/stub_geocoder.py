@@ -0,0 +1,61 @@
+import time
+import zlib
+
+from src.services.geocoders import register_geocoder
+
+
+class StubGeocoder:
+    """
+    Deterministic in-process stand-in for Nominatim.
+
+    It is registered as a remote backend, so lookups still go through the
+    geocode scheduler and cache like real Nominatim requests, but coordinates
+    are derived from a checksum of the name and no network is used.
+    """
+
+    name = 'stub'
+    remote = True
+    rate_limit = 0
+    latency_seconds = 0.0  # Simulated round trip per lookup
+    miss_rate = 0.0  # Fraction of names reported as not found
+
+    def geocode(self, location_name, location_type='city'):
+        """
+        Returns stable coordinates for a name.
+
+        Args:
+            location_name (str): Name of the location
+            location_type (str): Type of location (unused)
+
+        Returns:
+            dict: Contains 'location', 'latitude', 'longitude'
+        """
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+        name = str(location_name).encode('utf-8')
+        checksum = zlib.crc32(name)
+        if (checksum % 10000) / 10000 < self.miss_rate:
+            return {
+                'location': location_name,
+                'latitude': None,
+                'longitude': None
+            }
+        return {
+            'location': location_name,
+            'latitude': round((checksum % 1800000) / 10000 - 90, 4),
+            'longitude': round((zlib.crc32(name, checksum) % 3600000) / 10000 - 180, 4)
+        }
+
+
+def install_stub_geocoder(latency_seconds=0.0, miss_rate=0.0):
+    """
+    Registers the stub backend; GEOCODER_BACKENDS must name 'stub'.
+
+    Args:
+        latency_seconds (float): Simulated round trip per lookup
+        miss_rate (float): Fraction of names reported as not found
+    """
+    StubGeocoder.latency_seconds = latency_seconds
+    StubGeocoder.miss_rate = miss_rate
+    register_geocoder(StubGeocoder.name, StubGeocoder)
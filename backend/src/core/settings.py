@@ -10,6 +10,97 @@ class Settings(BaseSettings):
     # URI Settings
     BACKEND_URI: str = os.getenv("BACKEND_URI", "http://localhost:8000")  # Backend URI (String)
     FRONTEND_URI: str = os.getenv("FRONTEND_URI")   # Frontend URI (String)
+
+    # Geocode Cache Settings
+    GEOCODE_CACHE_PATH: str = os.getenv("GEOCODE_CACHE_PATH", "data/geocode_cache.db")  # SQLite file shared by all workers (String)
+    GEOCODE_CACHE_TTL_SECONDS: int = int(os.getenv("GEOCODE_CACHE_TTL_SECONDS", 30 * 24 * 3600))  # Lifetime of resolved locations (Integer)
+    GEOCODE_CACHE_NEGATIVE_TTL_SECONDS: int = int(os.getenv("GEOCODE_CACHE_NEGATIVE_TTL_SECONDS", 24 * 3600))  # Lifetime of "not found" results (Integer)
+    GEOCODE_CACHE_ERROR_TTL_SECONDS: int = int(os.getenv("GEOCODE_CACHE_ERROR_TTL_SECONDS", 5 * 60))  # Lifetime of timeouts/service errors (Integer)
+    GEOCODE_CACHE_MAX_ENTRIES: int = int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", 100000))  # LRU size bound (Integer)
+
+    # Geocoder Settings
+    GEOCODER_BACKENDS: str = os.getenv("GEOCODER_BACKENDS", "gazetteer,nominatim")  # Comma-separated backends, tried in order (String)
+    GAZETTEER_PATH: str = os.getenv("GAZETTEER_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "resources", "gazetteer.tsv"))  # Local gazetteer table (String)
+    MAX_REMOTE_GEOCODE_LOCATIONS: int = int(os.getenv("MAX_REMOTE_GEOCODE_LOCATIONS", 100))  # Cap on locations sent to remote geocoders per upload (Integer)
+    GEOCODE_WORKERS: int = int(os.getenv("GEOCODE_WORKERS", 4))  # Threads issuing remote geocode requests (Integer)
+    GEOCODE_MAX_RETRIES: int = int(os.getenv("GEOCODE_MAX_RETRIES", 3))  # Retries after a geocoder timeout (Integer)
+    GEOCODE_RETRY_BACKOFF_SECONDS: float = float(os.getenv("GEOCODE_RETRY_BACKOFF_SECONDS", 1.0))  # Initial backoff, doubled per retry (Float)
+
+    # Location Normalization Settings
+    LOCATION_NORMALIZATION: bool = os.getenv("LOCATION_NORMALIZATION", "true").lower() == "true"  # Group and geocode spellings of a place ("USA", "U.S.A.", "United States") once (Boolean)
+    LOCATION_ALIASES_PATH: str = os.getenv("LOCATION_ALIASES_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "resources", "location_aliases.tsv"))  # Aliases on top of the gazetteer names (String)
+    LOCATION_QUALIFIER_COLUMN: bool = os.getenv("LOCATION_QUALIFIER_COLUMN", "false").lower() == "true"  # Tell same-named places apart with a coarser location column, e.g. city by country (Boolean)
+
+    # Nominatim Settings
+    NOMINATIM_DOMAIN: str = os.getenv("NOMINATIM_DOMAIN", "nominatim.openstreetmap.org")  # Point at a self-hosted or stub server (String)
+    NOMINATIM_SCHEME: str = os.getenv("NOMINATIM_SCHEME", "https")  # URL scheme (String)
+    NOMINATIM_USER_AGENT: str = os.getenv("NOMINATIM_USER_AGENT", "location_analyzer_app")  # User agent (String)
+    NOMINATIM_TIMEOUT: int = int(os.getenv("NOMINATIM_TIMEOUT", 10))  # Request timeout in seconds (Integer)
+    NOMINATIM_RATE_LIMIT: float = float(os.getenv("NOMINATIM_RATE_LIMIT", 1.0))  # Requests per second, 0 disables limiting (Float)
+
+    # Response Cache Settings
+    RESPONSE_CACHE_PATH: str = os.getenv("RESPONSE_CACHE_PATH", "data/response_cache")  # Directory of cached responses, empty for memory only (String)
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 60 * 60))  # Lifetime of a cached response (Integer)
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))  # Memory used by cached responses per process (Integer)
+    RESPONSE_CACHE_DISK_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_DISK_MAX_BYTES", 512 * 1024 * 1024))  # Disk used by cached responses (Integer)
+
+    # Approximate Analytics Settings
+    APPROXIMATE_ANALYTICS: bool = os.getenv("APPROXIMATE_ANALYTICS", "false").lower() == "true"  # Use sketches by default (Boolean)
+    SKETCH_HLL_PRECISION: int = int(os.getenv("SKETCH_HLL_PRECISION", 14))  # HyperLogLog registers = 2**precision, 11-18 (Integer)
+    SKETCH_QUANTILE_ACCURACY: float = float(os.getenv("SKETCH_QUANTILE_ACCURACY", 0.01))  # Relative error of sketched quantiles (Float)
+    SKETCH_TOP_VALUES_CAPACITY: int = int(os.getenv("SKETCH_TOP_VALUES_CAPACITY", 1000))  # Counters kept per column for top values (Integer)
+    SKETCH_DUPLICATE_SAMPLE_SIZE: int = int(os.getenv("SKETCH_DUPLICATE_SAMPLE_SIZE", 1000000))  # Row hashes kept for duplicate counting (Integer)
+
+    # Compact Ingestion Settings
+    COMPACT_INGESTION: bool = os.getenv("COMPACT_INGESTION", "false").lower() == "true"  # Dictionary-encode text and downcast integers of uploads (Boolean)
+    COMPACT_CATEGORY_MAX_RATIO: float = float(os.getenv("COMPACT_CATEGORY_MAX_RATIO", 0.5))  # Largest distinct/rows ratio of dictionary-encoded text columns (Float)
+
+    # Parallel Profiling Settings
+    PROFILE_WORKERS: int = int(os.getenv("PROFILE_WORKERS", 0))  # Processes profiling large datasets, 0 for one per CPU, 1 to stay serial (Integer)
+    PARALLEL_PROFILE_MIN_CELLS: int = int(os.getenv("PARALLEL_PROFILE_MIN_CELLS", 5000000))  # Rows x columns below which profiling stays serial (Integer)
+
+    # Correlation Settings
+    CORRELATION_MODE: str = os.getenv("CORRELATION_MODE", "auto")  # Matrix output: auto, dense, threshold, top_k or none (String)
+    CORRELATION_DENSE_MAX_COLUMNS: int = int(os.getenv("CORRELATION_DENSE_MAX_COLUMNS", 50))  # Widest matrix reported densely in auto mode (Integer)
+    CORRELATION_THRESHOLD: float = float(os.getenv("CORRELATION_THRESHOLD", 0.7))  # |r| above which pairs count as highly correlated (Float)
+    CORRELATION_TOP_K: int = int(os.getenv("CORRELATION_TOP_K", 5))  # Partners kept per column in top_k mode (Integer)
+    CORRELATION_SAMPLE_ROWS: int = int(os.getenv("CORRELATION_SAMPLE_ROWS", 0))  # Estimate on a random sample of this many rows, 0 to use all (Integer)
+    CORRELATION_BLOCK_ROWS: int = int(os.getenv("CORRELATION_BLOCK_ROWS", 65536))  # Rows multiplied at a time (Integer)
+
+    # Startup Settings
+    STARTUP_PREWARM: bool = os.getenv("STARTUP_PREWARM", "false").lower() == "true"  # Load the pipeline and geocoders at startup instead of on first use (Boolean)
+    STARTUP_REPORT: bool = os.getenv("STARTUP_REPORT", "false").lower() == "true"  # Time every import and serve the report at /startup (Boolean)
+
+    # Logging Settings
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")  # Level of the application's log messages, e.g. DEBUG to log pipeline progress (String)
+
+    # Metrics Settings
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"  # Serve Prometheus metrics at /metrics (Boolean)
+    SERVER_TIMING: bool = os.getenv("SERVER_TIMING", "false").lower() == "true"  # Add per-stage Server-Timing headers to responses (Boolean)
+
+    # Dataset Store Settings
+    DATASET_STORE_PATH: str = os.getenv("DATASET_STORE_PATH", "data/datasets")  # Directory of stored datasets, empty to disable queries (String)
+    DATASET_STORE_TTL_SECONDS: int = int(os.getenv("DATASET_STORE_TTL_SECONDS", 24 * 60 * 60))  # Lifetime of a stored dataset (Integer)
+    DATASET_STORE_MAX_OPEN: int = int(os.getenv("DATASET_STORE_MAX_OPEN", 16))  # Memory-mapped datasets kept open per process (Integer)
+
+    # Spatial Index Settings
+    SPATIAL_INDEX_MAX_ZOOM: int = int(os.getenv("SPATIAL_INDEX_MAX_ZOOM", 12))  # Finest grid level, 2**zoom cells per axis (Integer)
+    SPATIAL_INDEX_MAX_DATASETS: int = int(os.getenv("SPATIAL_INDEX_MAX_DATASETS", 32))  # Datasets whose grids are kept in memory (Integer)
+
+    # Streaming Upload Settings
+    CSV_CHUNK_ROWS: int = int(os.getenv("CSV_CHUNK_ROWS", 50000))  # Rows parsed per chunk of an uploaded CSV (Integer)
+    PROFILE_MAX_TRACKED_VALUES: int = int(os.getenv("PROFILE_MAX_TRACKED_VALUES", 10000))  # Distinct values counted per column while streaming (Integer)
+
+    # Append Settings
+    APPEND_MAX_DATASETS: int = int(os.getenv("APPEND_MAX_DATASETS", 16))  # Dataset versions whose append state is kept in memory (Integer)
+
+    # Background Job Settings
+    JOB_STORE: str = os.getenv("JOB_STORE", "memory")  # Where job results are kept: memory or file (String)
+    JOB_STORE_PATH: str = os.getenv("JOB_STORE_PATH", "data/jobs")  # Directory used by the file job store (String)
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", 2))  # Jobs processed concurrently (Integer)
+    JOB_MAX_QUEUED: int = int(os.getenv("JOB_MAX_QUEUED", 20))  # Pending jobs before new submissions are rejected (Integer)
+    JOB_TTL_SECONDS: int = int(os.getenv("JOB_TTL_SECONDS", 60 * 60))  # How long finished jobs are kept (Integer)
+    JOB_EVENT_POLL_SECONDS: float = float(os.getenv("JOB_EVENT_POLL_SECONDS", 0.5))  # Progress stream polling interval (Float)
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,157 @@
+from contextlib import contextmanager
+import importlib.abc
+import sys
+import threading
+import time
+
+# Modules listed in the report, slowest first
+REPORT_IMPORT_LIMIT = 30
+
+
+class StartupReport:
+    """
+    Where the start of a worker or serverless container goes.
+
+    Timed steps (e.g. warming up the geocoders) are always recorded. With
+    track_imports() every module import is timed too, cumulative (with the
+    modules it imports) and self, like python -X importtime; imports after
+    ready() are the ones deferred to the first request that needs them.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.ready_seconds = None
+        self.steps = []
+        self.imports = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, name):
+        """Times one initialization step."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.steps.append({'name': name, 'seconds': round(time.perf_counter() - start, 4)})
+
+    def record_import(self, module, seconds, self_seconds):
+        with self._lock:
+            self.imports[module] = {
+                'module': module,
+                'seconds': round(seconds, 4),
+                'self_seconds': round(self_seconds, 4),
+                'deferred': self.ready_seconds is not None
+            }
+
+    def ready(self):
+        """Marks the application as ready to serve."""
+        self.ready_seconds = round(time.perf_counter() - self.started, 4)
+
+    def track_imports(self):
+        """Starts timing every module imported from now on."""
+        if not any(isinstance(finder, _ImportTimer) for finder in sys.meta_path):
+            sys.meta_path.insert(0, _ImportTimer(self))
+
+    def to_dict(self, limit=REPORT_IMPORT_LIMIT):
+        """
+        Returns the report.
+
+        Args:
+            limit (int): Number of slowest imports listed
+
+        Returns:
+            dict: 'ready_seconds' (from this module's import to ready()),
+                'steps' and, when imports are tracked, the slowest 'imports'
+        """
+        with self._lock:
+            imports = sorted(self.imports.values(), key=lambda item: -item['seconds'])
+            return {
+                'ready_seconds': self.ready_seconds,
+                'steps': list(self.steps),
+                'tracked_imports': len(imports),
+                'imports': imports[:limit]
+            }
+
+    def summary(self):
+        """Formats the report for the log."""
+        report = self.to_dict(limit=10)
+        lines = [f"Startup ready in {report['ready_seconds']}s"]
+        lines += [f"  {step['name']}: {step['seconds'] * 1000:.1f} ms" for step in report['steps']]
+        lines += [
+            f"  import {item['module']}: {item['seconds'] * 1000:.1f} ms (self {item['self_seconds'] * 1000:.1f} ms)"
+            for item in report['imports']
+        ]
+        return "\n".join(lines)
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """Meta path hook that times the loading of every module it sees."""
+
+    def __init__(self, report):
+        self.report = report
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path=None, target=None):
+        if getattr(self._local, 'finding', False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.finding = False
+
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def timed(self, name, load, extra_seconds=0.0):
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return load()
+        finally:
+            elapsed = time.perf_counter() - start + extra_seconds
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.report.record_import(name, elapsed, elapsed - children)
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps a loader for one import and puts the original back once the module is loaded."""
+
+    def __init__(self, loader, timer):
+        self.loader = loader
+        self.timer = timer
+        self.create_seconds = 0.0
+
+    def create_module(self, spec):
+        # Extension modules are loaded here rather than in exec_module
+        start = time.perf_counter()
+        module = self.loader.create_module(spec)
+        self.create_seconds = time.perf_counter() - start
+        return module
+
+    def exec_module(self, module):
+        try:
+            self.timer.timed(module.__name__, lambda: self.loader.exec_module(module), self.create_seconds)
+        finally:
+            module.__loader__ = self.loader
+            if module.__spec__ is not None:
+                module.__spec__.loader = self.loader
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+# Process-wide report, started when the application module is first imported
+startup_report = StartupReport()
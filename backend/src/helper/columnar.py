@@ -0,0 +1,129 @@
+import json
+import struct
+
+import numpy as np
+import pandas as pd
+
+from src.helper.serializer import encode_json
+
+# Media type clients send in Accept to receive the columnar encoding
+COLUMNAR_MEDIA_TYPE = 'application/vnd.location-dashboard.columnar'
+COLUMNAR_MAGIC = b'LDC1'
+ALIGNMENT = 8
+
+INT32_MIN, INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+
+
+def _pad(length):
+    return -length % ALIGNMENT
+
+
+def _encode_column(series):
+    """
+    Encodes one column as a little-endian buffer.
+
+    Returns:
+        tuple: (column header dict, buffer bytes)
+    """
+    if pd.api.types.is_bool_dtype(series) and not series.isna().any():
+        return {'type': 'bool'}, series.to_numpy(dtype='<u1').tobytes()
+
+    if pd.api.types.is_integer_dtype(series) and not series.isna().any():
+        values = series.to_numpy()
+        if len(values) == 0 or (values.min() >= INT32_MIN and values.max() <= INT32_MAX):
+            return {'type': 'int32'}, values.astype('<i4').tobytes()
+        # Wider integers go as float64, exact up to 2**53 like JSON numbers in JS
+        return {'type': 'float64'}, values.astype('<f8').tobytes()
+
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return {'type': 'float64'}, series.to_numpy(dtype='<f8', na_value=np.nan).tobytes()
+
+    if pd.api.types.infer_dtype(series, skipna=True) in ('floating', 'integer', 'mixed-integer-float'):
+        # Object columns of numbers and None (e.g. latitude/longitude after geocoding)
+        return {'type': 'float64'}, pd.to_numeric(series).to_numpy(dtype='<f8', na_value=np.nan).tobytes()
+
+    # Everything else is dictionary-encoded: int32 codes (-1 = null) into a list of strings
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    dictionary = [str(value) for value in uniques]
+    return {'type': 'dictionary', 'dictionary': dictionary}, codes.astype('<i4').tobytes()
+
+
+def encode_columnar(tables, meta):
+    """
+    Encodes DataFrames in a compact columnar binary layout.
+
+    Layout (all integers little-endian):
+        4 bytes   magic b'LDC1'
+        4 bytes   uint32 length of the header
+        header    UTF-8 JSON: {"version": 1, "meta": {...}, "tables": {name:
+                  {"rows": n, "columns": [{"name", "type", "offset", "length",
+                  "dictionary"?}]}}}
+        padding   zeros up to a multiple of 8 bytes
+        body      column buffers, each starting at an 8-byte aligned offset
+                  relative to the start of the body
+
+    Column types are float64 (null as NaN), int32, bool (one byte per value)
+    and dictionary (int32 codes, -1 for null, into the header's string list),
+    so a client can view each buffer as a typed array without copying.
+
+    Args:
+        tables (dict): Name -> DataFrame
+        meta (dict): Non-tabular part of the response, encoded as JSON
+
+    Returns:
+        bytes: The encoded response
+    """
+    buffers = []
+    offset = 0
+    table_headers = {}
+    for table_name, frame in tables.items():
+        columns = []
+        for col in frame.columns:
+            column_header, data = _encode_column(frame[col])
+            column_header.update(name=str(col), offset=offset, length=len(data))
+            columns.append(column_header)
+            buffers.append(data + b'\0' * _pad(len(data)))
+            offset += len(data) + _pad(len(data))
+        table_headers[table_name] = {'rows': len(frame), 'columns': columns}
+
+    header = encode_json({'version': 1, 'meta': meta, 'tables': table_headers})
+    prefix = COLUMNAR_MAGIC + struct.pack('<I', len(header)) + header
+    return b''.join([prefix, b'\0' * _pad(len(prefix))] + buffers)
+
+
+def accepts_columnar(accept):
+    """Checks whether an Accept header asks for the columnar encoding."""
+    return bool(accept) and COLUMNAR_MEDIA_TYPE in accept
+
+
+def decode_columnar(body):
+    """
+    Decodes a response written by encode_columnar.
+
+    Args:
+        body (bytes): The encoded response
+
+    Returns:
+        tuple: (tables as name -> DataFrame, meta dict)
+    """
+    if body[:4] != COLUMNAR_MAGIC:
+        raise ValueError("Not a columnar response")
+    (header_length,) = struct.unpack_from('<I', body, 4)
+    header = json.loads(body[8:8 + header_length])
+    body_start = 8 + header_length + _pad(8 + header_length)
+
+    tables = {}
+    for table_name, table in header['tables'].items():
+        columns = {}
+        for column in table['columns']:
+            start = body_start + column['offset']
+            data = body[start:start + column['length']]
+            if column['type'] == 'dictionary':
+                codes = np.frombuffer(data, dtype='<i4')
+                columns[column['name']] = pd.Categorical.from_codes(codes, column['dictionary']).astype(object)
+            else:
+                dtype = {'bool': '<u1', 'int32': '<i4', 'float64': '<f8'}[column['type']]
+                values = np.frombuffer(data, dtype=dtype)
+                columns[column['name']] = values.astype(bool) if column['type'] == 'bool' else values
+        tables[table_name] = pd.DataFrame(columns, index=pd.RangeIndex(table['rows']))
+    return tables, header['meta']
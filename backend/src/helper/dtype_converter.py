@@ -2,6 +2,10 @@ from typing import Any, Dict, List
 import numpy as np
 import pandas as pd
 
+# Strings Python's int()/float() can possibly accept: they contain a digit or spell inf/nan
+NUMERIC_CANDIDATE_PATTERN = r'\d|^\s*[+-]?(?:inf|infinity|nan)\s*$'
+BOOLEAN_LITERALS = ['true', 'false']
+
 def convert_numpy_to_python(obj):
     """
     Recursively converts NumPy/Pandas types to native Python types.
@@ -23,35 +27,184 @@ def convert_numpy_to_python(obj):
     else:
         return obj
         
+def _convert_value(value):
+    """Convert a single stringified value: int, then float, then boolean, else the string itself."""
+    if not isinstance(value, str):
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    if value.lower() == 'true':
+        return True
+    elif value.lower() == 'false':
+        return False
+    return value
+
+
 def convert_values(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Convert stringified JSON values to their real types."""
-    converted = []
-    for row in data:
-        new_row = {}
-        for key, value in row.items():
-            if isinstance(value, str):
-                # Try to convert to int
-                try:
-                    new_row[key] = int(value)
-                    continue
-                except ValueError:
-                    pass
-                # Try to convert to float
-                try:
-                    new_row[key] = float(value)
-                    continue
-                except ValueError:
-                    pass
-                # Check for boolean values
-                if value.lower() == 'true':
-                    new_row[key] = True
-                    continue
-                elif value.lower() == 'false':
-                    new_row[key] = False
-                    continue
-                # Keep as string
-                new_row[key] = value
-            else:
-                new_row[key] = value
-        converted.append(new_row)
-    return converted
\ No newline at end of file
+    return [{key: _convert_value(value) for key, value in row.items()} for row in data]
+
+
+def _convert_strings(strings):
+    """
+    Convert an array of distinct strings the way convert_values converts cells.
+
+    Args:
+        strings (ndarray): Object array of distinct strings
+
+    Returns:
+        ndarray: Object array of converted values, or None if nothing changes
+    """
+    series = pd.Series(strings, dtype=object)
+    # Only strings with a digit (or inf/nan) can parse as numbers
+    numeric = series.str.contains(NUMERIC_CANDIDATE_PATTERN, case=False, regex=True).to_numpy(dtype=bool)
+    candidates = numeric | series.str.lower().isin(BOOLEAN_LITERALS).to_numpy()
+    if not candidates.any():
+        return None
+
+    converted = strings.copy()
+    positions = np.flatnonzero(candidates)
+    converted[positions] = [_convert_value(value) for value in strings[positions]]
+    return converted
+
+
+def _infer_column(values):
+    """
+    Convert one column of raw JSON values to its real type.
+
+    Produces the same column as running convert_values and building the
+    DataFrame from the converted rows. String columns are factorized so each
+    distinct value is parsed once; numeric columns are parsed with a single
+    NumPy cast, and only candidate strings of other columns go through
+    per-value conversion.
+
+    Args:
+        values (ndarray): Object array of raw values (NaN for missing keys)
+
+    Returns:
+        ndarray or list: Typed array, or a list of Python values left to
+            pandas' own type inference
+    """
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+
+    if kind != 'string':
+        # Non-string JSON values (numbers, booleans) are kept as they are
+        if kind == 'empty':
+            return values.tolist()
+        return [_convert_value(value) for value in values]
+
+    codes, uniques = pd.factorize(values)
+    uniques = np.asarray(uniques, dtype=object)
+    null_mask = codes < 0
+
+    # Numeric columns: int() / float() over the distinct values in one cast
+    try:
+        ints = uniques.astype(np.int64)
+    except (ValueError, OverflowError):
+        ints = None
+    if ints is not None and not null_mask.any():
+        return ints.take(codes)
+
+    try:
+        floats = uniques.astype(np.float64)
+    except ValueError:
+        floats = None
+    # Integers beyond int64 need pandas' object inference
+    if floats is not None and not (np.abs(floats) >= 2 ** 63).any():
+        column = floats.take(codes)
+        column[null_mask] = np.nan
+        return column
+
+    converted = _convert_strings(uniques)
+    if converted is None:
+        return values.tolist()
+
+    column = converted.take(codes)
+    column[null_mask] = values[null_mask]
+    return column.tolist()
+
+
+def build_typed_frame(data: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Build a typed DataFrame from stringified JSON rows.
+
+    Column-wise equivalent of pd.DataFrame(convert_values(data)): every column
+    is inferred in one pass and written straight into the frame, without an
+    intermediate list of converted row dicts.
+
+    Args:
+        data (list): JSON data from frontend (list of dicts with string values)
+
+    Returns:
+        DataFrame: Frame with int, float, bool and string columns
+    """
+    raw = pd.DataFrame(data, dtype=object)
+    if raw.empty:
+        return pd.DataFrame(data)
+    return infer_frame_types(raw)
+
+
+def infer_frame_types(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert every column of a frame of raw (string) values to its real type.
+
+    Args:
+        raw (DataFrame): Frame of stringified values, e.g. a CSV chunk read with dtype=str
+
+    Returns:
+        DataFrame: Frame with int, float, bool and string columns
+    """
+    return pd.DataFrame(
+        {col: _infer_column(raw[col].to_numpy(dtype=object)) for col in raw.columns},
+        columns=raw.columns,
+        index=raw.index
+    )
+
+
+def _is_text(series):
+    """Whether a column holds only strings (and nulls)."""
+    if not pd.api.types.is_string_dtype(series.dtype) or isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    return series.dtype != object or pd.api.types.infer_dtype(series, skipna=True) == 'string'
+
+
+def compact_frame(frame: pd.DataFrame, category_columns=(), max_category_ratio: float = 0.5) -> pd.DataFrame:
+    """
+    Shrink a typed frame without changing any of its values.
+
+    Integer columns are downcast to the smallest integer type that holds their
+    range (sums and means are still accumulated in int64 and float64). Text
+    columns with few distinct values, and the category_columns whatever their
+    cardinality, are dictionary-encoded as categoricals with sorted
+    categories, so grouping on them gives the same order as on the strings.
+    Other text columns keep pandas' string dtype, which is Arrow-backed when
+    pyarrow is installed. Floats stay float64: float32 would change sums and
+    means even when every value is exactly representable.
+
+    Args:
+        frame (DataFrame): Frame from build_typed_frame
+        category_columns (list): Text columns to encode in any case, e.g. the location column
+        max_category_ratio (float): Largest distinct values / rows ratio of encoded columns
+
+    Returns:
+        DataFrame: Frame with the same columns, index and values
+    """
+    columns = {}
+    for col in frame.columns:
+        series = frame[col]
+        if pd.api.types.is_integer_dtype(series.dtype) and isinstance(series.dtype, np.dtype):
+            series = pd.to_numeric(series, downcast='integer')
+        elif _is_text(series):
+            codes, uniques = pd.factorize(series, sort=True)
+            if col in category_columns or len(uniques) <= max_category_ratio * len(series):
+                series = pd.Series(
+                    pd.Categorical.from_codes(codes, categories=uniques), index=series.index, name=col
+                )
+        columns[col] = series
+    return pd.DataFrame(columns, columns=frame.columns, index=frame.index)
@@ -0,0 +1,101 @@
+from json.encoder import encode_basestring
+import datetime
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class RawJSON:
+    """Already-encoded JSON that encode_json splices into its output unchanged."""
+
+    def __init__(self, data):
+        self.data = data.decode('utf-8') if isinstance(data, bytes) else data
+
+
+def _encode_key(key):
+    """Encodes a dict key the way json.dumps does (non-string keys become strings)."""
+    if isinstance(key, str):
+        return encode_basestring(key)
+    if key is None:
+        return '"null"'
+    if isinstance(key, (bool, np.bool_)):
+        return '"true"' if key else '"false"'
+    if isinstance(key, (int, np.integer)):
+        return f'"{int(key)}"'
+    if isinstance(key, (float, np.floating)):
+        return encode_basestring(float.__repr__(float(key)))
+    return encode_basestring(str(key))
+
+
+def _encode_float(value):
+    # NaN and infinities are not valid JSON; they become null like in to_json
+    if math.isnan(value) or math.isinf(value):
+        return 'null'
+    return float.__repr__(value)
+
+
+def _encode(obj, parts):
+    if isinstance(obj, str):
+        parts.append(encode_basestring(obj))
+    elif obj is None:
+        parts.append('null')
+    elif isinstance(obj, (bool, np.bool_)):
+        parts.append('true' if obj else 'false')
+    elif isinstance(obj, (int, np.integer)):
+        parts.append(str(int(obj)))
+    elif isinstance(obj, (float, np.floating)):
+        parts.append(_encode_float(float(obj)))
+    elif isinstance(obj, dict):
+        parts.append('{')
+        first = True
+        for key, value in obj.items():
+            if not first:
+                parts.append(',')
+            first = False
+            parts.append(_encode_key(key))
+            parts.append(':')
+            _encode(value, parts)
+        parts.append('}')
+    elif isinstance(obj, (list, tuple)):
+        parts.append('[')
+        for i, item in enumerate(obj):
+            if i:
+                parts.append(',')
+            _encode(item, parts)
+        parts.append(']')
+    elif isinstance(obj, pd.DataFrame):
+        # pandas writes the records in C, with NaN/None as null
+        parts.append(obj.to_json(orient='records', force_ascii=False))
+    elif isinstance(obj, pd.Series):
+        _encode(obj.tolist(), parts)
+    elif isinstance(obj, np.ndarray):
+        _encode(obj.tolist(), parts)
+    elif isinstance(obj, RawJSON):
+        parts.append(obj.data)
+    elif isinstance(obj, (pd.Timestamp, datetime.datetime, datetime.date)):
+        parts.append(encode_basestring(obj.isoformat()))
+    elif pd.isna(obj):
+        parts.append('null')
+    else:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode_json(obj):
+    """
+    Serializes a response to JSON bytes in a single pass.
+
+    Handles dicts, lists, NumPy scalars and arrays, pandas Series and
+    DataFrames (as records) and RawJSON fragments directly, so responses do
+    not need converting to plain Python objects first. NaN, infinities, NaT
+    and pd.NA become null.
+
+    Args:
+        obj: Object to serialize
+
+    Returns:
+        bytes: Compact UTF-8 JSON
+    """
+    parts = []
+    _encode(obj, parts)
+    return ''.join(parts).encode('utf-8')
@@ -1,12 +1,24 @@
 # FastAPI application entry point
 from typing import Dict
+import logging
+import time
 
-from fastapi import FastAPI
+from src.core.startup import startup_report
+from src.core.settings import settings
+
+logging.basicConfig(level=settings.LOG_LEVEL.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+# Installed before the framework imports so the report covers them
+if settings.STARTUP_REPORT:
+    startup_report.track_imports()
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from mangum import Mangum
-from src.core.settings import settings
 
 from src.routers import items
+from src.services.metrics import collect_request_timings, render_metrics, server_timing_header
  
 # Initialize FastAPI app
 app = FastAPI(title=settings.PROJECT_NAME)
@@ -18,13 +30,44 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing"],
 )
 
+if settings.SERVER_TIMING:
+    @app.middleware("http")
+    async def add_server_timing(request: Request, call_next):
+        """Report the time spent in each pipeline stage of the request."""
+        timings = collect_request_timings()
+        start = time.perf_counter()
+        response = await call_next(request)
+        response.headers["Server-Timing"] = server_timing_header(timings, time.perf_counter() - start)
+        return response
+
 app.include_router(items.router, prefix=f"{settings.API_V1_STR}/dataset", tags=["dash"])
 
 @app.get("/")
 def root() -> Dict[str, str]:
     return {"message": "Authentication API. Go to /docs for documentation."}
 
-# Required for Vercel
-handler = Mangum(app)
\ No newline at end of file
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics() -> Response:
+        body, content_type = render_metrics()
+        return Response(content=body, media_type=content_type)
+
+if settings.STARTUP_REPORT:
+    @app.get("/startup", include_in_schema=False)
+    def startup() -> Dict:
+        return startup_report.to_dict()
+
+if settings.STARTUP_PREWARM:
+    from src.services.warmup import warm_up
+    warm_up()
+
+startup_report.ready()
+if settings.STARTUP_REPORT:
+    logger.info(startup_report.summary())
+
+# Required for Vercel. The app has no startup/shutdown handlers, so the
+# lifespan protocol Mangum would otherwise run on every invocation is skipped
+handler = Mangum(app, lifespan="off")
\ No newline at end of file
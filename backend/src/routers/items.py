@@ -1,62 +1,383 @@
-from fastapi import APIRouter
-from typing import Any, Dict, List
-from fastapi.encoders import jsonable_encoder
-import numpy as np
+from fastapi import APIRouter, File, Header, Query, UploadFile
+from typing import Any, Dict, List, Optional
+from fastapi.responses import Response, StreamingResponse
+import asyncio
 import json
+import logging
+import os
+import shutil
+import tempfile
 
-from src.services.core import get_coordinates_for_json
-from src.services.analytical_data import get_analytical_data
+from src.core.settings import settings
+from src.services.geocode_cache import geocode_cache
+from src.services.jobs import TERMINAL_STATES, get_job_runner
+from src.services.response_cache import file_hash, records_hash, response_cache
+
+# The pipeline, the dataset store and the encoders (pandas, NumPy, geopy) are
+# imported by the endpoints that use them, keeping them out of cold starts
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("/geocode-cache")
+def read_geocode_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters of the shared geocode cache."""
+    return {
+        "status": 200,
+        "data": geocode_cache.stats()
+    }
+
+@router.get("/response-cache")
+def read_response_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters of the dataset response cache."""
+    return {
+        "status": 200,
+        "data": response_cache.stats()
+    }
+
+def etag_matches(if_none_match, etag) -> bool:
+    """Check an If-None-Match header against an entity tag."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags or f"W/{etag}" in tags
+
+def cached_dataset_response(key, if_none_match, columnar, compute):
+    """
+    Serve a dataset response from the response cache, computing and storing it on a miss.
+
+    compute is called with a progress callback. Responses in which some
+    locations failed to geocode (timeouts, service errors) are only kept for
+    GEOCODE_CACHE_ERROR_TTL_SECONDS, so they are retried like the geocodes.
+    """
+    from src.helper.columnar import COLUMNAR_MEDIA_TYPE
+    from src.services.core import log_progress
+    if columnar:
+        key = f"{key}-columnar"
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Vary": "Accept"}
+    body = response_cache.get(key)
+    if body is not None and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
 
-class NumpyEncoder(json.JSONEncoder):
-    """Custom JSON encoder for NumPy types"""
-    def default(self, obj):
-        if isinstance(obj, np.integer):
-            return int(obj)
-        elif isinstance(obj, np.floating):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        elif pd.isna(obj):
-            return None
-        return super().default(obj)
+    if body is None:
+        geocode_errors = []
+
+        def progress(stage, done, total, message):
+            if stage == 'geocode_errors':
+                geocode_errors.append(done)
+            log_progress(stage, done, total, message)
+
+        body = compute(progress)
+        response_cache.set(key, body, settings.GEOCODE_CACHE_ERROR_TTL_SECONDS if geocode_errors else None)
+
+    media_type = COLUMNAR_MEDIA_TYPE if columnar else "application/json"
+    return Response(content=body, media_type=media_type, headers=headers)
 
 @router.post(f"/")
-def read_incoming_csv(data: List[Dict[str, Any]]) -> Dict[str, Any]:
+def read_incoming_csv(
+    data: List[Dict[str, Any]],
+    approximate: bool = Query(settings.APPROXIMATE_ANALYTICS),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
     """Handle parsed CSV data (array of objects)."""
+    from src.helper.columnar import accepts_columnar
+    from src.services.pipeline import process_records
     try:
-        response = get_coordinates_for_json(data)
-        significant_columns = response.columns.drop(['name', 'latitude', 'longitude']).tolist()
-        if not significant_columns:
-            raise ValueError("No numeric columns found for aggregation.")
-            
-        globe_df = response[['name', 'latitude', 'longitude', significant_columns[0]]].copy()
-        globe_df = globe_df.rename(columns={significant_columns[0]: 'significantCol'})
+        key = records_hash(data, ':approximate' if approximate else '')
+        columnar = accepts_columnar(accept)
+        return cached_dataset_response(
+            key, if_none_match, columnar,
+            lambda progress: process_records(data, progress, approximate=approximate, columnar=columnar, dataset_id=key)
+        )
         
-        # Convert to dict first, then to JSON with custom encoder
-        globe_data = json.loads(globe_df.to_json(orient='records'))
+    except Exception as e:
+        logger.exception("Error during geocoding")
+        return {
+            "status": 500,
+            "statusText": str(e)
+        }
 
-        analytical_data = get_analytical_data(data)
-        
-        # Convert all data using jsonable_encoder to handle numpy types 
-        result = {
-            "status": 200,
-            "data": {
-                "globe_data": globe_data,
-                "significant_columns": significant_columns,
-                "full_data": json.loads(response.to_json(orient='records')),
-                "analytical_data": jsonable_encoder(analytical_data)  # This handles numpy types
-            }
+@router.post("/upload")
+def read_uploaded_csv(
+    file: UploadFile = File(...),
+    approximate: bool = Query(settings.APPROXIMATE_ANALYTICS),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Handle a raw CSV file (optionally gzip-compressed), parsed and aggregated in chunks."""
+    from src.helper.columnar import accepts_columnar
+    from src.services.pipeline import process_csv_stream
+    try:
+        key = file_hash(file.file, ':approximate' if approximate else '')
+        columnar = accepts_columnar(accept)
+        return cached_dataset_response(
+            key, if_none_match, columnar,
+            lambda progress: process_csv_stream(file.file, progress, approximate=approximate, columnar=columnar, dataset_id=key)
+        )
+
+    except Exception as e:
+        logger.exception("Error during geocoding")
+        return {
+            "status": 500,
+            "statusText": str(e)
+        }
+
+def process_spooled_csv(path, progress, approximate=False):
+    """Run the CSV pipeline on a spooled upload and delete it afterwards."""
+    from src.services.pipeline import process_csv_stream
+    try:
+        with open(path, 'rb') as f:
+            key = file_hash(f, ':approximate' if approximate else '')
+            return process_csv_stream(f, progress, approximate, dataset_id=key)
+    finally:
+        os.remove(path)
+
+def job_accepted(job_id) -> Dict[str, Any]:
+    return {
+        "status": 202,
+        "data": {
+            "job_id": job_id,
+            "status_url": f"jobs/{job_id}",
+            "events_url": f"jobs/{job_id}/events"
+        }
+    }
+
+@router.post("/jobs")
+def create_records_job(
+    data: List[Dict[str, Any]],
+    approximate: bool = Query(settings.APPROXIMATE_ANALYTICS)
+) -> Dict[str, Any]:
+    """Queue parsed CSV data (array of objects) for background processing."""
+    from src.services.pipeline import process_records
+    try:
+        key = records_hash(data, ':approximate' if approximate else '')
+        return job_accepted(get_job_runner().submit('records', process_records, data, approximate=approximate, dataset_id=key))
+    except RuntimeError as e:
+        return {
+            "status": 503,
+            "statusText": str(e)
+        }
+
+@router.post("/jobs/upload")
+def create_upload_job(
+    file: UploadFile = File(...),
+    approximate: bool = Query(settings.APPROXIMATE_ANALYTICS)
+) -> Dict[str, Any]:
+    """Queue a raw CSV file for background processing."""
+    # The request's upload is closed once we return, so spool it to a file the job owns
+    with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as spooled:
+        shutil.copyfileobj(file.file, spooled)
+    try:
+        return job_accepted(get_job_runner().submit('upload', process_spooled_csv, spooled.name, approximate=approximate))
+    except RuntimeError as e:
+        os.remove(spooled.name)
+        return {
+            "status": 503,
+            "statusText": str(e)
+        }
+
+@router.get("/jobs/{job_id}")
+def read_job(job_id: str):
+    """Return a job's status and latest progress, plus its result once finished."""
+    job = get_job_runner().get(job_id)
+    if job is None:
+        return {
+            "status": 404,
+            "statusText": f"Unknown job: {job_id}"
+        }
+    job.pop('events')
+    from src.helper.serializer import encode_json
+    # The result is already encoded JSON and is spliced in as is
+    return Response(content=encode_json({"status": 200, "data": job}), media_type="application/json")
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Stream a job's progress as server-sent events until it finishes."""
+    runner = get_job_runner()
+
+    async def events():
+        sent = 0
+        while True:
+            job = runner.get(job_id)
+            if job is None:
+                yield f"event: error\ndata: {json.dumps({'job_id': job_id, 'error': 'Unknown job'})}\n\n"
+                return
+            for event in job['events'][sent:]:
+                yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+            sent = len(job['events'])
+            if job['status'] in TERMINAL_STATES:
+                done = {'job_id': job_id, 'status': job['status'], 'error': job['error']}
+                yield f"event: {job['status']}\ndata: {json.dumps(done)}\n\n"
+                return
+            await asyncio.sleep(settings.JOB_EVENT_POLL_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/{dataset_id}/cells")
+def read_spatial_cells(
+    dataset_id: str,
+    zoom: int = Query(0, ge=0),
+    west: float = Query(-180.0, ge=-180.0, le=180.0),
+    south: float = Query(-90.0, ge=-90.0, le=90.0),
+    east: float = Query(180.0, ge=-180.0, le=180.0),
+    north: float = Query(90.0, ge=-90.0, le=90.0)
+):
+    """Return a dataset's aggregated grid cells for a zoom level and bounding box."""
+    from src.helper.serializer import encode_json
+    from src.services.pipeline import get_spatial_index
+    index = get_spatial_index(dataset_id)
+    if index is None:
+        return {
+            "status": 404,
+            "statusText": f"Unknown dataset: {dataset_id}"
+        }
+    zoom = min(zoom, index.max_zoom)
+    cells = index.query(zoom, west, south, east, north)
+    return Response(content=encode_json({
+        "status": 200,
+        "data": {
+            "zoom": zoom,
+            "max_zoom": index.max_zoom,
+            "points": index.points,
+            "cells": cells
+        }
+    }), media_type="application/json")
+
+
+@router.get("/{dataset_id}/columns")
+def read_stored_columns(dataset_id: str) -> Dict[str, Any]:
+    """Return the columns of a stored dataset that can be queried."""
+    from src.services.dataset_store import dataset_store
+    dataset = dataset_store.get(dataset_id)
+    if dataset is None:
+        return {
+            "status": 404,
+            "statusText": f"Unknown dataset: {dataset_id}"
+        }
+    return {
+        "status": 200,
+        "data": {
+            "rows": dataset.rows,
+            "location_column": dataset.location_column,
+            "columns": [{"name": col["name"], "kind": col["kind"]} for col in dataset.manifest["columns"]]
+        }
+    }
+
+@router.post("/{dataset_id}/query")
+def query_stored_dataset(dataset_id: str, query: Dict[str, Any]):
+    """
+    Re-aggregate a stored dataset without uploading it again.
+
+    The body holds 'metric', 'aggregation' (sum, mean, count, min or max,
+    default sum), optional 'filters' ([{'column', 'op', 'value'}]) and an
+    optional 'group_by' column (default: the location column).
+    """
+    from src.helper.serializer import encode_json
+    from src.services.dataset_store import dataset_store
+    dataset = dataset_store.get(dataset_id)
+    if dataset is None:
+        return {
+            "status": 404,
+            "statusText": f"Unknown dataset: {dataset_id}"
+        }
+    try:
+        groups, matched_rows = dataset.query(
+            metric=query.get("metric"),
+            aggregation=query.get("aggregation", "sum"),
+            filters=query.get("filters"),
+            group_by=query.get("group_by")
+        )
+    except ValueError as e:
+        return {
+            "status": 400,
+            "statusText": str(e)
+        }
+    return Response(content=encode_json({
+        "status": 200,
+        "data": {
+            "metric": query.get("metric"),
+            "aggregation": query.get("aggregation", "sum"),
+            "group_by": query.get("group_by") or dataset.location_column,
+            "matched_rows": matched_rows,
+            "groups": groups
+        }
+    }), media_type="application/json")
+
+@router.post("/{dataset_id}/append")
+def append_records(
+    dataset_id: str,
+    data: List[Dict[str, Any]],
+    approximate: bool = Query(settings.APPROXIMATE_ANALYTICS),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Append parsed CSV rows to a dataset and return the updated response.
+
+    Only the new rows are aggregated and only locations the dataset has not
+    seen are geocoded. The response carries the id of the appended version,
+    which the next append goes to; resending an append returns the same version.
+    """
+    from src.helper.columnar import accepts_columnar
+    from src.services.append import UnknownDatasetError
+    from src.services.pipeline import process_append_records
+    try:
+        key = records_hash(data, f":append:{dataset_id}" + (':approximate' if approximate else ''))
+        columnar = accepts_columnar(accept)
+        # The dataset's state is only looked up (and possibly rebuilt) on a cache miss
+        return cached_dataset_response(
+            key, if_none_match, columnar,
+            lambda progress: process_append_records(
+                dataset_id, data, progress, approximate=approximate, columnar=columnar, dataset_id=key
+            )
+        )
+
+    except UnknownDatasetError as e:
+        return {
+            "status": 404,
+            "statusText": str(e)
+        }
+    except Exception as e:
+        logger.exception("Error appending to dataset")
+        return {
+            "status": 500,
+            "statusText": str(e)
+        }
+
+@router.post("/{dataset_id}/append/upload")
+def append_uploaded_csv(
+    dataset_id: str,
+    file: UploadFile = File(...),
+    approximate: bool = Query(settings.APPROXIMATE_ANALYTICS),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Append the rows of a raw CSV file (optionally gzip-compressed) to a dataset, like /{dataset_id}/append."""
+    from src.helper.columnar import accepts_columnar
+    from src.services.append import UnknownDatasetError
+    from src.services.pipeline import process_append_csv
+    try:
+        key = file_hash(file.file, f":append:{dataset_id}" + (':approximate' if approximate else ''))
+        columnar = accepts_columnar(accept)
+        # The dataset's state is only looked up (and possibly rebuilt) on a cache miss
+        return cached_dataset_response(
+            key, if_none_match, columnar,
+            lambda progress: process_append_csv(
+                dataset_id, file.file, progress, approximate=approximate, columnar=columnar, dataset_id=key
+            )
+        )
+
+    except UnknownDatasetError as e:
+        return {
+            "status": 404,
+            "statusText": str(e)
         }
-        
-        return result
-        
     except Exception as e:
-        print("Error during geocoding:", str(e))
-        import traceback
-        traceback.print_exc()  # Better error logging
+        logger.exception("Error appending to dataset")
         return {
             "status": 500,
             "statusText": str(e)
-        }
\ No newline at end of file
+        }
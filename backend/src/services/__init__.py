@@ -1 +1,6 @@
-from src.services.analytical_data import get_analytical_data
\ No newline at end of file
+def __getattr__(name):
+    # Resolved on first use, so importing a single service does not load pandas
+    if name == 'get_analytical_data':
+        from src.services.analytical_data import get_analytical_data
+        return get_analytical_data
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
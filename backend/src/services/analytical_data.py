@@ -1,21 +1,67 @@
+import numpy as np
 import pandas as pd
-from src.helper.dtype_converter import convert_values, convert_numpy_to_python
-from src.services.core import get_major_location_column, get_numeric_columns_after_location
+from src.core.settings import settings
+from src.services.correlation import correlation_matrix, high_correlation_pairs, report_matrix, resolve_mode
+from src.services.parallel_profiling import frame_profile
+from src.services.profiling import SketchProfile
 
 
-def get_analytical_data(stringJsonData):
+def get_correlation_analysis(numeric, accumulator=None):
     """
-    Analyzes JSON data and returns comprehensive analytical insights.
+    Correlates the numeric columns once and reports the matrix and strong pairs.
+
+    The matrix is reported densely for narrow datasets and sparsely (strongest
+    partners per column, or pairs above the threshold) for wide ones, see
+    CORRELATION_MODE. Frames taller than CORRELATION_SAMPLE_ROWS are
+    correlated on a random sample of rows.
+
+    Args:
+        numeric (DataFrame): The numeric columns, or None with an accumulator
+        accumulator (CorrelationAccumulator): Sums collected while streaming,
+            used instead of the frame
+
+    Returns:
+        dict: 'correlation_matrix' and 'high_correlations', plus 'correlation_mode'
+            when the matrix is not dense and 'correlation_sample_rows' when sampled
+    """
+    result = {}
+    if accumulator is not None:
+        columns = accumulator.columns
+        matrix = accumulator.matrix()
+    else:
+        columns = numeric.columns.tolist()
+        sample_rows = settings.CORRELATION_SAMPLE_ROWS
+        if 0 < sample_rows < len(numeric):
+            rows = np.random.default_rng(0).choice(len(numeric), size=sample_rows, replace=False)
+            numeric = numeric.iloc[np.sort(rows)]
+            result['correlation_sample_rows'] = sample_rows
+        matrix = correlation_matrix(numeric, settings.CORRELATION_BLOCK_ROWS)
+
+    mode = resolve_mode(settings.CORRELATION_MODE, len(columns), settings.CORRELATION_DENSE_MAX_COLUMNS)
+    result['correlation_matrix'] = report_matrix(
+        matrix, columns, mode, settings.CORRELATION_THRESHOLD, settings.CORRELATION_TOP_K
+    )
+    if mode != 'dense':
+        result['correlation_mode'] = mode
+    result['high_correlations'] = high_correlation_pairs(matrix, columns, settings.CORRELATION_THRESHOLD)
+    return result
+
+
+def get_analytical_data(dataset, approximate=False):
+    """
+    Analyzes a dataset and returns comprehensive analytical insights.
     
     Args:
-        stringJsonData: JSON data from frontend (may contain stringified values)
+        dataset (Dataset): Parsed upload with its detected location and numeric columns
+        approximate (bool): Use sketches for distinct counts, quantiles, top values
+            and duplicates; the result then has an 'approximation' section
         
     Returns:
         dict: Comprehensive analytical data including statistics, patterns, and insights
+            (values may be NumPy scalars; encode_json serializes them directly)
     """
-    # Convert stringified values to proper types
-    jsonData = convert_values(stringJsonData)
-    df = pd.DataFrame(jsonData)
+    df = dataset.frame
+    profile = SketchProfile(df) if approximate else frame_profile(df)
     
     # Initialize analytics structure
     analytics = {
@@ -37,46 +83,24 @@ def get_analytical_data(stringJsonData):
     }
     
     # ===== COLUMN-LEVEL ANALYSIS =====
+    # All per-column metrics come from the single profiling pass above
     for col in df.columns:
         col_data = {
             'data_type': str(df[col].dtype),
-            'non_null_count': int(df[col].notna().sum()),
-            'null_count': int(df[col].isna().sum()),
-            'null_percentage': round((df[col].isna().sum() / len(df)) * 100, 2),
-            'unique_count': int(df[col].nunique()),
-            'uniqueness_ratio': round(df[col].nunique() / len(df), 4) if len(df) > 0 else 0
+            'non_null_count': int(profile.non_null[col]),
+            'null_count': int(profile.nulls[col]),
+            'null_percentage': round((profile.nulls[col] / len(df)) * 100, 2),
+            'unique_count': int(profile.nunique[col]),
+            'uniqueness_ratio': round(int(profile.nunique[col]) / len(df), 4) if len(df) > 0 else 0
         }
         
         # Numeric column analysis
-        if pd.api.types.is_numeric_dtype(df[col]):
-            col_data['numeric_stats'] = {
-                'min': float(df[col].min()) if df[col].notna().any() else None,
-                'max': float(df[col].max()) if df[col].notna().any() else None,
-                'mean': round(float(df[col].mean()), 2) if df[col].notna().any() else None,
-                'median': float(df[col].median()) if df[col].notna().any() else None,
-                'std': round(float(df[col].std()), 2) if df[col].notna().any() else None,
-                'q25': float(df[col].quantile(0.25)) if df[col].notna().any() else None,
-                'q75': float(df[col].quantile(0.75)) if df[col].notna().any() else None,
-                'sum': float(df[col].sum()) if df[col].notna().any() else None,
-                'zeros_count': int((df[col] == 0).sum()),
-                'negative_count': int((df[col] < 0).sum()),
-                'positive_count': int((df[col] > 0).sum())
-            }
-            
-            # Outlier detection (IQR method)
-            if df[col].notna().any():
-                Q1 = df[col].quantile(0.25)
-                Q3 = df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                lower_bound = Q1 - 1.5 * IQR
-                upper_bound = Q3 + 1.5 * IQR
-                outliers = df[(df[col] < lower_bound) | (df[col] > upper_bound)][col]
-                col_data['numeric_stats']['outlier_count'] = int(len(outliers))
-                col_data['numeric_stats']['outlier_percentage'] = round((len(outliers) / len(df)) * 100, 2)
+        if col in profile.numeric_columns:
+            col_data['numeric_stats'] = profile.numeric_stats(col)
         
         # Categorical/Text column analysis
         else:
-            top_values = df[col].value_counts().head(10)
+            top_values = profile.top_values(col)
             col_data['categorical_stats'] = {
                 'top_values': [
                     {'value': str(val), 'count': int(count), 'percentage': round((count / len(df)) * 100, 2)}
@@ -89,20 +113,23 @@ def get_analytical_data(stringJsonData):
         analytics['columns'][col] = col_data
     
     # ===== LOCATION ANALYSIS =====
-    location_column = get_major_location_column(jsonData)
+    location_column = dataset.location_column
     if location_column:
         analytics['location_analysis'] = {
             'detected_location_column': location_column,
-            'unique_locations': int(df[location_column].nunique()),
+            'unique_locations': int(profile.nunique[location_column]),
             'location_list': df[location_column].dropna().unique().tolist()[:50],  # Limit to 50
             'most_common_locations': [
                 {'location': str(loc), 'count': int(count)}
-                for loc, count in df[location_column].value_counts().head(10).items()
+                for loc, count in (
+                    profile.top_values(location_column) if location_column in profile.categorical_columns
+                    else df[location_column].value_counts().head(10)
+                ).items()
             ]
         }
         
         # Get numeric columns after location
-        numeric_cols = get_numeric_columns_after_location(df, location_column)
+        numeric_cols = dataset.numeric_columns
         analytics['location_analysis']['associated_numeric_columns'] = numeric_cols
         
     else:
@@ -117,38 +144,27 @@ def get_analytical_data(stringJsonData):
         analytics['numeric_analysis'] = {
             'total_numeric_columns': len(numeric_columns),
             'column_names': numeric_columns,
-            'correlation_matrix': df[numeric_columns].corr().round(3).to_dict() if len(numeric_columns) > 1 else {},
-            'total_sum': {col: float(df[col].sum()) for col in numeric_columns},
+            'correlation_matrix': {},
+            'total_sum': {col: float(profile.sum[col]) for col in numeric_columns},
             'overall_statistics': {
-                'total_values': int(df[numeric_columns].count().sum()),
-                'total_nulls': int(df[numeric_columns].isna().sum().sum())
+                'total_values': int(profile.non_null[numeric_columns].sum()),
+                'total_nulls': int(profile.nulls[numeric_columns].sum())
             }
         }
-        
-        # Find highly correlated pairs (>0.7 or <-0.7)
         if len(numeric_columns) > 1:
-            corr_matrix = df[numeric_columns].corr()
-            high_correlations = []
-            for i in range(len(corr_matrix.columns)):
-                for j in range(i+1, len(corr_matrix.columns)):
-                    if abs(corr_matrix.iloc[i, j]) > 0.7:
-                        high_correlations.append({
-                            'column1': corr_matrix.columns[i],
-                            'column2': corr_matrix.columns[j],
-                            'correlation': round(float(corr_matrix.iloc[i, j]), 3)
-                        })
-            analytics['numeric_analysis']['high_correlations'] = high_correlations
+            analytics['numeric_analysis'].update(get_correlation_analysis(df[numeric_columns]))
     
     # ===== DATA QUALITY =====
+    filled_cells = profile.non_null.sum()
     analytics['data_quality'] = {
-        'completeness_score': round((df.notna().sum().sum() / (len(df) * len(df.columns))) * 100, 2),
-        'duplicate_rows': int(df.duplicated().sum()),
-        'duplicate_percentage': round((df.duplicated().sum() / len(df)) * 100, 2),
-        'columns_with_nulls': [col for col in df.columns if df[col].isna().any()],
-        'columns_with_high_nulls': [col for col in df.columns if (df[col].isna().sum() / len(df)) > 0.3],
+        'completeness_score': round((filled_cells / (len(df) * len(df.columns))) * 100, 2),
+        'duplicate_rows': int(profile.duplicate_rows),
+        'duplicate_percentage': round((profile.duplicate_rows / len(df)) * 100, 2),
+        'columns_with_nulls': [col for col in df.columns if profile.nulls[col] > 0],
+        'columns_with_high_nulls': [col for col in df.columns if (profile.nulls[col] / len(df)) > 0.3],
         'total_cells': len(df) * len(df.columns),
-        'filled_cells': int(df.notna().sum().sum()),
-        'empty_cells': int(df.isna().sum().sum())
+        'filled_cells': int(filled_cells),
+        'empty_cells': int(profile.nulls.sum())
     }
     
     # ===== PATTERNS =====
@@ -162,7 +178,7 @@ def get_analytical_data(stringJsonData):
     # Check for potential categorical columns (low cardinality)
     potential_categories = [
         col for col in df.columns 
-        if df[col].nunique() < 20 and df[col].nunique() > 1
+        if profile.nunique[col] < 20 and profile.nunique[col] > 1
     ]
     analytics['patterns']['potential_categorical_columns'] = potential_categories
     
@@ -188,6 +204,7 @@ def get_analytical_data(stringJsonData):
                 f"Found {len(analytics['numeric_analysis']['high_correlations'])} highly correlated column pairs. Review for potential multicollinearity."
             )
 
-    analytics = convert_numpy_to_python(analytics)
+    if approximate:
+        analytics['approximation'] = profile.approximation()
 
     return analytics
\ No newline at end of file
@@ -0,0 +1,205 @@
+from collections import OrderedDict
+import copy
+import math
+import threading
+
+from src.core.settings import settings
+from src.services.dataset_store import dataset_store
+from src.services.location_keys import location_key
+from src.services.streaming import StreamingAggregator
+
+
+class UnknownDatasetError(LookupError):
+    """Raised when appending to a dataset that is unknown or has expired."""
+
+
+def _located(latitude, longitude):
+    """Locations that failed to geocode (or were not found) are looked up again on the next append."""
+    return not (latitude is None or longitude is None or math.isnan(latitude) or math.isnan(longitude))
+
+
+def _coordinate_key(name):
+    """Spellings of one place share coordinates even if the name of its group changes."""
+    if settings.LOCATION_NORMALIZATION and isinstance(name, str):
+        return location_key(name)
+    return name
+
+
+class AppendState:
+    """
+    Mergeable state of a dataset that rows can be appended to.
+
+    The StreamingAggregator of all rows so far holds the per-location sums and
+    row counts, the running statistics of every column (counts, sums,
+    Welford/Chan mean and variance, min/max, value counts for the top values)
+    and the pairwise correlation sums, plus the sketches behind quartiles,
+    outliers and duplicates (and in approximate mode distinct counts and top
+    values), so an appended version keeps every statistic of a full upload,
+    estimated where it cannot be merged exactly. Together with the
+    coordinates of every location resolved so far, an append costs one pass
+    over the new rows and geocodes only the locations they introduce. The
+    state grows with the distinct values and locations, not with the rows.
+    """
+
+    def __init__(self, aggregator, coordinates=None):
+        self.aggregator = aggregator
+        self.coordinates = coordinates or {}
+
+    def copy(self):
+        """Returns an independent copy, so appending never changes a published version."""
+        return copy.deepcopy(self)
+
+    def append(self, frame):
+        """
+        Folds new rows into the aggregates.
+
+        Args:
+            frame (DataFrame): Typed rows with the columns of the dataset, in any order
+        """
+        columns = self.aggregator.columns
+        missing = [col for col in columns if col not in frame.columns]
+        unknown = [col for col in frame.columns if col not in columns]
+        if missing or unknown:
+            raise ValueError(
+                f"Appended rows must have the columns of the dataset (missing: {missing}, unknown: {unknown})."
+            )
+        self.aggregator.update(frame[columns])
+
+    def known_coordinates(self, locations):
+        """
+        Returns the coordinates already resolved for some locations.
+
+        Args:
+            locations (Series): Location names of the aggregated frame
+
+        Returns:
+            dict: Location name -> {'latitude', 'longitude'} for the names seen before
+        """
+        known = {}
+        for name in locations.dropna().unique():
+            coords = self.coordinates.get(_coordinate_key(name))
+            if coords is not None:
+                known[name] = coords
+        return known
+
+    def remember(self, response):
+        """
+        Keeps the coordinates of a geocoded frame for the next appends.
+
+        Args:
+            response (DataFrame): Geocoded locations ('name', 'latitude', 'longitude')
+        """
+        for name, latitude, longitude in response[['name', 'latitude', 'longitude']].itertuples(index=False):
+            if _located(latitude, longitude):
+                self.coordinates[_coordinate_key(name)] = {'latitude': latitude, 'longitude': longitude}
+
+
+class AppendStateRegistry:
+    """
+    Keeps the append states of the most recently used dataset versions in memory.
+
+    States are keyed by dataset id and mode, since an approximate state
+    carries sketches an exact one does not.
+    """
+
+    def __init__(self, max_datasets):
+        self.max_datasets = max_datasets
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dataset_id, approximate=False):
+        key = (dataset_id, approximate)
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None:
+                self._states.move_to_end(key)
+            return state
+
+    def put(self, dataset_id, state, approximate=False):
+        key = (dataset_id, approximate)
+        with self._lock:
+            self._states[key] = state
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_datasets:
+                self._states.popitem(last=False)
+
+
+append_states = AppendStateRegistry(settings.APPEND_MAX_DATASETS)
+
+
+def register_append_state(dataset_id, aggregator, response):
+    """
+    Makes a processed dataset appendable.
+
+    Args:
+        dataset_id (str): Id returned with the dataset response
+        aggregator (StreamingAggregator): Aggregate state of all its rows
+        response (DataFrame): Its geocoded locations
+    """
+    if dataset_id is None:
+        return
+    state = AppendState(aggregator)
+    state.remember(response)
+    append_states.put(dataset_id, state, aggregator.approximate)
+
+
+def register_dataset_state(dataset_id, dataset, response, approximate=False):
+    """
+    Makes a dataset that was parsed in one piece (see process_records) appendable.
+
+    Its rows are folded into an aggregator once, so the first append does not
+    read the dataset back from the store. Compacted frames are left to that
+    rebuild: their categorical and downcast columns would not merge with the
+    typed rows of later appends.
+
+    Args:
+        dataset_id (str): Id returned with the dataset response
+        dataset (Dataset): The parsed dataset
+        response (DataFrame): Its geocoded locations
+        approximate (bool): Also sketch the distinct counts and top values
+    """
+    if dataset_id is None or dataset.compacted or dataset.location_column is None:
+        return
+    aggregator = StreamingAggregator(approximate=approximate, location_column=dataset.location_column)
+    aggregator.update(dataset.frame)
+    register_append_state(dataset_id, aggregator, response)
+
+
+def get_append_state(dataset_id, approximate=False):
+    """
+    Returns the append state of a dataset.
+
+    States live in the memory of the process that built them. Otherwise the
+    dataset is read back once from the dataset store, reusing its stored
+    geocodes, and its state is kept for the next appends.
+
+    Args:
+        dataset_id (str): Id returned with the dataset response
+        approximate (bool): Also sketch the distinct counts and top values of the rebuilt state
+
+    Returns:
+        AppendState: The state, or None if the dataset is unknown
+    """
+    state = append_states.get(dataset_id, approximate)
+    if state is not None:
+        return state
+
+    stored = dataset_store.get(dataset_id)
+    if stored is None:
+        return None
+    aggregator = StreamingAggregator(approximate=approximate, location_column=stored.location_column)
+    for frame in stored.iter_frames(settings.CSV_CHUNK_ROWS):
+        aggregator.update(frame)
+
+    # Stored geocodes are keyed by the values as uploaded; grouped_frame maps them to their names
+    aggregator.grouped_frame()
+    names = aggregator.location_names or {}
+    state = AppendState(aggregator)
+    for value, (latitude, longitude) in stored.location_coordinates().items():
+        if not _located(latitude, longitude):
+            continue
+        state.coordinates.setdefault(
+            _coordinate_key(names.get(value, value)), {'latitude': latitude, 'longitude': longitude}
+        )
+    append_states.put(dataset_id, state, approximate)
+    return state
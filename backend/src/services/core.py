@@ -1,43 +1,65 @@
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+import logging
+import numpy as np
 import pandas as pd
-import time
 import re
 import io
-from src.helper.dtype_converter import convert_values
+from src.core.settings import settings
+from src.services.geocode_cache import geocode_cache
+from src.services.geocode_scheduler import get_geocode_scheduler
+from src.services.geocoders import get_geocoder_backends
+from src.services.location_keys import location_name_map, normalize_locations
+from src.services.metrics import STAGE_GEOCODING, STAGE_GROUPBY, stage_timer
 
+logger = logging.getLogger(__name__)
 
-def get_major_location_column(jsonData):
+# Location keywords with priority (higher = more specific/major)
+LOCATION_KEYWORDS = {
+    'country': 5,
+    'nation': 5,
+    'city': 4,
+    'town': 4,
+    'municipality': 4,
+    'state': 3,
+    'province': 3,
+    'region': 2,
+    'county': 2,
+    'district': 2,
+    'zip': 1,
+    'postal': 1,
+    'location': 3,
+    'place': 2,
+    'address': 1
+}
+
+# Place type implied by a location column name, used to rank gazetteer matches
+LOCATION_TYPES = {
+    'country': 'country',
+    'nation': 'country',
+    'city': 'city',
+    'town': 'city',
+    'municipality': 'city',
+    'state': 'state',
+    'province': 'state'
+}
+
+# Coarseness of each location type; a qualifier column must be coarser than the location column
+LOCATION_TYPE_RANKS = {
+    'country': 0,
+    'state': 1,
+    'city': 2
+}
+
+
+def get_location_column_candidates(df):
     """
-    Analyzes a JSON Data and returns the major location-related column.
-    
+    Scores every location-related column of a DataFrame.
+
     Args:
-        jsonData (list): JSON data from frontend (list of dicts).
-        
+        df (DataFrame): The dataframe to analyze
+
     Returns:
-        string: The name of the major location-related column, or None if not found.
+        list: Candidate dicts ('column', 'score', 'uniqueness', 'fill_rate'), best first
     """
-    # Create DataFrame from list of dicts
-    df = pd.DataFrame(jsonData)
-    # Location keywords with priority (higher = more specific/major)
-    location_keywords = {
-        'country': 5,
-        'nation': 5,
-        'city': 4,
-        'town': 4,
-        'municipality': 4,
-        'state': 3,
-        'province': 3,
-        'region': 2,
-        'county': 2,
-        'district': 2,
-        'zip': 1,
-        'postal': 1,
-        'location': 3,
-        'place': 2,
-        'address': 1
-    }
-    
     location_cols = []
     
     # Identify potential location columns
@@ -45,7 +67,7 @@ def get_major_location_column(jsonData):
         col_lower = col.lower().strip()
         
         # Check if column name contains location keywords
-        for keyword, priority in location_keywords.items():
+        for keyword, priority in LOCATION_KEYWORDS.items():
             if keyword in col_lower:
                 # Calculate uniqueness ratio (more unique = more specific location)
                 uniqueness = df[col].nunique() / len(df) if len(df) > 0 else 0
@@ -63,12 +85,28 @@ def get_major_location_column(jsonData):
                     'fill_rate': fill_rate
                 })
                 break
+
+    # Stable sort keeps the first column on ties, like max() did
+    return sorted(location_cols, key=lambda x: x['score'], reverse=True)
+
+
+def get_major_location_column(jsonData):
+    """
+    Analyzes a JSON Data and returns the major location-related column.
     
+    Args:
+        jsonData (list or DataFrame): JSON data from frontend (list of dicts) or a typed DataFrame.
+        
+    Returns:
+        string: The name of the major location-related column, or None if not found.
+    """
+    # Create DataFrame from list of dicts
+    df = jsonData if isinstance(jsonData, pd.DataFrame) else pd.DataFrame(jsonData)
+    location_cols = get_location_column_candidates(df)
+
     # Return the column with highest score
     if location_cols:
-        major_location = max(location_cols, key=lambda x: x['score'])
-        
-        return major_location['column']
+        return location_cols[0]['column']
     
     else:
         return None
@@ -105,14 +143,122 @@ def get_numeric_columns_after_location(df, location_column):
         if pd.api.types.is_numeric_dtype(df[col]):
             numeric_cols.append(col)
         else:
-            print(f"Column '{col}' is not numeric")
+            logger.debug("Column '%s' is not numeric", col)
     
     return numeric_cols
 
 
+def get_location_type(location_column):
+    """
+    Infers the kind of place stored in a location column from its name.
+
+    Args:
+        location_column (str): The name of the location column
+
+    Returns:
+        str: 'country', 'state' or 'city', or None if the name is not specific
+    """
+    col_lower = str(location_column).lower()
+    for keyword, location_type in LOCATION_TYPES.items():
+        if keyword in col_lower:
+            return location_type
+    return None
+
+
+def get_location_qualifier_column(df, candidates, location_column):
+    """
+    Finds a column of coarser places to tell same-named locations apart.
+
+    Args:
+        df (DataFrame): The dataframe to analyze
+        candidates (list): Location column candidates (see get_location_column_candidates)
+        location_column (str): The name of the location column
+
+    Returns:
+        str: The best-scoring text column of a coarser location type (e.g. a
+            country column for a city column), or None
+    """
+    own_rank = LOCATION_TYPE_RANKS.get(get_location_type(location_column), len(LOCATION_TYPE_RANKS))
+    for candidate in candidates:
+        col = candidate['column']
+        rank = LOCATION_TYPE_RANKS.get(get_location_type(col))
+        if col != location_column and rank is not None and rank < own_rank and not pd.api.types.is_numeric_dtype(df[col]):
+            return col
+    return None
+
+
+def group_locations(dataset):
+    """
+    Computes the canonical location name of every row (see normalize_locations).
+
+    Args:
+        dataset (Dataset): Parsed upload with its detected location column
+
+    Returns:
+        Series: Categorical location names aligned with the rows, NaN where missing
+    """
+    df = dataset.frame
+    location_column = dataset.location_column
+    qualifier_column = None
+    if settings.LOCATION_QUALIFIER_COLUMN:
+        qualifier_column = get_location_qualifier_column(df, dataset.location_candidates, location_column)
+        if qualifier_column is not None:
+            logger.debug("Qualifying locations with column: %s", qualifier_column)
+    return normalize_locations(
+        df[location_column],
+        get_location_type(location_column),
+        qualifiers=df[qualifier_column] if qualifier_column is not None else None,
+        qualifier_type=get_location_type(qualifier_column) if qualifier_column is not None else None
+    )
+
+
+def lookup_location_offline(location_name, location_type='city'):
+    """
+    Resolves a location without calling a remote geocoder.
+
+    Local backends (e.g. the gazetteer) are tried first, then the shared geocode cache.
+
+    Args:
+        location_name (str): Name of the location
+        location_type (str): Type of location (city, country, state, etc.)
+
+    Returns:
+        dict: Contains 'location', 'latitude', 'longitude', or None if a remote lookup is needed
+    """
+    for backend in get_geocoder_backends():
+        if not backend.remote:
+            result = backend.geocode(location_name, location_type)
+            if result is not None:
+                return result
+
+    # Serve repeat lookups (including cached misses and errors) from the shared cache
+    return geocode_cache.get(location_name, location_type)
+
+
+def geocode_remote(location_name, location_type='city'):
+    """
+    Resolves a location with the first configured remote backend and caches the result.
+
+    The request goes through the shared geocode scheduler, so it is rate limited
+    per provider and joins an identical lookup that is already in flight.
+
+    Args:
+        location_name (str): Name of the location
+        location_type (str): Type of location (city, country, state, etc.)
+
+    Returns:
+        dict: Contains 'location', 'latitude', 'longitude' and, on failure, 'error_message'
+    """
+    result = get_geocode_scheduler().submit(location_name, location_type).result()
+    return dict(result, location=location_name)
+
+
 def get_location_coordinates(location_name, location_type='city'):
     """
-    Gets longitude and latitude for a given location using Nominatim (OpenStreetMap).
+    Gets longitude and latitude for a given location.
+
+    The local gazetteer and the geocode cache are consulted first; Nominatim
+    (OpenStreetMap) is only called on a miss.
     
     Args:
         location_name (str): Name of the location
@@ -121,102 +267,148 @@ def get_location_coordinates(location_name, location_type='city'):
     Returns:
         dict: Contains 'location', 'latitude', 'longitude', 'display_name'
     """
-    try:
-        # Initialize geocoder with a user agent
-        geolocator = Nominatim(user_agent="location_analyzer_app")
-        
-        # Add delay to respect rate limits (1 request per second for Nominatim)
-        time.sleep(1)
-        
-        # Geocode the location
-        location = geolocator.geocode(location_name, timeout=10)
-        
-        if location:
-            return {
-                'location': location_name,
-                'latitude': location.latitude,
-                'longitude': location.longitude
-            }
-        else:
-            return {
-                'location': location_name,
-                'latitude': None,
-                'longitude': None,
-            }
-            
-    except (GeocoderTimedOut, GeocoderServiceError) as e:
-        return {
-            'location': location_name,
-            'latitude': None,
-            'longitude': None,
-            'error_message': str(e)
-        }
-
-
-def get_coordinates_for_json(stringJsonData):
+    result = lookup_location_offline(location_name, location_type)
+    if result is not None:
+        return result
+    return geocode_remote(location_name, location_type)
+
+
+def log_progress(stage, done, total, message):
+    """Default progress callback: logs each progress step at debug level."""
+    logger.debug("[%s] %s/%s: %s", stage, done, total, message)
+
+
+def get_coordinates_for_json(dataset, progress=log_progress):
     """
     Adds latitude and longitude columns to a CSV based on location data,
     and aggregates numeric columns by location.
+
+    The response keeps one summed column per numeric column; other
+    per-location aggregates (mean, count, min, max) are served by the query
+    API of the dataset store. Rows without a location are skipped instead of
+    being geocoded. With LOCATION_NORMALIZATION, rows are grouped and geocoded on the canonical
+    name of their location, so spellings of one place make one point;
+    dataset.location_names maps every spelling to its name.
     
     Args:
-        jsonData (list): JSON data from frontend containing location and numeric data.
+        dataset (Dataset): Parsed upload with its detected location and numeric columns.
+        progress (callable): Callback(stage, done, total, message) reporting geocoding progress.
         
     Returns:
         JSON: Locations with added latitude, longitude, and aggregated numeric data.
     """
-
-    # Convert stringified values to proper types
-    jsonData = convert_values(stringJsonData)
-    # Auto-detect location column
-    location_column = get_major_location_column(jsonData) 
+    df = dataset.frame
+    location_column = dataset.location_column
     if location_column is None:
         raise ValueError("No location column found in data.")
     
-    print(f"Using auto-detected column: {location_column}")
-    
-    # Create DataFrame
-    df = pd.DataFrame(jsonData)
+    logger.debug("Using auto-detected column: %s", location_column)
+
+    # Rows without a location cannot be placed on the globe; report them instead of geocoding
+    null_locations = df[location_column].isna()
+    null_location_rows = int(null_locations.sum())
+    if null_location_rows:
+        logger.info("Skipping %d rows without a location", null_location_rows)
     
-    # Detect numeric columns after location column
-    numeric_columns = get_numeric_columns_after_location(df, location_column)
-    df_grouped = df[[location_column] + numeric_columns].copy()
+    # Numeric locations (e.g. postal codes) are grouped as they are
+    locations = df[location_column]
+    if settings.LOCATION_NORMALIZATION and not pd.api.types.is_numeric_dtype(locations):
+        with stage_timer(STAGE_GROUPBY):
+            locations = group_locations(dataset)
+        dataset.location_names = location_name_map(df[location_column], locations)
+        logger.debug(
+            "Normalized %d location spellings to %d locations",
+            len(dataset.location_names), len(locations.cat.categories)
+        )
+
+    # Numeric columns after location column
+    numeric_columns = dataset.numeric_columns
     if numeric_columns:
-        print(f"Found numeric columns to aggregate: {numeric_columns}")
+        logger.debug("Found numeric columns to aggregate: %s", numeric_columns)
         
-        # Group by location and sum numeric columns
-        agg_dict = {col: 'sum' for col in numeric_columns}
-        df_grouped = df.groupby(location_column, as_index=False).agg(agg_dict)
+        # Group by location once, summing only the projected numeric columns
+        # (observed=True: a dictionary-encoded location column groups on its codes)
+        with stage_timer(STAGE_GROUPBY):
+            sums = df.groupby(locations, sort=True, observed=True)[numeric_columns].sum()
+        df_grouped = sums.rename_axis(location_column).reset_index()
     else:
-        print("No numeric columns found after location column")
-    
-    # Initialize coordinate columns
-    df_grouped['latitude'] = None
-    df_grouped['longitude'] = None
-    
+        logger.info("No numeric columns found after location column")
+        df_grouped = locations[~null_locations].to_frame(location_column)
+
+    return attach_coordinates(df_grouped, location_column, progress)
+
+
+def attach_coordinates(df_grouped, location_column, progress=log_progress, known=None):
+    """
+    Geocodes the locations of an aggregated frame and adds their coordinates.
+
+    Args:
+        df_grouped (DataFrame): One row per location, plus aggregated numeric columns
+        location_column (str): The name of the location column
+        progress (callable): Callback(stage, done, total, message) reporting geocoding progress
+        known (dict): Coordinates resolved earlier (location -> {'latitude', 'longitude'}),
+            used as they are; only the other locations are looked up
+
+    Returns:
+        DataFrame: The frame with latitude and longitude, location column renamed to 'name'
+    """
+    with stage_timer(STAGE_GEOCODING):
+        return _attach_coordinates(df_grouped, location_column, progress, known or {})
+
+
+def _attach_coordinates(df_grouped, location_column, progress, known):
+    locations = df_grouped[location_column]
+
     # Get unique locations to minimize API calls
-    unique_locations = df_grouped[location_column].dropna().unique()
-    
-    if len(unique_locations) > 100:
-        raise ValueError("Too many unique locations (>100). Please reduce the dataset size.")
+    unique_locations = locations.dropna().unique()
 
     if len(unique_locations) == 0:
         raise ValueError("No valid locations found in the location column.")
-        
+
+    location_type = get_location_type(location_column)
     location_cache = {}
-        
-    # Geocode unique locations
-    for i, loc in enumerate(unique_locations, 1):
-        print(f"Processing {i}/{len(unique_locations)}: {loc}")
-        coords = get_location_coordinates(str(loc))
-        location_cache[loc] = coords
-    
-    # Map coordinates back to dataframe
-    for idx, row in df_grouped.iterrows():
-        loc_value = row[location_column]
-        if pd.notna(loc_value) and loc_value in location_cache:
-            coords = location_cache[loc_value]
-            df_grouped.at[idx, 'latitude'] = coords['latitude']
-            df_grouped.at[idx, 'longitude'] = coords['longitude']
+    pending_locations = []
+
+    # Resolve what we can locally (known coordinates, gazetteer, shared cache) before going remote
+    for loc in unique_locations:
+        coords = known.get(loc)
+        if coords is None:
+            coords = lookup_location_offline(str(loc), location_type)
+        if coords is None:
+            pending_locations.append(loc)
+        else:
+            location_cache[loc] = coords
+
+    progress('offline', len(location_cache), len(unique_locations), "locations resolved offline")
+
+    if len(pending_locations) > settings.MAX_REMOTE_GEOCODE_LOCATIONS:
+        raise ValueError(
+            f"Too many unique locations need remote geocoding (>{settings.MAX_REMOTE_GEOCODE_LOCATIONS}). "
+            "Please reduce the dataset size."
+        )
+
+    # Geocode the remaining unique locations remotely, concurrently within the provider rate limits
+    remote_results = get_geocode_scheduler().geocode_many(
+        [str(loc) for loc in pending_locations],
+        location_type,
+        on_result=lambda done, total, loc, coords: progress('geocoding', done, total, loc)
+    )
+    for loc in pending_locations:
+        location_cache[loc] = remote_results[str(loc)]
+
+    # Timeouts and service errors are transient, unlike locations that were not found
+    errors = sum(1 for coords in location_cache.values() if coords.get('error_message') is not None)
+    if errors:
+        progress('geocode_errors', errors, len(unique_locations), "locations failed to geocode")
+
+    # Hash join of the resolved coordinates onto the rows; unresolved locations stay NaN
+    resolved = pd.Index(list(location_cache))
+    positions = resolved.get_indexer(locations)
+    latitudes = np.array([coords['latitude'] for coords in location_cache.values()], dtype=np.float64)
+    longitudes = np.array([coords['longitude'] for coords in location_cache.values()], dtype=np.float64)
+    found = positions >= 0
+    df_grouped['latitude'] = np.where(found, latitudes[positions], np.nan)
+    df_grouped['longitude'] = np.where(found, longitudes[positions], np.nan)
     
     # Rename location column to 'name' and prepare output
     df_grouped = df_grouped.rename(columns={location_column: 'name'})
@@ -0,0 +1,227 @@
+import numpy as np
+
+# How the correlation matrix is reported in the analytics
+CORRELATION_MODES = ('auto', 'dense', 'threshold', 'top_k', 'none')
+
+
+class CorrelationAccumulator:
+    """
+    Pairwise-complete Pearson correlations over row blocks.
+
+    For every pair of columns it keeps the count, sums, sums of squares and
+    sum of products over the rows where both values are present, so nulls are
+    handled pairwise like DataFrame.corr(). Each block costs a handful of
+    matrix products instead of one pass per column pair, memory stays at a few
+    columns x columns matrices whatever the number of rows, and accumulators
+    of separate chunks can be merged.
+
+    Values are shifted by a per-column offset (the mean of the first block)
+    before summing, which keeps the sums of squares well conditioned for
+    columns with a large mean and a small spread.
+    """
+
+    def __init__(self, columns, block_rows=65536):
+        self.columns = list(columns)
+        self.block_rows = max(1, block_rows)
+        size = len(self.columns)
+        self.shift = None
+        self.count = np.zeros((size, size))
+        self.sums = np.zeros((size, size))  # [i, j]: sum of column i where i and j are both present
+        self.squares = np.zeros((size, size))  # [i, j]: sum of column i squared, same rows
+        self.products = np.zeros((size, size))
+
+    def update(self, frame):
+        """
+        Adds rows.
+
+        Args:
+            frame (DataFrame): Rows with (at least) the accumulator's numeric columns;
+                missing columns count as nulls
+        """
+        frame = frame.reindex(columns=self.columns)
+        for start in range(0, len(frame), self.block_rows):
+            block = frame.iloc[start:start + self.block_rows].to_numpy(dtype=np.float64, na_value=np.nan)
+            self._update_block(block)
+
+    def _update_block(self, block):
+        present = np.isfinite(block)
+        if self.shift is None:
+            counts = present.sum(axis=0)
+            totals = np.where(present, block, 0.0).sum(axis=0)
+            self.shift = np.divide(totals, counts, out=np.zeros(len(self.columns)), where=counts > 0)
+
+        values = np.where(present, block - self.shift, 0.0)
+        self.products += values.T @ values
+        if present.all():
+            # No nulls: every pair sees every row
+            self.count += len(block)
+            self.sums += values.sum(axis=0)[:, None]
+            self.squares += (values * values).sum(axis=0)[:, None]
+        else:
+            weights = present.astype(np.float64)
+            self.count += weights.T @ weights
+            self.sums += values.T @ weights
+            self.squares += (values * values).T @ weights
+
+    def merge(self, other):
+        """
+        Adds the rows of another accumulator over the same columns.
+
+        Args:
+            other (CorrelationAccumulator): Accumulator of other rows
+        """
+        if other.columns != self.columns:
+            raise ValueError("Correlation accumulators cover different columns")
+        if other.shift is None:
+            return
+        if self.shift is None:
+            self.shift = other.shift.copy()
+
+        # Move the other sums onto this shift: x - self.shift = (x - other.shift) + delta
+        delta = other.shift - self.shift
+        di = delta[:, None]
+        dj = delta[None, :]
+        self.products += other.products + dj * other.sums + di * other.sums.T + di * dj * other.count
+        self.squares += other.squares + 2 * di * other.sums + di * di * other.count
+        self.sums += other.sums + di * other.count
+        self.count += other.count
+
+    def select(self, columns):
+        """
+        Returns an accumulator restricted to some of the columns.
+
+        Args:
+            columns (list): Columns to keep, all of them covered by this accumulator
+
+        Returns:
+            CorrelationAccumulator: Copy holding only the sums of those columns
+        """
+        positions = [self.columns.index(col) for col in columns]
+        grid = np.ix_(positions, positions)
+        selected = CorrelationAccumulator(columns, self.block_rows)
+        selected.shift = self.shift[positions] if self.shift is not None else None
+        selected.count = self.count[grid]
+        selected.sums = self.sums[grid]
+        selected.squares = self.squares[grid]
+        selected.products = self.products[grid]
+        return selected
+
+    def matrix(self):
+        """
+        Returns the correlation matrix.
+
+        Returns:
+            ndarray: Columns x columns, NaN where a pair has fewer than two
+                rows or a constant column, like DataFrame.corr()
+        """
+        count = self.count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = count * self.products - self.sums * self.sums.T
+            variance = count * self.squares - self.sums * self.sums
+            result = covariance / np.sqrt(variance * variance.T)
+        result[(count < 2) | (variance <= 0) | (variance.T <= 0)] = np.nan
+        np.clip(result, -1, 1, out=result)
+        diagonal = np.diag_indices_from(result)
+        result[diagonal] = np.where(np.isnan(result[diagonal]), np.nan, 1.0)
+        return result
+
+
+def correlation_matrix(frame, block_rows=65536):
+    """
+    Computes the pairwise-complete correlation matrix of numeric columns.
+
+    Args:
+        frame (DataFrame): Numeric columns only
+        block_rows (int): Rows converted and multiplied at a time
+
+    Returns:
+        ndarray: Columns x columns correlations in the order of frame.columns
+    """
+    accumulator = CorrelationAccumulator(frame.columns, block_rows)
+    accumulator.update(frame)
+    return accumulator.matrix()
+
+
+def high_correlation_pairs(matrix, columns, threshold=0.7):
+    """
+    Lists column pairs whose absolute correlation exceeds a threshold.
+
+    Args:
+        matrix (ndarray): Correlation matrix
+        columns (list): Column names of the matrix
+        threshold (float): Pairs with |r| above this are listed
+
+    Returns:
+        list: {'column1', 'column2', 'correlation'} dicts in row-major order of
+            the upper triangle
+    """
+    rows, cols = np.triu_indices(len(columns), k=1)
+    values = matrix[rows, cols]
+    keep = np.abs(values) > threshold
+    return [
+        {'column1': columns[i], 'column2': columns[j], 'correlation': round(float(value), 3)}
+        for i, j, value in zip(rows[keep], cols[keep], values[keep])
+    ]
+
+
+def _nested(matrix, columns, keep):
+    """Builds {column: {column: r}} from the kept entries; columns without any are left out."""
+    result = {}
+    for i, j in zip(*np.nonzero(keep)):
+        result.setdefault(columns[i], {})[columns[j]] = float(matrix[i, j])
+    return result
+
+
+def report_matrix(matrix, columns, mode, threshold=0.7, top_k=5):
+    """
+    Shapes the correlation matrix for the analytics payload.
+
+    'dense' returns every entry, 'threshold' only pairs with |r| above the
+    threshold, 'top_k' the k strongest partners of each column (kept
+    symmetric) and 'none' nothing. The sparse modes keep the nested
+    {column: {column: r}} layout and drop the diagonal.
+
+    Args:
+        matrix (ndarray): Correlation matrix
+        columns (list): Column names of the matrix
+        mode (str): 'dense', 'threshold', 'top_k' or 'none'
+        threshold (float): Cut-off of the 'threshold' mode
+        top_k (int): Partners per column in the 'top_k' mode
+
+    Returns:
+        dict: {column: {column: r}}
+    """
+    if mode == 'none':
+        return {}
+    rounded = np.round(matrix, 3)
+    if mode == 'dense':
+        return {
+            col: {other: float(value) for other, value in zip(columns, rounded[:, j])}
+            for j, col in enumerate(columns)
+        }
+
+    strength = np.abs(matrix)
+    strength[np.isnan(strength)] = -1
+    np.fill_diagonal(strength, -1)
+    if mode == 'threshold':
+        keep = strength > threshold
+    elif mode == 'top_k':
+        k = min(top_k, len(columns) - 1)
+        keep = np.zeros(matrix.shape, dtype=bool)
+        if k > 0:
+            partners = np.argpartition(-strength, k - 1, axis=1)[:, :k]
+            keep[np.arange(len(columns))[:, None], partners] = True
+            keep &= strength >= 0
+            keep |= keep.T
+    else:
+        raise ValueError(f"Unknown correlation mode: {mode}")
+    return _nested(rounded, columns, keep)
+
+
+def resolve_mode(mode, column_count, dense_max_columns):
+    """Picks the output mode; 'auto' reports dense matrices up to dense_max_columns columns, top_k beyond."""
+    if mode not in CORRELATION_MODES:
+        raise ValueError(f"Unknown correlation mode: {mode}")
+    if mode == 'auto':
+        return 'dense' if column_count <= dense_max_columns else 'top_k'
+    return mode
@@ -0,0 +1,63 @@
+from src.core.settings import settings
+from src.helper.dtype_converter import build_typed_frame, compact_frame
+from src.services.core import get_location_column_candidates, get_numeric_columns_after_location
+from src.services.metrics import STAGE_LOCATION_DETECTION, STAGE_TYPE_CONVERSION, stage_timer
+
+
+class Dataset:
+    """
+    Typed view of one uploaded dataset, built once per request.
+
+    Holds the typed DataFrame together with everything detected from it
+    (schema, location column, numeric columns), so the geocoding and analytics
+    services share one parse instead of each converting the raw JSON again.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.schema = {col: str(dtype) for col, dtype in frame.dtypes.items()}
+        with stage_timer(STAGE_LOCATION_DETECTION):
+            self.location_candidates = get_location_column_candidates(frame)
+            self.location_column = self.location_candidates[0]['column'] if self.location_candidates else None
+            self.numeric_columns = (
+                get_numeric_columns_after_location(frame, self.location_column)
+                if self.location_column is not None else []
+            )
+
+        # Filled in by get_coordinates_for_json
+        self.location_names = None
+        self.compacted = False
+
+    def compact(self):
+        """
+        Switches the frame to its compact representation (see compact_frame).
+
+        The location column, which the groupby keys on, is always dictionary-encoded.
+        """
+        with stage_timer(STAGE_TYPE_CONVERSION):
+            self.frame = compact_frame(
+                self.frame,
+                category_columns=[self.location_column] if self.location_column is not None else [],
+                max_category_ratio=settings.COMPACT_CATEGORY_MAX_RATIO
+            )
+        self.compacted = True
+        self.schema = {col: str(dtype) for col, dtype in self.frame.dtypes.items()}
+
+    @classmethod
+    def from_records(cls, data, compact=None):
+        """
+        Parses stringified JSON rows into a Dataset.
+
+        Args:
+            data (list): JSON data from frontend (list of dicts)
+            compact (bool): Use the compact representation; defaults to COMPACT_INGESTION
+
+        Returns:
+            Dataset: The typed dataset
+        """
+        with stage_timer(STAGE_TYPE_CONVERSION):
+            frame = build_typed_frame(data)
+        dataset = cls(frame)
+        if settings.COMPACT_INGESTION if compact is None else compact:
+            dataset.compact()
+        return dataset
@@ -0,0 +1,632 @@
+from collections import OrderedDict
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from src.core.settings import settings
+
+DATASET_STORE_VERSION = 2
+
+AGGREGATIONS = ('sum', 'mean', 'count', 'min', 'max')
+FILTER_OPERATORS = ('eq', 'ne', 'in', 'not_in', 'lt', 'le', 'gt', 'ge', 'is_null', 'not_null')
+
+# Column kinds: numeric columns are stored as NumPy arrays (NaN = null),
+# everything else as int32 codes (-1 = null) into a dictionary of values
+KIND_NUMERIC = 'numeric'
+KIND_DICTIONARY = 'dictionary'
+
+
+def _python_value(value):
+    """Makes a dictionary value JSON serializable, keeping numbers and booleans."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (str, bool, int, float)) or value is None:
+        return value
+    return str(value)
+
+
+def _filter_values(name, op, value):
+    """Returns the values an 'in' / 'not_in' filter matches, or the single value of another operator."""
+    if op not in ('in', 'not_in'):
+        values = [value]
+    elif isinstance(value, (list, tuple)):
+        values = list(value)
+    else:
+        raise ValueError(f"Filter '{op}' on '{name}' needs a list of values, got {value!r}")
+    for target in values:
+        if not isinstance(target, (str, bool, int, float)) and target is not None:
+            raise ValueError(f"Filter '{op}' on '{name}' compares with plain values, got {target!r}")
+    return values
+
+
+def _filter_number(name, op, value):
+    """Parses the value of a filter on a numeric column (5 and "5" alike)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Filter '{op}' on numeric column '{name}' needs a number, got {value!r}") from None
+
+
+def _is_numeric(series):
+    return pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series)
+
+
+class DatasetWriter:
+    """
+    Writes one dataset into the store, chunk by chunk.
+
+    Numeric chunks are spooled as .npy fragments and string chunks as codes
+    into a dictionary shared by all chunks, so memory stays bounded by the
+    chunk size and the number of distinct values. finish() concatenates the
+    fragments into one memory-mappable file per column, groups the location
+    values under their normalized names, attaches the geocodes and
+    precomputes the per-location group index.
+
+    Given a parent dataset, only the new rows are written: the dictionaries
+    extend the parent's, so the codes of all segments agree, and readers
+    chain the parent's rows before these (see StoredDataset). Appending thus
+    costs the size of the new rows, not of the whole dataset.
+    """
+
+    def __init__(self, store, dataset_id, parent=None):
+        self.store = store
+        self.dataset_id = dataset_id
+        self.parent = parent
+        self.path = os.path.join(store.path, f".{dataset_id}.{uuid.uuid4().hex}.tmp")
+        os.makedirs(self.path)
+        self.columns = None
+        self.rows = 0
+        self._fragments = {}
+        self._dictionaries = {}
+        if parent is not None:
+            self.columns = list(parent.columns)
+            self._fragments = {col: [] for col in self.columns}
+            self._dictionaries = {
+                col: {value: code for code, value in enumerate(column.get('dictionary', []))}
+                for col, column in parent.columns.items()
+            }
+
+    def _fragment_path(self, index, number):
+        return os.path.join(self.path, f"c{index}-{number}.npy")
+
+    def append(self, chunk):
+        """
+        Adds typed rows.
+
+        Args:
+            chunk (DataFrame): Typed rows, with the same columns as the first chunk
+        """
+        if self.columns is None:
+            self.columns = chunk.columns.tolist()
+            self._fragments = {col: [] for col in self.columns}
+            self._dictionaries = {col: {} for col in self.columns}
+
+        for index, col in enumerate(self.columns):
+            series = chunk[col]
+            fragment_path = self._fragment_path(index, len(self._fragments[col]))
+            if _is_numeric(series):
+                np.save(fragment_path, series.to_numpy())
+                self._fragments[col].append((KIND_NUMERIC, fragment_path))
+            else:
+                np.save(fragment_path, self._encode(col, series))
+                self._fragments[col].append((KIND_DICTIONARY, fragment_path))
+        self.rows += len(chunk)
+
+    def _encode(self, col, values):
+        """Maps values to codes in the column's shared dictionary."""
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        dictionary = self._dictionaries[col]
+        mapping = np.array(
+            [dictionary.setdefault(_python_value(value), len(dictionary)) for value in uniques] + [-1],
+            dtype=np.int32
+        )
+        # Code -1 (null) picks the trailing -1
+        return mapping[codes]
+
+    def _inline_parent(self):
+        """Writes the parent's rows into this dataset, when a column no longer has the parent's kind."""
+        for index, col in enumerate(self.columns):
+            column, values = self.parent._column(col)
+            fragment_path = os.path.join(self.path, f"c{index}-parent.npy")
+            # Dictionary codes are valid as they are: this writer's dictionaries extend the parent's
+            np.save(fragment_path, values)
+            self._fragments[col].insert(0, (column['kind'], fragment_path))
+        self.rows += self.parent.rows
+        self.parent = None
+
+    def _write_column(self, index, col, force_dictionary=False):
+        fragments = self._fragments[col]
+        kinds = {kind for kind, _ in fragments}
+        column_path = os.path.join(self.path, f"c{index}.npy")
+
+        if kinds == {KIND_NUMERIC} and not force_dictionary:
+            dtype = np.result_type(*[np.load(path, mmap_mode='r').dtype for _, path in fragments])
+            out = np.lib.format.open_memmap(column_path, mode='w+', dtype=dtype, shape=(self.rows,))
+            kind = KIND_NUMERIC
+        else:
+            # A column that is not numeric in every chunk is stored as values, like a full parse types it
+            out = np.lib.format.open_memmap(column_path, mode='w+', dtype=np.int32, shape=(self.rows,))
+            kind = KIND_DICTIONARY
+
+        offset = 0
+        for fragment_kind, path in fragments:
+            values = np.load(path)
+            if kind == KIND_DICTIONARY and fragment_kind == KIND_NUMERIC:
+                values = self._encode(col, values)
+            out[offset:offset + len(values)] = values
+            offset += len(values)
+            os.remove(path)
+        out.flush()
+        del out
+
+        column = {'name': str(col), 'file': f"c{index}.npy", 'kind': kind}
+        if kind == KIND_DICTIONARY:
+            column['dictionary'] = list(self._dictionaries[col])
+        return column
+
+    def finish(self, location_column, coordinates, location_names=None):
+        """
+        Completes the dataset and makes it visible in the store.
+
+        Args:
+            location_column (str): The dataset's location column
+            coordinates (DataFrame): Geocoded locations ('name', 'latitude', 'longitude')
+            location_names (dict): Location value -> name in coordinates, when
+                the locations were normalized
+
+        Returns:
+            str: The dataset id
+        """
+        if self.columns is None or self.rows == 0:
+            raise ValueError("No rows were written to the dataset store.")
+
+        parent = self.parent
+        if parent is not None and any(
+            parent.columns[col]['kind'] == KIND_NUMERIC and any(kind == KIND_DICTIONARY for kind, _ in self._fragments[col])
+            for col in self.columns
+        ):
+            # A numeric column got non-numeric values: the whole column has to be re-encoded
+            self._inline_parent()
+            parent = None
+
+        columns = [
+            self._write_column(
+                index, col,
+                force_dictionary=(
+                    col == location_column
+                    or (parent is not None and parent.columns[col]['kind'] == KIND_DICTIONARY)
+                )
+            )
+            for index, col in enumerate(self.columns)
+        ]
+
+        # Spellings of one place (e.g. "USA" and "U.S.A.") form one location group, as in the response
+        location = next(column for column in columns if column['name'] == str(location_column))
+        location_names = location_names or {}
+        groups = {}
+        value_groups = np.array(
+            [groups.setdefault(_python_value(location_names.get(value, value)), len(groups))
+             for value in location['dictionary']],
+            dtype=np.int32
+        )
+        np.save(os.path.join(self.path, 'location_groups.npy'), value_groups)
+
+        if parent is None:
+            # Per-location group index: rows ordered by group and each group's first row
+            codes = np.append(value_groups, -1)[np.load(os.path.join(self.path, location['file']))]
+            order = np.argsort(codes, kind='stable')
+            offsets = np.searchsorted(codes[order], np.arange(len(groups) + 1))
+            np.save(os.path.join(self.path, 'location_order.npy'), order)
+            np.save(os.path.join(self.path, 'location_offsets.npy'), offsets)
+
+        known = {
+            _python_value(name): (latitude, longitude)
+            for name, latitude, longitude in coordinates[['name', 'latitude', 'longitude']].itertuples(index=False)
+        }
+        located = [known.get(name, (None, None)) for name in groups]
+        np.save(os.path.join(self.path, 'location_latitude.npy'),
+                np.array([np.nan if lat is None else lat for lat, _ in located], dtype=np.float64))
+        np.save(os.path.join(self.path, 'location_longitude.npy'),
+                np.array([np.nan if lon is None else lon for _, lon in located], dtype=np.float64))
+
+        manifest = {
+            'version': DATASET_STORE_VERSION,
+            'dataset_id': self.dataset_id,
+            'parent': parent.dataset_id if parent is not None else None,
+            'rows': self.rows + (parent.rows if parent is not None else 0),
+            'location_column': str(location_column),
+            'location_groups': list(groups),
+            'created_at': time.time(),
+            'columns': columns
+        }
+        with open(os.path.join(self.path, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+
+        self.store._publish(self.dataset_id, self.path)
+        if parent is not None:
+            # The parents must not expire before this dataset
+            self.store._touch(parent.segments)
+        return self.dataset_id
+
+    def abort(self):
+        """Discards everything written so far."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class StoredDataset:
+    """
+    A stored dataset whose columns are memory-mapped from disk.
+
+    Queries re-aggregate one metric per location (or per value of another
+    column) after filtering rows, using the precomputed location group index,
+    without re-parsing or re-geocoding anything. Locations are grouped under
+    their normalized names, so results match the upload response; filters on
+    the location column match a value as uploaded or its normalized name.
+
+    An appended dataset holds only its new rows and names its parent; its
+    columns are the rows of every segment of the chain, oldest first.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.dataset_id = self.manifest['dataset_id']
+        self.segments = [path]
+        parent = self.manifest['parent']
+        while parent is not None:
+            parent_path = os.path.join(os.path.dirname(path), parent)
+            with open(os.path.join(parent_path, 'manifest.json'), encoding='utf-8') as f:
+                parent = json.load(f)['parent']
+            self.segments.insert(0, parent_path)
+        self.rows = self.manifest['rows']
+        self.location_column = self.manifest['location_column']
+        self.columns = {column['name']: column for column in self.manifest['columns']}
+        self.location_groups = self.manifest['location_groups']
+        self._arrays = {}
+        self._lookups = {}
+
+    def _array(self, name):
+        array = self._arrays.get(name)
+        if array is None:
+            array = np.load(os.path.join(self.path, name), mmap_mode='r')
+            self._arrays[name] = array
+        return array
+
+    def _column(self, name):
+        if not isinstance(name, str) or name not in self.columns:
+            raise ValueError(f"Unknown column: {name}")
+        column = self.columns[name]
+        values = self._arrays.get(column['file'])
+        if values is None:
+            # Segments share the column layout of the first one
+            parts = [np.load(os.path.join(path, column['file']), mmap_mode='r') for path in self.segments]
+            values = parts[0] if len(parts) == 1 else np.concatenate(parts)
+            self._arrays[column['file']] = values
+        return column, values
+
+    def _codes_for(self, name, values):
+        """Codes of the given values in a dictionary column (unknown values are skipped)."""
+        lookup = self._lookups.get(name)
+        if lookup is None:
+            lookup = {}
+            for code, value in enumerate(self.columns[name]['dictionary']):
+                lookup.setdefault(value, []).append(code)
+            if name == self.location_column:
+                for code, group in enumerate(self._array('location_groups.npy').tolist()):
+                    lookup.setdefault(self.location_groups[group], []).append(code)
+            self._lookups[name] = lookup
+        return np.array(
+            sorted({code for value in values for code in lookup.get(value, [])}), dtype=np.int32
+        )
+
+    def _filter_mask(self, filters):
+        mask = np.ones(self.rows, dtype=bool)
+        for condition in filters or []:
+            if not isinstance(condition, dict):
+                raise ValueError(f"Filters must be objects with column, op and value, got {condition!r}")
+            name, op, value = condition.get('column'), condition.get('op', 'eq'), condition.get('value')
+            if op not in FILTER_OPERATORS:
+                raise ValueError(f"Unknown filter operator: {op}")
+            column, values = self._column(name)
+
+            if column['kind'] == KIND_DICTIONARY:
+                if op == 'is_null':
+                    mask &= values < 0
+                elif op == 'not_null':
+                    mask &= values >= 0
+                elif op in ('eq', 'ne', 'in', 'not_in'):
+                    targets = _filter_values(name, op, value)
+                    matches = np.isin(values, self._codes_for(name, targets))
+                    mask &= ~matches if op in ('ne', 'not_in') else matches
+                else:
+                    raise ValueError(f"Operator '{op}' needs a numeric column, '{name}' is not numeric")
+                continue
+
+            values = np.asarray(values, dtype=np.float64)
+            if op == 'is_null':
+                mask &= np.isnan(values)
+            elif op == 'not_null':
+                mask &= ~np.isnan(values)
+            elif op in ('in', 'not_in'):
+                targets = [_filter_number(name, op, target) for target in _filter_values(name, op, value)]
+                matches = np.isin(values, np.array(targets, dtype=np.float64))
+                mask &= ~matches if op == 'not_in' else matches
+            else:
+                compare = {'eq': np.equal, 'ne': np.not_equal, 'lt': np.less, 'le': np.less_equal,
+                           'gt': np.greater, 'ge': np.greater_equal}[op]
+                mask &= compare(values, _filter_number(name, op, value))
+        return mask
+
+    def _groups(self, group_by):
+        """Returns (codes, names, order, offsets) of the grouping column."""
+        column, values = self._column(group_by)
+        if group_by == self.location_column:
+            codes = self._location_codes()
+            if len(self.segments) == 1:
+                order, offsets = self._array('location_order.npy'), self._array('location_offsets.npy')
+            else:
+                order = np.argsort(codes, kind='stable')
+                offsets = np.searchsorted(codes[order], np.arange(len(self.location_groups) + 1))
+            return codes, self.location_groups, order, offsets
+
+        if column['kind'] == KIND_DICTIONARY:
+            codes, names = values, column['dictionary']
+        else:
+            numbers = np.asarray(values, dtype=np.float64)
+            uniques, codes = np.unique(numbers, return_inverse=True)
+            codes = np.where(np.isnan(numbers), -1, codes).astype(np.int32)
+            names = [_python_value(value) for value in uniques]
+        order = np.argsort(codes, kind='stable')
+        offsets = np.searchsorted(codes[order], np.arange(len(names) + 1))
+        return codes, names, order, offsets
+
+    def _location_codes(self):
+        """Location group of every row (-1 for null locations)."""
+        codes = self._arrays.get('location_codes')
+        if codes is None:
+            _, values = self._column(self.location_column)
+            codes = np.append(self._array('location_groups.npy'), np.int32(-1))[values]
+            self._arrays['location_codes'] = codes
+        return codes
+
+    def iter_frames(self, chunk_rows):
+        """
+        Reads the stored rows back, chunk by chunk.
+
+        Args:
+            chunk_rows (int): Rows per chunk
+
+        Yields:
+            DataFrame: Rows with the stored columns; dictionary columns hold
+                their values, with None for nulls
+        """
+        # Code -1 (null) picks the trailing None
+        dictionaries = {
+            name: np.array(column['dictionary'] + [None], dtype=object)
+            for name, column in self.columns.items() if column['kind'] == KIND_DICTIONARY
+        }
+        for start in range(0, self.rows, chunk_rows):
+            frame = {}
+            for name in self.columns:
+                values = self._column(name)[1][start:start + chunk_rows]
+                frame[name] = dictionaries[name][values] if name in dictionaries else np.array(values)
+            yield pd.DataFrame(frame)
+
+    def location_coordinates(self):
+        """
+        Returns the geocodes attached when the dataset was stored.
+
+        Returns:
+            dict: Location value -> (latitude, longitude) of its group, NaN where unresolved
+        """
+        column = self.columns[self.location_column]
+        latitudes = self._array('location_latitude.npy').tolist()
+        longitudes = self._array('location_longitude.npy').tolist()
+        groups = self._array('location_groups.npy').tolist()
+        return {
+            value: (latitudes[group], longitudes[group]) for value, group in zip(column['dictionary'], groups)
+        }
+
+    def query(self, metric=None, aggregation='sum', filters=None, group_by=None):
+        """
+        Aggregates a metric per group after filtering rows.
+
+        Results match filtering the dataset and running
+        groupby(group_by)[metric].agg(aggregation) in pandas: groups without
+        any matching row are left out, nulls are skipped, and an all-null group
+        sums to 0.
+
+        Args:
+            metric (str): Numeric column to aggregate; may be omitted for 'count'
+            aggregation (str): One of sum, mean, count, min, max
+            filters (list): Conditions {'column', 'op', 'value'} that rows must all meet
+            group_by (str): Column to group by, defaults to the location column
+
+        Returns:
+            tuple: (DataFrame with name, [latitude, longitude,] significantCol and
+                count per group, number of matching rows)
+
+        Raises:
+            ValueError: On unknown columns, operators or aggregations
+        """
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation: {aggregation}")
+        group_by = group_by or self.location_column
+        codes, names, order, offsets = self._groups(group_by)
+        mask = self._filter_mask(filters) & (np.asarray(codes) >= 0)
+        group_count = len(names)
+
+        if metric is None:
+            if aggregation != 'count':
+                raise ValueError("A metric column is required for this aggregation")
+            values = np.zeros(self.rows, dtype=np.float64)
+            integer = True
+        else:
+            column, raw = self._column(metric)
+            if column['kind'] != KIND_NUMERIC:
+                raise ValueError(f"Metric column '{metric}' is not numeric")
+            integer = raw.dtype.kind in 'iub'
+            values = np.asarray(raw, dtype=np.float64)
+
+        valid = mask & ~np.isnan(values)
+        group_rows = np.bincount(codes[mask], minlength=group_count)
+        counts = np.bincount(codes[valid], minlength=group_count)
+        present = group_rows > 0
+
+        if aggregation == 'count':
+            result = counts.astype(np.float64) if metric is not None else group_rows.astype(np.float64)
+        elif aggregation in ('sum', 'mean'):
+            sums = np.bincount(codes[valid], weights=values[valid], minlength=group_count)
+            result = sums if aggregation == 'sum' else np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        else:
+            # Min/max over the rows in group order; excluded rows hold the identity
+            identity = np.inf if aggregation == 'min' else -np.inf
+            ordered = np.where(valid[order], values[order], identity)
+            starts = np.minimum(offsets[:-1], max(len(ordered) - 1, 0))
+            reduce = np.minimum if aggregation == 'min' else np.maximum
+            result = reduce.reduceat(ordered, starts) if len(ordered) else np.zeros(group_count)
+            result = np.where(counts > 0, result, np.nan)
+
+        groups = pd.DataFrame({'name': pd.Series(names, dtype=object)})
+        if group_by == self.location_column:
+            groups['latitude'] = self._array('location_latitude.npy')
+            groups['longitude'] = self._array('location_longitude.npy')
+            groups['latitude'] = groups['latitude'].astype(object).where(groups['latitude'].notna(), None)
+            groups['longitude'] = groups['longitude'].astype(object).where(groups['longitude'].notna(), None)
+        groups = groups[present].reset_index(drop=True)
+        result = result[present]
+        if (integer and aggregation in ('sum', 'min', 'max')) or aggregation == 'count':
+            # Integer metrics keep integer sums and extremes, as in pandas
+            if not np.isnan(result).any():
+                result = result.astype(np.int64)
+        groups['significantCol'] = result
+        groups['count'] = (counts if metric is not None else group_rows)[present]
+        return groups, int(mask.sum())
+
+
+class DatasetStore:
+    """
+    Directory of uploaded datasets, one subdirectory of .npy files per dataset id.
+
+    Datasets are written under a temporary name and renamed into place, so
+    readers never see a partial dataset, and expire after a TTL. Opened
+    datasets are kept in a small LRU so their memory maps are reused.
+    """
+
+    def __init__(self, path, ttl_seconds, max_open):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_open = max_open
+        self._open = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _dataset_path(self, dataset_id):
+        return os.path.join(self.path, dataset_id)
+
+    def writer(self, dataset_id, parent=None):
+        """
+        Starts writing a dataset; finish() replaces any earlier version.
+
+        Args:
+            dataset_id (str): Id to store the dataset under
+            parent (StoredDataset): Dataset whose rows come before the ones written, if any
+        """
+        os.makedirs(self.path, exist_ok=True)
+        self.evict()
+        return DatasetWriter(self, dataset_id, parent)
+
+    def _touch(self, paths):
+        for path in paths:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                continue
+
+    def _publish(self, dataset_id, tmp_path):
+        target = self._dataset_path(dataset_id)
+        with self._lock:
+            self._open.pop(dataset_id, None)
+        if os.path.isdir(target):
+            shutil.rmtree(target, ignore_errors=True)
+        try:
+            os.replace(tmp_path, target)
+        except OSError:
+            # Another worker published the same content first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def exists(self, dataset_id):
+        return self.enabled and os.path.isfile(os.path.join(self._dataset_path(dataset_id), 'manifest.json'))
+
+    def get(self, dataset_id):
+        """
+        Opens a stored dataset.
+
+        Args:
+            dataset_id (str): Id returned with the dataset response
+
+        Returns:
+            StoredDataset: The dataset, or None if it is unknown or expired
+        """
+        if not self.enabled or os.sep in dataset_id or dataset_id.startswith('.'):
+            return None
+        path = self._dataset_path(dataset_id)
+        try:
+            # Checked on every lookup, also for datasets that are already open
+            if os.stat(path).st_mtime + self.ttl_seconds < time.time():
+                with self._lock:
+                    self._open.pop(dataset_id, None)
+                return None
+        except (FileNotFoundError, NotADirectoryError):
+            with self._lock:
+                self._open.pop(dataset_id, None)
+            return None
+
+        with self._lock:
+            dataset = self._open.get(dataset_id)
+            if dataset is not None:
+                self._open.move_to_end(dataset_id)
+                return dataset
+
+        try:
+            dataset = StoredDataset(path)
+        except (FileNotFoundError, NotADirectoryError, KeyError):
+            # KeyError: written by an older version of the store
+            return None
+
+        with self._lock:
+            self._open[dataset_id] = dataset
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+        return dataset
+
+    def evict(self):
+        """Removes expired datasets and abandoned partial writes."""
+        if not self.enabled or not os.path.isdir(self.path):
+            return
+        cutoff = time.time() - self.ttl_seconds
+        for entry in os.scandir(self.path):
+            try:
+                if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    with self._lock:
+                        self._open.pop(entry.name, None)
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except FileNotFoundError:
+                continue
+
+
+dataset_store = DatasetStore(
+    path=settings.DATASET_STORE_PATH,
+    ttl_seconds=settings.DATASET_STORE_TTL_SECONDS,
+    max_open=settings.DATASET_STORE_MAX_OPEN
+)
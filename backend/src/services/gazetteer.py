@@ -0,0 +1,156 @@
+import csv
+import re
+import unicodedata
+
+from src.core.settings import settings
+
+# Feature classes preferred for each location type (see get_location_type)
+FEATURE_CLASSES = {
+    'country': 'country',
+    'state': 'admin1',
+    'city': 'city'
+}
+
+# Default ordering when the location type does not decide: countries, then states, then cities
+FEATURE_CLASS_RANK = {
+    'country': 0,
+    'admin1': 1,
+    'city': 2
+}
+
+
+def fold_name(name):
+    """
+    Folds a place name for index lookups.
+
+    Args:
+        name (str): Place name in any script/case
+
+    Returns:
+        str: ASCII-folded, case-folded name with collapsed whitespace
+    """
+    decomposed = unicodedata.normalize('NFKD', str(name))
+    ascii_name = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return re.sub(r'\s+', ' ', ascii_name).strip().casefold()
+
+
+def _feature_class(feature_code):
+    """Maps a GeoNames feature code to a coarse feature class."""
+    if feature_code.startswith('PCL'):
+        return 'country'
+    if feature_code == 'ADM1':
+        return 'admin1'
+    return 'city'
+
+
+class Gazetteer:
+    """
+    In-memory index over a GeoNames-style gazetteer table.
+
+    Every name, ASCII name and alternate name of an entry is folded and
+    stored in a hash index, so a lookup is a single dict access regardless
+    of table size.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.index = {}
+        self.countries = {}
+
+        for position, entry in enumerate(entries):
+            names = [entry['name'], entry['asciiname']] + entry['alternatenames']
+            for key in {fold_name(name) for name in names if name}:
+                self.index.setdefault(key, []).append(position)
+            if entry['feature_class'] == 'country':
+                self.countries[entry['country_code']] = entry
+
+        # Pre-sort candidates so the default lookup order is fixed at build time
+        for key, positions in self.index.items():
+            positions.sort(key=lambda p: (FEATURE_CLASS_RANK[entries[p]['feature_class']], -entries[p]['population']))
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Builds a gazetteer from a tab-separated file.
+
+        Args:
+            path (str): Path to a TSV with name, asciiname, alternatenames,
+                latitude, longitude, feature_code, country_code, admin1_code
+                and population columns. Lines starting with '#' are ignored.
+
+        Returns:
+            Gazetteer: The indexed gazetteer
+        """
+        entries = []
+        with open(path, encoding='utf-8', newline='') as f:
+            for row in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+                if not row or row[0].startswith('#'):
+                    continue
+                name, asciiname, alternatenames, latitude, longitude, feature_code, country_code, admin1_code, population = row
+                entries.append({
+                    'name': name,
+                    'asciiname': asciiname,
+                    'alternatenames': [alt for alt in alternatenames.split(',') if alt],
+                    'latitude': float(latitude),
+                    'longitude': float(longitude),
+                    'feature_class': _feature_class(feature_code),
+                    'country_code': country_code,
+                    'admin1_code': admin1_code,
+                    'population': int(population or 0)
+                })
+        return cls(entries)
+
+    def _candidates(self, key):
+        return [self.entries[p] for p in self.index.get(key, [])]
+
+    def _is_within(self, entry, qualifier):
+        """Checks whether a qualifier (e.g. 'Nepal' in 'Kathmandu, Nepal') contains the entry."""
+        for parent in self._candidates(fold_name(qualifier)):
+            if parent['feature_class'] == 'country' and parent['country_code'] == entry['country_code']:
+                return True
+            if (parent['feature_class'] == 'admin1' and parent['country_code'] == entry['country_code']
+                    and parent['admin1_code'] == entry['admin1_code']):
+                return True
+        return False
+
+    def lookup(self, location_name, location_type=None):
+        """
+        Resolves a place name to a gazetteer entry.
+
+        Args:
+            location_name (str): Place name, optionally qualified ("Kathmandu, Nepal")
+            location_type (str): Preferred type (country, state, city) or None
+
+        Returns:
+            dict: Matching entry, or None if the name is not in the gazetteer
+        """
+        candidates = self._candidates(fold_name(location_name))
+
+        # Qualified names: resolve the first part and keep candidates inside the qualifiers
+        if not candidates and ',' in str(location_name):
+            head, *qualifiers = [part for part in str(location_name).split(',') if part.strip()]
+            candidates = [
+                entry for entry in self._candidates(fold_name(head))
+                if all(self._is_within(entry, qualifier) for qualifier in qualifiers)
+            ]
+
+        if not candidates:
+            return None
+
+        preferred = FEATURE_CLASSES.get(location_type)
+        if preferred:
+            for entry in candidates:
+                if entry['feature_class'] == preferred:
+                    return entry
+        return candidates[0]
+
+
+_gazetteer = None
+
+
+def get_gazetteer():
+    """Returns the process-wide gazetteer, loading and indexing it on first use."""
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = Gazetteer.from_file(settings.GAZETTEER_PATH)
+    return _gazetteer
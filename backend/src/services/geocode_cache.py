@@ -0,0 +1,206 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from src.core.settings import settings
+from src.services.metrics import GEOCODE_CACHE_LOOKUPS
+
+
+def normalize_location_key(location_name, location_type='city'):
+    """
+    Normalizes a location name into a cache key.
+
+    The location type is part of the key, since geocoders resolve the same
+    name differently per type (e.g. "Georgia" as a country or a state).
+
+    Args:
+        location_name (str): Raw location name as found in the dataset
+        location_type (str): Type of location (city, country, state, etc.)
+
+    Returns:
+        str: Location type and the case-folded name with surrounding and
+            repeated whitespace removed ("country:georgia")
+    """
+    name = re.sub(r'\s+', ' ', str(location_name)).strip().casefold()
+    return f"{location_type}:{name}"
+
+
+class GeocodeCache:
+    """
+    Persistent geocode cache backed by a SQLite file.
+
+    The file is opened in WAL mode so every uvicorn worker can read and write
+    the same cache concurrently. Entries expire after a TTL that depends on the
+    outcome (found, not found, error) and the table is bounded by evicting the
+    least recently used entries.
+    """
+
+    EVICTION_INTERVAL = 100  # Check the size bound every N writes
+
+    def __init__(self, path, ttl_seconds, negative_ttl_seconds, error_ttl_seconds, max_entries):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.error_ttl_seconds = error_ttl_seconds
+        self.max_entries = max_entries
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.error_hits = 0
+        self.misses = 0
+
+    def _connection(self):
+        """Returns the SQLite connection of the current thread, creating the schema on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS geocodes (
+                    key TEXT PRIMARY KEY,
+                    latitude REAL,
+                    longitude REAL,
+                    error_message TEXT,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_geocodes_last_access ON geocodes (last_access)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, location_name, location_type='city'):
+        """
+        Looks up a location in the cache.
+
+        Args:
+            location_name (str): Name of the location
+            location_type (str): Type of location (city, country, state, etc.)
+
+        Returns:
+            dict: Cached result in the shape returned by get_location_coordinates,
+                or None if the location is not cached or has expired
+        """
+        key = normalize_location_key(location_name, location_type)
+        now = time.time()
+        conn = self._connection()
+
+        row = conn.execute(
+            "SELECT latitude, longitude, error_message, expires_at FROM geocodes WHERE key = ?",
+            (key,)
+        ).fetchone()
+
+        if row is None or row[3] < now:
+            with self._lock:
+                self.misses += 1
+            GEOCODE_CACHE_LOOKUPS.labels('miss').inc()
+            return None
+
+        conn.execute("UPDATE geocodes SET last_access = ? WHERE key = ?", (now, key))
+        latitude, longitude, error_message, _ = row
+        # Cached failures are served, but not counted as hits
+        with self._lock:
+            if error_message is None:
+                self.hits += 1
+            else:
+                self.error_hits += 1
+
+        GEOCODE_CACHE_LOOKUPS.labels('hit' if error_message is None else 'error').inc()
+        result = {
+            'location': location_name,
+            'latitude': latitude,
+            'longitude': longitude
+        }
+        if error_message is not None:
+            result['error_message'] = error_message
+        return result
+
+    def set(self, location_name, result, location_type='city'):
+        """
+        Stores a geocoding result, including misses and errors (negative caching).
+
+        Args:
+            location_name (str): Name of the location
+            result (dict): Result returned by get_location_coordinates
+            location_type (str): Type of location (city, country, state, etc.)
+        """
+        key = normalize_location_key(location_name, location_type)
+        now = time.time()
+
+        if result.get('error_message') is not None:
+            ttl = self.error_ttl_seconds
+        elif result.get('latitude') is None or result.get('longitude') is None:
+            ttl = self.negative_ttl_seconds
+        else:
+            ttl = self.ttl_seconds
+
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO geocodes (key, latitude, longitude, error_message, expires_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, result.get('latitude'), result.get('longitude'), result.get('error_message'), now + ttl, now)
+        )
+
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % self.EVICTION_INTERVAL == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Removes expired entries and trims the table to the least recently used bound."""
+        conn = self._connection()
+        conn.execute("DELETE FROM geocodes WHERE expires_at < ?", (time.time(),))
+        count = conn.execute("SELECT COUNT(*) FROM geocodes").fetchone()[0]
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM geocodes WHERE key IN "
+                "(SELECT key FROM geocodes ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def clear(self):
+        """Removes every entry and resets the counters."""
+        self._connection().execute("DELETE FROM geocodes")
+        with self._lock:
+            self.hits = 0
+            self.error_hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Returns cache counters for this process.
+
+        Returns:
+            dict: Hit, cached error and miss counts, hit ratio and the number of stored entries
+        """
+        entries = self._connection().execute("SELECT COUNT(*) FROM geocodes").fetchone()[0]
+        with self._lock:
+            lookups = self.hits + self.error_hits + self.misses
+            return {
+                'hits': self.hits,
+                'error_hits': self.error_hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups > 0 else 0,
+                'entries': entries
+            }
+
+
+geocode_cache = GeocodeCache(
+    path=settings.GEOCODE_CACHE_PATH,
+    ttl_seconds=settings.GEOCODE_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.GEOCODE_CACHE_NEGATIVE_TTL_SECONDS,
+    error_ttl_seconds=settings.GEOCODE_CACHE_ERROR_TTL_SECONDS,
+    max_entries=settings.GEOCODE_CACHE_MAX_ENTRIES
+)
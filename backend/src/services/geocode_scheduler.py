@@ -0,0 +1,183 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+import threading
+import time
+
+from src.core.settings import settings
+from src.services.geocode_cache import geocode_cache, normalize_location_key
+from src.services.geocoders import get_geocoder_backends
+from src.services.metrics import GEOCODE_ERRORS, GEOCODE_REQUEST_SECONDS
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting how often a provider is called.
+
+    A rate of 1 with a capacity of 1 reproduces the fixed one-request-per-second
+    pacing Nominatim's usage policy asks for.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available, then consumes it."""
+        if not self.rate or self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class GeocodeScheduler:
+    """
+    Runs remote geocode requests on a shared thread pool.
+
+    Each remote provider gets its own token bucket, timeouts are retried with
+    exponential backoff, and concurrent requests for the same (normalized)
+    location and type share one in-flight future, also across concurrent uploads.
+    """
+
+    def __init__(self, max_workers, max_retries, retry_backoff_seconds):
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="geocode")
+        self._buckets = {}
+        self._inflight = {}
+        self._lock = threading.RLock()
+
+    def _bucket(self, backend):
+        with self._lock:
+            bucket = self._buckets.get(backend.name)
+            if bucket is None:
+                bucket = TokenBucket(getattr(backend, 'rate_limit', None))
+                self._buckets[backend.name] = bucket
+            return bucket
+
+    def _geocode(self, location_name, location_type):
+        """Geocodes one location with the first remote backend and caches the outcome."""
+        backend = next((b for b in get_geocoder_backends() if b.remote), None)
+        if backend is None:
+            # No remote backend configured (air-gapped mode)
+            return {
+                'location': location_name,
+                'latitude': None,
+                'longitude': None,
+            }
+
+        bucket = self._bucket(backend)
+        attempt = 0
+        start = time.perf_counter()
+        while True:
+            bucket.acquire()
+            try:
+                result = backend.geocode(location_name, location_type)
+                break
+            except GeocoderTimedOut as e:
+                GEOCODE_ERRORS.labels(backend.name, 'timeout').inc()
+                if attempt >= self.max_retries:
+                    result = {
+                        'location': location_name,
+                        'latitude': None,
+                        'longitude': None,
+                        'error_message': str(e)
+                    }
+                    break
+                time.sleep(self.retry_backoff_seconds * (2 ** attempt))
+                attempt += 1
+            except GeocoderServiceError as e:
+                GEOCODE_ERRORS.labels(backend.name, 'service').inc()
+                result = {
+                    'location': location_name,
+                    'latitude': None,
+                    'longitude': None,
+                    'error_message': str(e)
+                }
+                break
+
+        GEOCODE_REQUEST_SECONDS.labels(backend.name).observe(time.perf_counter() - start)
+        geocode_cache.set(location_name, result, location_type)
+        return result
+
+    def _done(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def submit(self, location_name, location_type='city'):
+        """
+        Schedules a remote lookup, joining an identical one already in flight.
+
+        Args:
+            location_name (str): Name of the location
+            location_type (str): Type of location (city, country, state, etc.)
+
+        Returns:
+            Future: Resolves to the dict returned by the geocoder backend
+        """
+        key = normalize_location_key(location_name, location_type)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor.submit(self._geocode, location_name, location_type)
+                self._inflight[key] = future
+                future.add_done_callback(lambda f, key=key: self._done(key, f))
+        return future
+
+    def geocode_many(self, location_names, location_type='city', on_result=None):
+        """
+        Geocodes several locations concurrently.
+
+        Args:
+            location_names (list): Names of the locations
+            location_type (str): Type of location (city, country, state, etc.)
+            on_result (callable): Optional callback(done, total, location_name, result)
+                invoked as each lookup completes
+
+        Returns:
+            dict: Results keyed by location name
+        """
+        futures = {}
+        for name in location_names:
+            futures.setdefault(self.submit(name, location_type), []).append(name)
+
+        results = {}
+        done = 0
+        for future in as_completed(futures):
+            result = future.result()
+            for name in futures[future]:
+                # Joined futures carry the spelling of the first requester
+                results[name] = dict(result, location=name)
+                done += 1
+                if on_result is not None:
+                    on_result(done, len(location_names), name, results[name])
+        return results
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_geocode_scheduler():
+    """Returns the process-wide geocode scheduler."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = GeocodeScheduler(
+                max_workers=settings.GEOCODE_WORKERS,
+                max_retries=settings.GEOCODE_MAX_RETRIES,
+                retry_backoff_seconds=settings.GEOCODE_RETRY_BACKOFF_SECONDS
+            )
+        return _scheduler
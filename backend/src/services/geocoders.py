@@ -0,0 +1,129 @@
+from functools import partial
+
+from geopy.adapters import RequestsAdapter
+from geopy.geocoders import Nominatim
+
+from src.core.settings import settings
+from src.services.gazetteer import get_gazetteer
+
+
+class GazetteerGeocoder:
+    """Resolves locations from the bundled gazetteer without any network access."""
+
+    name = 'gazetteer'
+    remote = False
+
+    def geocode(self, location_name, location_type='city'):
+        """
+        Looks up a location in the local gazetteer.
+
+        Args:
+            location_name (str): Name of the location
+            location_type (str): Preferred type (city, country, state, etc.)
+
+        Returns:
+            dict: Contains 'location', 'latitude', 'longitude', or None on a miss
+        """
+        entry = get_gazetteer().lookup(location_name, location_type)
+        if entry is None:
+            return None
+        return {
+            'location': location_name,
+            'latitude': entry['latitude'],
+            'longitude': entry['longitude']
+        }
+
+
+class NominatimGeocoder:
+    """
+    Resolves locations with Nominatim (OpenStreetMap).
+
+    A single client is created per backend, so its HTTP session and connection
+    pool are reused across requests. Rate limiting and retries are handled by
+    the geocode scheduler, not here: the HTTP client does not retry on its own,
+    so a timeout surfaces as GeocoderTimedOut instead of being retried outside
+    the rate limit and then reported as the service being unavailable.
+    """
+
+    name = 'nominatim'
+    remote = True
+
+    def __init__(self):
+        self.rate_limit = settings.NOMINATIM_RATE_LIMIT
+        self.client = Nominatim(
+            user_agent=settings.NOMINATIM_USER_AGENT,
+            domain=settings.NOMINATIM_DOMAIN,
+            scheme=settings.NOMINATIM_SCHEME,
+            timeout=settings.NOMINATIM_TIMEOUT,
+            adapter_factory=partial(RequestsAdapter, max_retries=0)
+        )
+
+    def geocode(self, location_name, location_type='city'):
+        """
+        Geocodes a single location against Nominatim.
+
+        Args:
+            location_name (str): Name of the location
+            location_type (str): Type of location (unused by Nominatim)
+
+        Returns:
+            dict: Contains 'location', 'latitude', 'longitude'
+
+        Raises:
+            GeocoderTimedOut: If the request timed out
+            GeocoderServiceError: If the service returned an error
+        """
+        location = self.client.geocode(location_name)
+
+        if location:
+            return {
+                'location': location_name,
+                'latitude': location.latitude,
+                'longitude': location.longitude
+            }
+        else:
+            return {
+                'location': location_name,
+                'latitude': None,
+                'longitude': None,
+            }
+
+
+# Registered backends by name; GEOCODER_BACKENDS selects and orders them
+GEOCODER_BACKENDS = {
+    GazetteerGeocoder.name: GazetteerGeocoder,
+    NominatimGeocoder.name: NominatimGeocoder
+}
+
+_backends = None
+
+
+def register_geocoder(name, backend_class):
+    """
+    Registers an additional geocoder backend.
+
+    Args:
+        name (str): Name used in the GEOCODER_BACKENDS setting
+        backend_class (type): Class with 'remote', 'rate_limit' (requests per second,
+            remote backends only) and geocode(location_name, location_type)
+    """
+    global _backends
+    GEOCODER_BACKENDS[name] = backend_class
+    _backends = None
+
+
+def get_geocoder_backends():
+    """
+    Returns the configured geocoder backends in lookup order.
+
+    Returns:
+        list: Backend instances built from the GEOCODER_BACKENDS setting
+    """
+    global _backends
+    if _backends is None:
+        names = [name.strip() for name in settings.GEOCODER_BACKENDS.split(',') if name.strip()]
+        unknown = [name for name in names if name not in GEOCODER_BACKENDS]
+        if unknown:
+            raise ValueError(f"Unknown geocoder backend(s): {', '.join(unknown)}")
+        _backends = [GEOCODER_BACKENDS[name]() for name in names]
+    return _backends
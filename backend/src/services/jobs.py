@@ -0,0 +1,261 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from src.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Job states; a job never leaves a terminal state
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+TERMINAL_STATES = (JOB_SUCCEEDED, JOB_FAILED)
+
+
+def new_job_record(job_id, kind):
+    """Returns the initial record stored for a submitted job."""
+    now = time.time()
+    return {
+        'id': job_id,
+        'kind': kind,
+        'status': JOB_QUEUED,
+        'created_at': now,
+        'updated_at': now,
+        'progress': None,
+        'events': [],
+        'result': None,
+        'error': None
+    }
+
+
+class MemoryJobStore:
+    """Keeps job records in process memory; they are lost on restart."""
+
+    def __init__(self, ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, record):
+        with self._lock:
+            self._evict()
+            self._jobs[record['id']] = record
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            record = self._jobs.get(job_id)
+            if record is not None:
+                record.update(fields, updated_at=time.time())
+
+    def add_event(self, job_id, event):
+        with self._lock:
+            record = self._jobs.get(job_id)
+            if record is not None:
+                record['events'].append(event)
+                record['progress'] = event
+                record['updated_at'] = time.time()
+
+    def set_result(self, job_id, body):
+        from src.helper.serializer import RawJSON  # Loads pandas, which the job itself already did
+        with self._lock:
+            record = self._jobs.get(job_id)
+            if record is not None:
+                record['result'] = RawJSON(body)
+
+    def get(self, job_id):
+        with self._lock:
+            record = self._jobs.get(job_id)
+            return dict(record, events=list(record['events'])) if record is not None else None
+
+    def _evict(self):
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            job_id for job_id, record in self._jobs.items()
+            if record['status'] in TERMINAL_STATES and record['updated_at'] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class FileJobStore:
+    """
+    Keeps one JSON file per job in a local directory.
+
+    Records survive restarts and can be read by every worker process sharing
+    the directory. Files are replaced atomically, so readers never see a
+    partially written record.
+    """
+
+    def __init__(self, path, ttl_seconds):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, job_id):
+        return os.path.join(self.path, f"{job_id}.json")
+
+    def _result_file(self, job_id):
+        return os.path.join(self.path, f"{job_id}.result")
+
+    def _read(self, job_id):
+        try:
+            with open(self._file(job_id), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write(self, record):
+        tmp_path = self._file(record['id']) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f)
+        os.replace(tmp_path, self._file(record['id']))
+
+    def create(self, record):
+        with self._lock:
+            self._evict()
+            self._write(record)
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            record = self._read(job_id)
+            if record is not None:
+                record.update(fields, updated_at=time.time())
+                self._write(record)
+
+    def add_event(self, job_id, event):
+        with self._lock:
+            record = self._read(job_id)
+            if record is not None:
+                record['events'].append(event)
+                record['progress'] = event
+                record['updated_at'] = time.time()
+                self._write(record)
+
+    def set_result(self, job_id, body):
+        # The encoded response is kept next to the record, so it is never re-parsed
+        with open(self._result_file(job_id), 'wb') as f:
+            f.write(body)
+
+    def get(self, job_id):
+        from src.helper.serializer import RawJSON
+        record = self._read(job_id)
+        if record is not None and record['status'] == JOB_SUCCEEDED:
+            try:
+                with open(self._result_file(job_id), 'rb') as f:
+                    record['result'] = RawJSON(f.read())
+            except FileNotFoundError:
+                pass
+        return record
+
+    def _evict(self):
+        cutoff = time.time() - self.ttl_seconds
+        for entry in os.scandir(self.path):
+            if entry.name.endswith('.json') and entry.stat().st_mtime < cutoff:
+                job_id = entry.name[:-len('.json')]
+                record = self._read(job_id)
+                if record is not None and record['status'] in TERMINAL_STATES:
+                    os.remove(entry.path)
+                    if os.path.exists(self._result_file(job_id)):
+                        os.remove(self._result_file(job_id))
+
+
+# Registered job stores by name; JOB_STORE selects one
+JOB_STORES = {
+    'memory': lambda: MemoryJobStore(settings.JOB_TTL_SECONDS),
+    'file': lambda: FileJobStore(settings.JOB_STORE_PATH, settings.JOB_TTL_SECONDS)
+}
+
+
+class JobRunner:
+    """
+    Runs dataset jobs on a bounded thread pool and records their progress.
+
+    Jobs beyond the worker count wait in the queue; once more than
+    max_queued jobs are pending, new submissions are rejected.
+    """
+
+    def __init__(self, store, max_workers, max_queued):
+        self.store = store
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, kind, func, *args, **kwargs):
+        """
+        Queues a job.
+
+        Args:
+            kind (str): Label stored with the job (e.g. 'records', 'upload')
+            func (callable): Called as func(*args, progress=callback, **kwargs); it
+                returns the encoded (JSON bytes) job result
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            str: The job id
+
+        Raises:
+            RuntimeError: If the queue is full
+        """
+        with self._lock:
+            if self._pending >= self.max_queued:
+                raise RuntimeError("Too many jobs are queued. Please try again later.")
+            self._pending += 1
+
+        job_id = uuid.uuid4().hex
+        self.store.create(new_job_record(job_id, kind))
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, func, args, kwargs):
+        try:
+            self.store.update(job_id, status=JOB_RUNNING)
+
+            def progress(stage, done, total, message):
+                self.store.add_event(job_id, {
+                    'stage': stage,
+                    'done': done,
+                    'total': total,
+                    'message': str(message),
+                    'time': time.time()
+                })
+
+            self.store.set_result(job_id, func(*args, progress=progress, **kwargs))
+            self.store.update(job_id, status=JOB_SUCCEEDED)
+        except Exception as e:
+            logger.exception("Job %s failed: %s", job_id, e)
+            self.store.update(job_id, status=JOB_FAILED, error=str(e))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def get(self, job_id):
+        """Returns the stored job record, or None for unknown ids."""
+        return self.store.get(job_id)
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner():
+    """Returns the process-wide job runner, creating its store on first use."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            if settings.JOB_STORE not in JOB_STORES:
+                raise ValueError(f"Unknown job store: {settings.JOB_STORE}")
+            _runner = JobRunner(
+                JOB_STORES[settings.JOB_STORE](),
+                max_workers=settings.JOB_WORKERS,
+                max_queued=settings.JOB_MAX_QUEUED
+            )
+        return _runner
@@ -0,0 +1,263 @@
+from collections import Counter
+import csv
+import re
+
+import numpy as np
+import pandas as pd
+
+from src.core.settings import settings
+from src.services.gazetteer import fold_name, get_gazetteer
+
+# Location type of the places of each gazetteer feature class
+FEATURE_LOCATION_TYPES = {
+    'country': 'country',
+    'admin1': 'state',
+    'city': 'city'
+}
+
+# Countries whose admin1 codes are used as state abbreviations (e.g. "CA" for California)
+STATE_CODE_COUNTRIES = ('US',)
+
+# Dropped without a trace, so "U.S.A." and "USA" or "St. Louis" and "St Louis" meet
+_DROPPED_PUNCTUATION = re.compile(r"[.'’`]")
+_PUNCTUATION = re.compile(r"[^\w\s]|_")
+_WHITESPACE = re.compile(r'\s+')
+
+
+def location_key(name):
+    """
+    Normalizes a place name into the key locations are grouped on.
+
+    Args:
+        name (str): Place name as written in the upload
+
+    Returns:
+        str: Accent-free, case-folded name with punctuation removed and whitespace
+            collapsed ("  São Tomé & Príncipe " -> "sao tome principe"); commas
+            become spaces
+    """
+    folded = _DROPPED_PUNCTUATION.sub('', fold_name(name))
+    return _WHITESPACE.sub(' ', _PUNCTUATION.sub(' ', folded)).strip()
+
+
+class LocationAliases:
+    """
+    Alias index mapping location keys to canonical place names.
+
+    Every name, ASCII name and alternate name of the gazetteer, the ISO codes
+    of its countries and the codes of the states of STATE_CODE_COUNTRIES are
+    indexed per location type, together with the extra aliases of the alias
+    table (ISO alpha-3 codes, abbreviations, exonyms). A key that maps to
+    several places of a type is left alone rather than guessed.
+    """
+
+    def __init__(self, entries, aliases=()):
+        self.index = {location_type: {} for location_type in FEATURE_LOCATION_TYPES.values()}
+
+        for entry in entries:
+            location_type = FEATURE_LOCATION_TYPES[entry['feature_class']]
+            names = [entry['name'], entry['asciiname']] + entry['alternatenames']
+            if location_type == 'country':
+                names.append(entry['country_code'])
+            elif location_type == 'state' and entry['country_code'] in STATE_CODE_COUNTRIES:
+                names.append(entry['admin1_code'])
+            for name in names:
+                if name:
+                    self._add(name, entry['name'], location_type)
+
+        for alias, name, location_type in aliases:
+            self._add(alias, name, location_type)
+
+    def _add(self, alias, name, location_type):
+        key = location_key(alias)
+        if key:
+            self.index[location_type].setdefault(key, set()).add(name)
+
+    @classmethod
+    def from_file(cls, path, entries):
+        """
+        Builds the index from gazetteer entries and a tab-separated alias table.
+
+        Args:
+            path (str): Path to a TSV with alias, name and location_type
+                (country, state or city) columns. Lines starting with '#' are ignored.
+            entries (list): Gazetteer entries (see Gazetteer.from_file)
+
+        Returns:
+            LocationAliases: The alias index
+        """
+        aliases = []
+        with open(path, encoding='utf-8', newline='') as f:
+            for row in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+                if not row or row[0].startswith('#'):
+                    continue
+                alias, name, location_type = row
+                if location_type not in FEATURE_LOCATION_TYPES.values():
+                    raise ValueError(f"Unknown location type in {path}: {location_type}")
+                aliases.append((alias, name, location_type))
+        return cls(entries, aliases)
+
+    def resolve(self, key, location_type=None):
+        """
+        Looks up the canonical name of a location key.
+
+        Args:
+            key (str): Key from location_key
+            location_type (str): Type of the column the name comes from (country,
+                state, city) or None
+
+        Returns:
+            str: Canonical place name, or None if the key is unknown or ambiguous
+        """
+        names = self.index.get(location_type, {}).get(key)
+        if names and len(names) == 1:
+            return next(iter(names))
+        # Otherwise only keys meaning the same place whatever the type ("USA", but not "CA")
+        names = set()
+        for index in self.index.values():
+            names |= index.get(key, set())
+        return next(iter(names)) if len(names) == 1 else None
+
+
+_aliases = None
+
+
+def get_location_aliases():
+    """Returns the process-wide alias index, building it on first use."""
+    global _aliases
+    if _aliases is None:
+        _aliases = LocationAliases.from_file(settings.LOCATION_ALIASES_PATH, get_gazetteer().entries)
+    return _aliases
+
+
+def _spelling(counts):
+    """Most frequent spelling of a key; ties go to the one seen first."""
+    return counts.most_common(1)[0][0]
+
+
+def normalize_locations(locations, location_type=None, qualifiers=None, qualifier_type=None, weights=None):
+    """
+    Maps location names to one canonical name per place.
+
+    Names are keyed with location_key and the alias index, so "USA",
+    "U.S.A.", "United States" and " united states " share a key. Comma
+    qualifiers are keyed part by part ("Kathmandu, NP" and "Kathmandu, Nepal"
+    meet) and names without a qualifier join the qualified ones when all of
+    those agree (so "Kathmandu" joins "Kathmandu, Nepal", but "Paris" stays
+    apart from "Paris, France" and "Paris, Texas"). An optional column of
+    coarser places (e.g. the country of each city) qualifies the names that
+    carry none. Every key is named after its alias, or else its most frequent
+    spelling. The work is done once per distinct value, not per row.
+
+    Args:
+        locations (Series): Location names
+        location_type (str): Type of the location column (country, state, city) or None
+        qualifiers (Series): Optional coarser locations aligned with `locations`
+        qualifier_type (str): Type of the qualifier column
+        weights (array): Optional row weights (e.g. counts of aggregated rows)
+            used to pick the most frequent spelling
+
+    Returns:
+        Series: Categorical canonical names aligned with `locations` (categories
+            sorted), NaN where the location is missing
+    """
+    aliases = get_location_aliases()
+
+    location_codes, location_values = pd.factorize(locations)
+    valid = location_codes >= 0
+    if qualifiers is not None:
+        qualifier_codes, qualifier_values = pd.factorize(qualifiers)
+        pairs = location_codes.astype(np.int64) * (len(qualifier_values) + 1) + qualifier_codes + 1
+    else:
+        qualifier_values = []
+        pairs = location_codes.astype(np.int64)
+    codes = np.full(len(location_codes), -1, dtype=np.int64)
+    codes[valid], unique_pairs = pd.factorize(pairs[valid])
+    counts = np.bincount(
+        codes[valid], weights=None if weights is None else np.asarray(weights)[valid], minlength=len(unique_pairs)
+    )
+
+    def resolve(text, resolve_type):
+        key = location_key(text)
+        name = aliases.resolve(key, resolve_type)
+        return (location_key(name), name) if name is not None else (key, None)
+
+    # Key every distinct value: (head key, qualifier keys)
+    parsed = []
+    for pair in unique_pairs.tolist():
+        if qualifiers is not None:
+            value = location_values[pair // (len(qualifier_values) + 1)]
+            qualifier_code = pair % (len(qualifier_values) + 1) - 1
+            qualifier = qualifier_values[qualifier_code] if qualifier_code >= 0 else None
+        else:
+            value, qualifier = location_values[pair], None
+        text = str(value)
+
+        # The whole name first, so "Washington, D.C." or "Korea, South" are not split
+        head_key, head_name = resolve(text, location_type)
+        parts = [] if head_name is not None else [part.strip() for part in text.split(',') if part.strip()]
+        if parts:
+            head_key, head_name = resolve(parts[0], location_type)
+        head = (head_key, head_name, parts[0] if parts else text.strip())
+        quals = tuple(resolve(part, None) + (part,) for part in parts[1:])
+        if not quals and qualifier is not None and str(qualifier).strip():
+            quals = (resolve(str(qualifier), qualifier_type) + (str(qualifier).strip(),),)
+            if quals[0][0] == head_key:
+                quals = ()
+        if not head_key:
+            # Nothing but punctuation: keep the value as it is
+            head, quals = (text, None, text), ()
+        parsed.append((head, quals))
+
+    # Unqualified names join the qualified ones when every qualifier of the name agrees
+    qualified = {}
+    for head, quals in parsed:
+        if quals:
+            qualified.setdefault(head[0], set()).add(tuple(q[0] for q in quals))
+
+    keys = {}
+    spellings = {}
+    for position, (head, quals) in enumerate(parsed):
+        qual_keys = tuple(q[0] for q in quals)
+        if not qual_keys and len(qualified.get(head[0], ())) == 1:
+            qual_keys = next(iter(qualified[head[0]]))
+        key = (head[0],) + qual_keys
+        keys[position] = key
+        weight = counts[position]
+        for part_key, name, spelling in (head,) + quals:
+            spellings.setdefault(part_key, [None, Counter()])
+            if name is not None:
+                spellings[part_key][0] = name
+            spellings[part_key][1][spelling] += weight
+
+    def display(part_key):
+        name, counter = spellings[part_key]
+        return name if name is not None else _spelling(counter)
+
+    names = [', '.join(display(part_key) for part_key in keys[position]) for position in range(len(parsed))]
+
+    # Sorted categories, so groupby(sort=True) orders the groups by name
+    name_codes, categories = pd.factorize(np.array(names, dtype=object), sort=True)
+    row_codes = np.where(valid, name_codes[np.maximum(codes, 0)] if len(name_codes) else -1, -1)
+    return pd.Series(
+        pd.Categorical.from_codes(row_codes, categories=categories),
+        index=locations.index,
+        name=locations.name
+    )
+
+
+def location_name_map(locations, normalized):
+    """
+    Maps every distinct location value to its canonical name.
+
+    Args:
+        locations (Series): Location names as uploaded
+        normalized (Series): normalize_locations of the same rows
+
+    Returns:
+        dict: Location value -> canonical name (the first one, when a qualifier
+            column splits a value across places)
+    """
+    pairs = pd.DataFrame({'value': locations.to_numpy(), 'name': normalized.to_numpy()}).dropna()
+    pairs = pairs.drop_duplicates('value')
+    return dict(zip(pairs['value'].tolist(), pairs['name'].astype(object).tolist()))
@@ -0,0 +1,136 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+)
+from prometheus_client import multiprocess
+
+# Pipeline stages timed by stage_timer
+STAGE_TYPE_CONVERSION = 'type_conversion'
+STAGE_LOCATION_DETECTION = 'location_detection'
+STAGE_GROUPBY = 'groupby'
+STAGE_GEOCODING = 'geocoding'
+STAGE_ANALYTICS = 'analytics'
+STAGE_SERIALIZATION = 'serialization'
+
+STAGE_SECONDS = Histogram(
+    'dataset_stage_seconds',
+    'Time spent in each stage of the dataset pipeline',
+    ['stage'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+GEOCODE_REQUEST_SECONDS = Histogram(
+    'geocode_request_seconds',
+    'Duration of single remote geocoder calls, retries included',
+    ['backend'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+GEOCODE_CACHE_LOOKUPS = Counter(
+    'geocode_cache_lookups_total',
+    'Geocode cache lookups by outcome (hit, miss, error: a cached failed lookup)',
+    ['result']
+)
+GEOCODE_ERRORS = Counter(
+    'geocode_errors_total',
+    'Failed remote geocoder calls by backend and kind (timeout, service)',
+    ['backend', 'kind']
+)
+DATASET_ROWS = Gauge(
+    'dataset_rows',
+    'Rows in the most recently processed dataset',
+    multiprocess_mode='livemostrecent'
+)
+DATASET_ROWS_TOTAL = Counter('dataset_rows_processed_total', 'Rows processed by the dataset pipeline')
+RESPONSE_PAYLOAD_BYTES = Gauge(
+    'dataset_response_payload_bytes',
+    'Size of the most recently encoded dataset response',
+    ['encoding'],
+    multiprocess_mode='livemostrecent'
+)
+
+# Stage durations of the current request, collected for the Server-Timing header
+_request_timings = ContextVar('request_timings', default=None)
+
+
+@contextmanager
+def stage_timer(stage):
+    """
+    Times a block as one pipeline stage.
+
+    The duration is observed in the stage histogram and, while a request is
+    collecting timings (see collect_request_timings), added to that request's
+    total for the stage.
+
+    Args:
+        stage (str): Stage name, one of the STAGE_* constants
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+def collect_request_timings():
+    """
+    Starts collecting stage durations for the current request.
+
+    Returns:
+        dict: Stage name -> seconds, filled in as the request runs
+    """
+    timings = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings, total=None):
+    """
+    Formats stage durations as a Server-Timing header value.
+
+    Args:
+        timings (dict): Stage name -> seconds
+        total (float): Optional duration of the whole request in seconds
+
+    Returns:
+        str: e.g. "type_conversion;dur=12.3, geocoding;dur=40.1, total;dur=60.2"
+    """
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def record_dataset_rows(rows):
+    """Records the size of a processed dataset."""
+    DATASET_ROWS.set(rows)
+    DATASET_ROWS_TOTAL.inc(rows)
+
+
+def record_payload_bytes(size, encoding):
+    """Records the size of an encoded response ('json' or 'columnar')."""
+    RESPONSE_PAYLOAD_BYTES.labels(encoding).set(size)
+
+
+def render_metrics():
+    """
+    Renders every metric in the Prometheus text format.
+
+    With several worker processes, set PROMETHEUS_MULTIPROC_DIR to a shared
+    empty directory so the values of all workers are aggregated.
+
+    Returns:
+        tuple: (body bytes, content type)
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,318 @@
+import atexit
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+from multiprocessing import shared_memory
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.core.settings import settings
+from src.services.profiling import TOP_VALUES_LIMIT, FrameProfile
+
+logger = logging.getLogger(__name__)
+
+# Relative cost of profiling a text column compared to a numeric one, used to balance tasks
+TEXT_COLUMN_COST = 3
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def profile_workers():
+    """Returns the number of profiling processes; PROFILE_WORKERS=0 means one per CPU."""
+    return settings.PROFILE_WORKERS or os.cpu_count() or 1
+
+
+def frame_profile(df):
+    """
+    Profiles a frame, in parallel when it is large enough.
+
+    Frames of at least PARALLEL_PROFILE_MIN_CELLS cells are profiled by
+    ParallelFrameProfile when more than one worker is configured; if shared
+    memory or the process pool is unavailable, the serial FrameProfile is used.
+
+    Args:
+        df (DataFrame): Typed dataset
+
+    Returns:
+        FrameProfile: Per-column metrics and duplicate count of the frame
+    """
+    workers = profile_workers()
+    if workers < 2 or len(df.columns) < 2 or df.size < settings.PARALLEL_PROFILE_MIN_CELLS:
+        return FrameProfile(df)
+    try:
+        return ParallelFrameProfile(df, workers)
+    except (OSError, BrokenProcessPool) as e:
+        logger.warning("Parallel profiling unavailable, profiling serially: %s", e)
+        _reset_executor(wait=True)
+        return FrameProfile(df)
+
+
+def _get_executor(workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None or _executor._max_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            # forkserver avoids forking the threads of the web server
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+        return _executor
+
+
+def _reset_executor(wait=False):
+    """Shuts the process pool down; the next parallel profile starts a new one."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait, cancel_futures=True)
+        _executor = None
+
+
+# Join the worker processes at exit instead of leaving them (and their semaphores) behind
+atexit.register(_reset_executor, wait=True)
+
+
+class SharedFrame:
+    """
+    Columns of a DataFrame copied once into a shared memory segment.
+
+    Columns with a NumPy dtype are stored as their raw buffer and categorical
+    columns as their codes. Text columns
+    are stored as one UTF-8 blob with the byte length of every value and a
+    null mask. Workers attach to the segment by name and rebuild the columns
+    they need with their original dtypes, so the values are never pickled.
+    Columns that fit neither layout (e.g. object columns mixing numbers and
+    text) are listed in local_columns and must be profiled in-process.
+    """
+
+    def __init__(self, df):
+        self.rows = len(df)
+        self.layout = {}
+        self.local_columns = []
+
+        parts = []
+        size = 0
+        for col in df.columns:
+            encoded = _encode_column(df[col])
+            if encoded is None:
+                self.local_columns.append(col)
+                continue
+            spec, buffers = encoded
+            spec['buffers'] = []
+            for buffer in buffers:
+                spec['buffers'].append((size, buffer.dtype.str, len(buffer)))
+                parts.append((size, buffer))
+                size += -(-buffer.nbytes // 8) * 8
+            self.layout[col] = spec
+
+        self.memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        try:
+            for offset, buffer in parts:
+                target = np.ndarray(buffer.shape, dtype=buffer.dtype, buffer=self.memory.buf, offset=offset)
+                target[:] = buffer
+                del target
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def close(self):
+        """Releases and removes the segment."""
+        self.memory.close()
+        self.memory.unlink()
+
+
+def _encode_column(series):
+    """Returns (spec, buffers) to store a column in shared memory, or None if it cannot be."""
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind != 'O':
+        return {'kind': 'array', 'dtype': series.dtype.str}, [series.to_numpy()]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Only the codes are shared; the categories travel with the (pickled) dtype
+        return {'kind': 'category', 'dtype': series.dtype}, [series.cat.codes.to_numpy()]
+
+    is_text = pd.api.types.is_string_dtype(series.dtype) and (
+        series.dtype != object or pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty')
+    )
+    if not is_text:
+        return None
+
+    values = np.asarray(series.array, dtype=object)  # No copy for object and python-backed string columns
+    nulls = pd.isna(values)
+    strings = values[~nulls].tolist()
+    text = ''.join(strings)
+    data = text.encode('utf-8', 'surrogatepass')
+    if len(data) == len(text):
+        lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+    else:
+        lengths = np.fromiter(
+            (len(value.encode('utf-8', 'surrogatepass')) for value in strings), dtype=np.int64, count=len(strings)
+        )
+    spec = {'kind': 'text', 'dtype': series.dtype, 'ascii': len(data) == len(text)}
+    return spec, [np.frombuffer(data, dtype=np.uint8), lengths, nulls]
+
+
+def _read_column(buf, spec, rows):
+    """Rebuilds a column stored by _encode_column; array columns are views of the segment."""
+    arrays = [np.ndarray((count,), dtype=dtype, buffer=buf, offset=offset) for offset, dtype, count in spec['buffers']]
+    if spec['kind'] == 'array':
+        return arrays[0]
+    if spec['kind'] == 'category':
+        return pd.Series(pd.Categorical.from_codes(arrays[0], dtype=spec['dtype']), copy=False)
+
+    data, lengths, nulls = arrays
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    if spec['ascii']:
+        text = data.tobytes().decode('ascii')
+        strings = [text[start:end] for start, end in zip(starts.tolist(), ends.tolist())]
+    else:
+        raw = data.tobytes()
+        strings = [raw[start:end].decode('utf-8', 'surrogatepass') for start, end in zip(starts.tolist(), ends.tolist())]
+    values = np.full(rows, np.nan, dtype=object)
+    values[~nulls] = strings
+    # An explicit dtype keeps object columns from being inferred as strings
+    return pd.Series(values, dtype=spec['dtype'], copy=False)
+
+
+class _ColumnsProfile(FrameProfile):
+    """FrameProfile of some columns of a frame, without the frame-wide duplicate count."""
+
+    def _profile_duplicates(self, df):
+        return None
+
+    def results(self):
+        """Returns the per-column metrics, with value counts cut to the reported top values."""
+        results = {
+            'non_null': self.non_null,
+            'nulls': self.nulls,
+            'nunique': self.nunique,
+            'value_counts': {col: counts.head(TOP_VALUES_LIMIT) for col, counts in self.value_counts.items()}
+        }
+        if self.numeric_columns:
+            for metric in ParallelFrameProfile.NUMERIC_METRICS:
+                results[metric] = getattr(self, metric)
+        return results
+
+
+def _profile_task(name, layout, rows, codes_name, codes_width, positions):
+    """
+    Worker: profiles some columns of a SharedFrame and factorizes them.
+
+    The factorized codes, which identify equal values within each column,
+    are written to row positions[i] of the codes segment (codes_width
+    columns x rows) for the duplicate row count.
+    """
+    columns = list(layout)
+    memory = shared_memory.SharedMemory(name=name)
+    codes_memory = shared_memory.SharedMemory(name=codes_name)
+    try:
+        frame = pd.DataFrame({col: _read_column(memory.buf, layout[col], rows) for col in columns}, copy=False)
+        frame.index = pd.RangeIndex(rows)
+        results = _ColumnsProfile(frame).results()
+
+        codes = np.ndarray((codes_width, rows), dtype=np.int64, buffer=codes_memory.buf)
+        for col, position in zip(columns, positions):
+            codes[position] = pd.factorize(frame[col])[0]
+        del codes, frame
+        return results
+    finally:
+        memory.close()
+        codes_memory.close()
+
+
+def _partition(columns, layout, workers):
+    """Splits columns into at most `workers` groups of similar cost, deterministically."""
+    costs = {col: TEXT_COLUMN_COST if layout[col]['kind'] == 'text' else 1 for col in columns}
+    groups = [[] for _ in range(min(workers, len(columns)))]
+    loads = [0] * len(groups)
+    for col in sorted(columns, key=lambda col: -costs[col]):
+        target = loads.index(min(loads))
+        groups[target].append(col)
+        loads[target] += costs[col]
+    return [group for group in groups if group]
+
+
+class ParallelFrameProfile(FrameProfile):
+    """
+    FrameProfile computed by a pool of processes.
+
+    The frame is copied once into shared memory and its columns are split into
+    groups, one task per worker. Each task runs the same per-column pandas
+    calls as FrameProfile on its columns (null and distinct counts, moments,
+    quartiles, outliers, value counts) and factorizes them for the duplicate
+    row count, which the parent finishes on the combined codes. Columns that
+    cannot be shared are profiled in the parent while the workers run.
+    Results are merged in column order, so they are identical to the serial
+    FrameProfile whatever the worker count or completion order; only the
+    value counts are kept to the reported top values.
+    """
+
+    NUMERIC_METRICS = (
+        'min', 'max', 'mean', 'std', 'sum', 'zeros', 'negatives', 'positives',
+        'median', 'q25', 'q75', 'outliers'
+    )
+
+    def __init__(self, df, workers):
+        self.workers = workers
+        super().__init__(df)
+
+    def _profile_columns(self, df):
+        shared = SharedFrame(df)
+        try:
+            codes_memory = shared_memory.SharedMemory(create=True, size=max(len(shared.layout) * len(df) * 8, 1))
+            try:
+                self._profile_shared(df, shared, codes_memory)
+            finally:
+                codes_memory.close()
+                codes_memory.unlink()
+        finally:
+            shared.close()
+
+    def _profile_shared(self, df, shared, codes_memory):
+        positions = {col: i for i, col in enumerate(shared.layout)}
+        executor = _get_executor(self.workers)
+        futures = [
+            executor.submit(
+                _profile_task, shared.name, {col: shared.layout[col] for col in group}, len(df),
+                codes_memory.name, len(positions), [positions[col] for col in group]
+            )
+            for group in _partition(list(shared.layout), shared.layout, self.workers)
+        ]
+
+        partials = []
+        local_codes = []
+        if shared.local_columns:
+            local = df[shared.local_columns]
+            partials.append(_ColumnsProfile(local).results())
+            local_codes = [pd.factorize(local[col])[0] for col in shared.local_columns]
+        partials.extend(future.result() for future in futures)
+
+        self.non_null = pd.concat([partial['non_null'] for partial in partials]).reindex(df.columns)
+        self.nulls = pd.concat([partial['nulls'] for partial in partials]).reindex(df.columns)
+        self.nunique = pd.concat([partial['nunique'] for partial in partials]).reindex(df.columns)
+        self.value_counts = {}
+        for partial in partials:
+            self.value_counts.update(partial['value_counts'])
+        if self.numeric_columns:
+            for metric in self.NUMERIC_METRICS:
+                values = [partial[metric] for partial in partials if metric in partial]
+                setattr(self, metric, pd.concat(values).reindex(self.numeric_columns))
+
+        codes = np.ndarray((len(shared.layout), len(df)), dtype=np.int64, buffer=codes_memory.buf)
+        columns = [codes[i] for i in range(len(shared.layout))] + local_codes
+        # Rows are equal exactly when their codes are equal in every column
+        self._codes = pd.DataFrame(dict(enumerate(columns)), copy=True)
+        del codes, columns
+
+    def _profile_duplicates(self, df):
+        duplicates = self._codes.duplicated().sum()
+        self._codes = None
+        return duplicates
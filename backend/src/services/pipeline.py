@@ -0,0 +1,291 @@
+import json
+import logging
+
+import pandas as pd
+
+from src.core.settings import settings
+from src.helper.columnar import decode_columnar, encode_columnar
+from src.helper.dtype_converter import build_typed_frame
+from src.helper.serializer import encode_json
+from src.services.append import (
+    UnknownDatasetError, append_states, get_append_state, register_append_state, register_dataset_state
+)
+from src.services.core import attach_coordinates, get_coordinates_for_json, log_progress
+from src.services.dataset import Dataset
+from src.services.dataset_store import dataset_store
+from src.services.analytical_data import get_analytical_data
+from src.services.metrics import (
+    STAGE_ANALYTICS, STAGE_SERIALIZATION, STAGE_TYPE_CONVERSION, record_dataset_rows, record_payload_bytes, stage_timer
+)
+from src.services.response_cache import response_cache
+from src.services.spatial_index import SpatialIndex, spatial_indexes
+from src.services.streaming import aggregate_csv_stream, iter_csv_chunks, open_csv_stream
+
+logger = logging.getLogger(__name__)
+
+
+def build_dataset_response(response, analytical_data, columnar=False, dataset_id=None):
+    """
+    Build the encoded dataset response from the geocoded aggregate and the analytics.
+
+    The frames and the analytics (NumPy types included) are written straight
+    to JSON bytes, without intermediate Python copies of the data. With
+    columnar=True, globe_data and full_data are sent as typed column buffers
+    instead (see encode_columnar) and the rest as its JSON header. Given a
+    dataset_id, the spatial index of the globe data is built and registered
+    under it, and the id is returned for cell queries.
+    """
+    significant_columns = response.columns.drop(['name', 'latitude', 'longitude']).tolist()
+    if not significant_columns:
+        raise ValueError("No numeric columns found for aggregation.")
+
+    globe_df = response[['name', 'latitude', 'longitude', significant_columns[0]]]
+    globe_df = globe_df.rename(columns={significant_columns[0]: 'significantCol'})
+
+    if dataset_id is not None:
+        spatial_indexes.put(dataset_id, SpatialIndex(globe_df, settings.SPATIAL_INDEX_MAX_ZOOM))
+
+    with stage_timer(STAGE_SERIALIZATION):
+        if columnar:
+            body = encode_columnar(
+                {"globe_data": globe_df, "full_data": response},
+                {
+                    "status": 200,
+                    "dataset_id": dataset_id,
+                    "significant_columns": significant_columns,
+                    "analytical_data": analytical_data
+                }
+            )
+        else:
+            body = encode_json({
+                "status": 200,
+                "data": {
+                    "dataset_id": dataset_id,
+                    "globe_data": globe_df,
+                    "significant_columns": significant_columns,
+                    "full_data": response,
+                    "analytical_data": analytical_data
+                }
+            })
+    record_payload_bytes(len(body), 'columnar' if columnar else 'json')
+    return body
+
+
+def get_spatial_index(dataset_id):
+    """
+    Returns the spatial index of a dataset.
+
+    Indexes live in the memory of the process that built them; another worker
+    (or the same one after eviction or a restart) rebuilds it from the cached
+    response, if that is still available.
+
+    Args:
+        dataset_id (str): Id returned with the dataset response
+
+    Returns:
+        SpatialIndex: The index, or None if the dataset is unknown
+    """
+    index = spatial_indexes.get(dataset_id)
+    if index is not None:
+        return index
+
+    body = response_cache.get(dataset_id)
+    if body is not None:
+        globe_df = pd.DataFrame(json.loads(body)['data']['globe_data'])
+    else:
+        body = response_cache.get(f"{dataset_id}-columnar")
+        if body is None:
+            return None
+        globe_df = decode_columnar(body)[0]['globe_data']
+
+    index = SpatialIndex(globe_df, settings.SPATIAL_INDEX_MAX_ZOOM)
+    spatial_indexes.put(dataset_id, index)
+    return index
+
+
+def open_dataset_writer(dataset_id, parent=None):
+    """
+    Starts storing an upload for queries, if a dataset id is given and the store is enabled.
+
+    With a parent dataset, only the rows written are stored and readers chain them after the parent's.
+    """
+    if dataset_id is None or not dataset_store.enabled:
+        return None
+    return dataset_store.writer(dataset_id, parent)
+
+
+def finish_dataset_writer(writer, location_column, response, location_names=None):
+    """Completes a stored upload; the response is still served if storing fails."""
+    if writer is None:
+        return
+    try:
+        writer.finish(location_column, response, location_names)
+    except Exception:
+        logger.exception("Error storing dataset")
+        writer.abort()
+
+
+def process_records(data, progress=log_progress, approximate=False, columnar=False, dataset_id=None):
+    """
+    Geocodes and analyses parsed CSV rows.
+
+    Args:
+        data (list): JSON data from frontend (list of dicts)
+        progress (callable): Callback(stage, done, total, message) reporting progress
+        approximate (bool): Compute sketch-based (approximate) analytics
+        columnar (bool): Encode the response in the columnar binary layout
+        dataset_id (str): Content hash to register the spatial index and stored dataset under
+
+    Returns:
+        bytes: The encoded dataset response
+    """
+    # Parse the upload once; geocoding and analytics share the typed frame
+    progress('parsing', 0, 1, f"{len(data)} rows")
+    record_dataset_rows(len(data))
+    dataset = Dataset.from_records(data)
+    response = get_coordinates_for_json(dataset, progress)
+
+    writer = open_dataset_writer(dataset_id)
+    if writer is not None:
+        writer.append(dataset.frame)
+        finish_dataset_writer(writer, dataset.location_column, response, dataset.location_names)
+
+    progress('analytics', 0, 1, "computing analytics")
+    with stage_timer(STAGE_ANALYTICS):
+        analytical_data = get_analytical_data(dataset, approximate=approximate)
+    body = build_dataset_response(response, analytical_data, columnar, dataset_id)
+    register_dataset_state(dataset_id, dataset, response, approximate)
+    return body
+
+
+def process_csv_stream(fileobj, progress=log_progress, approximate=False, columnar=False, dataset_id=None):
+    """
+    Geocodes and analyses a raw CSV file (optionally gzip-compressed) chunk by chunk.
+
+    Args:
+        fileobj (file): Binary file object with the CSV contents
+        progress (callable): Callback(stage, done, total, message) reporting progress
+        approximate (bool): Sketch the order statistics, distinct counts and duplicates
+        columnar (bool): Encode the response in the columnar binary layout
+        dataset_id (str): Content hash to register the spatial index and stored dataset under
+
+    Returns:
+        bytes: The encoded dataset response
+    """
+    progress('parsing', 0, 1, "reading CSV")
+    writer = open_dataset_writer(dataset_id)
+    try:
+        aggregator = aggregate_csv_stream(fileobj, approximate=approximate, writer=writer)
+        record_dataset_rows(aggregator.rows)
+        response = attach_coordinates(aggregator.grouped_frame(), aggregator.location_column, progress)
+    except Exception:
+        if writer is not None:
+            writer.abort()
+        raise
+    finish_dataset_writer(writer, aggregator.location_column, response, aggregator.location_names)
+    progress('analytics', 0, 1, "computing analytics")
+    with stage_timer(STAGE_ANALYTICS):
+        analytical_data = aggregator.analytics()
+    body = build_dataset_response(response, analytical_data, columnar, dataset_id)
+    register_append_state(dataset_id, aggregator, response)
+    return body
+
+
+def process_append(base_id, frames, progress=log_progress, approximate=False, columnar=False, dataset_id=None):
+    """
+    Appends rows to a dataset and builds the response of the appended version.
+
+    Only the new rows are aggregated (see AppendState) and only locations the
+    dataset has not seen before are geocoded. The appended version is kept
+    for further appends under its own id and, while the dataset appended to
+    is in the dataset store, stored as the new rows chained to that dataset,
+    so it can be queried and appended to from any worker.
+
+    Args:
+        base_id (str): Id of the dataset appended to; its state is left unchanged
+        frames (iterable): Typed chunks of the new rows
+        progress (callable): Callback(stage, done, total, message) reporting progress
+        approximate (bool): Sketch the order statistics, distinct counts and duplicates
+        columnar (bool): Encode the response in the columnar binary layout
+        dataset_id (str): Id of the appended version
+
+    Returns:
+        bytes: The encoded dataset response
+
+    Raises:
+        UnknownDatasetError: If the dataset appended to is unknown
+    """
+    state = get_append_state(base_id, approximate)
+    if state is None:
+        raise UnknownDatasetError(f"Unknown dataset: {base_id}")
+    state = state.copy()
+    stored = dataset_store.get(base_id)
+    writer = open_dataset_writer(dataset_id, stored) if stored is not None else None
+    aggregator = state.aggregator
+    try:
+        rows = 0
+        for frame in frames:
+            state.append(frame)
+            if writer is not None:
+                writer.append(frame)
+            rows += len(frame)
+        record_dataset_rows(rows)
+
+        grouped = aggregator.grouped_frame()
+        known = state.known_coordinates(grouped[aggregator.location_column])
+        response = attach_coordinates(grouped, aggregator.location_column, progress, known)
+    except Exception:
+        if writer is not None:
+            writer.abort()
+        raise
+    finish_dataset_writer(writer, aggregator.location_column, response, aggregator.location_names)
+    state.remember(response)
+
+    progress('analytics', 0, 1, "computing analytics")
+    with stage_timer(STAGE_ANALYTICS):
+        analytical_data = aggregator.analytics()
+    body = build_dataset_response(response, analytical_data, columnar, dataset_id)
+    if dataset_id is not None:
+        append_states.put(dataset_id, state, approximate)
+    return body
+
+
+def process_append_records(base_id, data, progress=log_progress, approximate=False, columnar=False, dataset_id=None):
+    """
+    Appends parsed CSV rows to a dataset (see process_append).
+
+    Args:
+        base_id (str): Id of the dataset appended to
+        data (list): New rows from the frontend (list of dicts)
+        progress (callable): Callback(stage, done, total, message) reporting progress
+        approximate (bool): Sketch the order statistics, distinct counts and duplicates
+        columnar (bool): Encode the response in the columnar binary layout
+        dataset_id (str): Id of the appended version
+
+    Returns:
+        bytes: The encoded dataset response
+    """
+    progress('parsing', 0, 1, f"{len(data)} rows")
+    with stage_timer(STAGE_TYPE_CONVERSION):
+        frame = build_typed_frame(data)
+    return process_append(base_id, [frame], progress, approximate, columnar, dataset_id)
+
+
+def process_append_csv(base_id, fileobj, progress=log_progress, approximate=False, columnar=False, dataset_id=None):
+    """
+    Appends the rows of a raw CSV file (optionally gzip-compressed) to a dataset, chunk by chunk.
+
+    Args:
+        base_id (str): Id of the dataset appended to
+        fileobj (file): Binary file object with the new rows
+        progress (callable): Callback(stage, done, total, message) reporting progress
+        approximate (bool): Sketch the order statistics, distinct counts and duplicates
+        columnar (bool): Encode the response in the columnar binary layout
+        dataset_id (str): Id of the appended version
+
+    Returns:
+        bytes: The encoded dataset response
+    """
+    progress('parsing', 0, 1, "reading CSV")
+    chunks = iter_csv_chunks(open_csv_stream(fileobj), settings.CSV_CHUNK_ROWS)
+    return process_append(base_id, chunks, progress, approximate, columnar, dataset_id)
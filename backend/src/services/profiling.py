@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+
+from src.core.settings import settings
+from src.services.sketches import ColumnSketch, RowSketch, combine_hashes, hash_values
+
+# Number of most frequent values kept per categorical column
+TOP_VALUES_LIMIT = 10
+
+
+def _value_counts(series):
+    """
+    Returns series.value_counts(); dictionary-encoded columns are counted on
+    their codes, which keeps ties in order of first appearance like text columns.
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.value_counts()
+    codes = pd.Series(series.cat.codes)
+    counts = codes[codes >= 0].value_counts()
+    index = pd.Index(series.cat.categories.take(counts.index.to_numpy()), name=series.name)
+    return pd.Series(counts.to_numpy(), index=index, name='count')
+
+
+class FrameProfile:
+    """
+    Per-column metrics of a DataFrame, computed in batched passes.
+
+    Null counts, distinct counts, min/max/mean/std/sum, both quartiles and the
+    sign and outlier counts are each computed once for all columns (one
+    vectorized call over the numeric block instead of one call per column and
+    metric), value counts once per categorical column and duplicates once for
+    the frame. The values are exactly those of the equivalent per-column
+    pandas calls, so reports built on top stay unchanged.
+    """
+
+    def __init__(self, df):
+        self.rows = len(df)
+        self.numeric_columns = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
+        self.categorical_columns = [col for col in df.columns if col not in set(self.numeric_columns)]
+        self._profile_columns(df)
+        self.duplicate_rows = self._profile_duplicates(df)
+
+    def _profile_columns(self, df):
+        """Computes every per-column metric: null and distinct counts, moments and order statistics."""
+        self.non_null = df.notna().sum()
+        self.nulls = df.isna().sum()
+        numeric = df[self.numeric_columns]
+
+        self.nunique = self._profile_values(df, numeric).reindex(df.columns)
+        if self.numeric_columns:
+            self._profile_moments(numeric)
+            self._profile_order_statistics(numeric)
+
+    def _profile_values(self, df, numeric):
+        """Counts values of categorical columns and returns the distinct count of every column."""
+        # Categorical columns: one value_counts each, which also gives the distinct count
+        self.value_counts = {col: _value_counts(df[col]) for col in self.categorical_columns}
+        nunique = {col: len(self.value_counts[col]) for col in self.categorical_columns}
+        if self.numeric_columns:
+            nunique.update(numeric.nunique().to_dict())
+        return pd.Series(nunique, dtype='int64')
+
+    def _profile_moments(self, numeric):
+        self.min = numeric.min()
+        self.max = numeric.max()
+        self.mean = numeric.mean()
+        self.std = numeric.std()
+        self.sum = numeric.sum()
+
+        self.zeros = (numeric == 0).sum()
+        self.negatives = (numeric < 0).sum()
+        self.positives = (numeric > 0).sum()
+
+    def _profile_order_statistics(self, numeric):
+        # Booleans are ordered as 0/1, which quantile() does not do by itself
+        bools = [col for col in numeric.columns if pd.api.types.is_bool_dtype(numeric[col])]
+        if bools:
+            numeric = numeric.astype(dict.fromkeys(bools, 'float64'))
+        self.median = numeric.median()
+        quartiles = numeric.quantile([0.25, 0.75])
+        self.q25 = quartiles.loc[0.25]
+        self.q75 = quartiles.loc[0.75]
+
+        # Outlier detection (IQR method), with the quartiles computed above
+        iqr = self.q75 - self.q25
+        lower_bound = self.q25 - 1.5 * iqr
+        upper_bound = self.q75 + 1.5 * iqr
+        self.outliers = (numeric.lt(lower_bound, axis=1) | numeric.gt(upper_bound, axis=1)).sum()
+
+    def _profile_duplicates(self, df):
+        return df.duplicated().sum()
+
+    def has_values(self, col):
+        """Returns whether a column has at least one non-null value."""
+        return self.non_null[col] > 0
+
+    def numeric_stats(self, col):
+        """
+        Returns the summary statistics of a numeric column.
+
+        Args:
+            col (str): Name of a numeric column
+
+        Returns:
+            dict: min/max/mean/median/std/quartiles/sum, sign counts and, when the
+                column has values, outlier counts
+        """
+        has_values = self.has_values(col)
+        stats = {
+            'min': float(self.min[col]) if has_values else None,
+            'max': float(self.max[col]) if has_values else None,
+            'mean': round(float(self.mean[col]), 2) if has_values else None,
+            'median': float(self.median[col]) if has_values else None,
+            'std': round(float(self.std[col]), 2) if has_values else None,
+            'q25': float(self.q25[col]) if has_values else None,
+            'q75': float(self.q75[col]) if has_values else None,
+            'sum': float(self.sum[col]) if has_values else None,
+            'zeros_count': int(self.zeros[col]),
+            'negative_count': int(self.negatives[col]),
+            'positive_count': int(self.positives[col])
+        }
+        if has_values:
+            outlier_count = int(self.outliers[col])
+            stats['outlier_count'] = outlier_count
+            stats['outlier_percentage'] = round((outlier_count / self.rows) * 100, 2)
+        return stats
+
+    def top_values(self, col, limit=TOP_VALUES_LIMIT):
+        """Returns the most frequent values of a categorical column with their counts."""
+        return self.value_counts[col].head(limit)
+
+
+class SketchProfile(FrameProfile):
+    """
+    Approximate FrameProfile for very large frames.
+
+    Null counts and moments stay exact (they are cheap and mergeable); distinct
+    counts use HyperLogLog, quartiles, medians and IQR outliers a relative-error
+    quantile sketch, top values a Misra-Gries summary and duplicate rows a
+    hash-partitioned sample of row hashes. approximation() describes the error bounds.
+    """
+
+    def __init__(self, df):
+        self.sketches = {}
+        self.row_sketch = RowSketch(settings.SKETCH_DUPLICATE_SAMPLE_SIZE)
+        self._row_hashes = np.zeros(len(df), dtype=np.uint64)
+        super().__init__(df)
+
+    def _profile_values(self, df, numeric):
+        nunique = {}
+        for col in df.columns:
+            series = df[col]
+            is_numeric = col in self.numeric_columns
+            sketch = ColumnSketch(
+                track_quantiles=is_numeric,
+                track_values=not is_numeric,
+                hll_precision=settings.SKETCH_HLL_PRECISION,
+                relative_accuracy=settings.SKETCH_QUANTILE_ACCURACY,
+                capacity=settings.SKETCH_TOP_VALUES_CAPACITY
+            )
+            hashes = hash_values(series)
+            sketch.update(series, hashes)
+            self._row_hashes = combine_hashes(self._row_hashes, hashes)
+            self.sketches[col] = sketch
+            nunique[col] = sketch.distinct.estimate()
+        self.value_counts = {}
+        return pd.Series(nunique, dtype='int64')
+
+    def _profile_order_statistics(self, numeric):
+        quantiles = {col: self.sketches[col].quantiles for col in self.numeric_columns}
+        self.median = pd.Series({col: sketch.quantile(0.5) for col, sketch in quantiles.items()}, dtype='float64')
+        self.q25 = pd.Series({col: sketch.quantile(0.25) for col, sketch in quantiles.items()}, dtype='float64')
+        self.q75 = pd.Series({col: sketch.quantile(0.75) for col, sketch in quantiles.items()}, dtype='float64')
+        self.outliers = pd.Series({col: self.sketches[col].outlier_count() for col in self.numeric_columns}, dtype='int64')
+
+    def _profile_duplicates(self, df):
+        self.row_sketch.update(self._row_hashes)
+        self._row_hashes = None
+        return np.int64(self.row_sketch.duplicate_rows())
+
+    def top_values(self, col, limit=TOP_VALUES_LIMIT):
+        top = self.sketches[col].frequent.top(limit)
+        return pd.Series([count for _, count in top], index=[value for value, _ in top], dtype='int64')
+
+    def approximation(self):
+        """
+        Describes which metrics are approximate and their error bounds.
+
+        Returns:
+            dict: Method and error bound per approximate metric
+        """
+        return approximation_summary(self.sketches, self.row_sketch)
+
+
+def approximation_summary(sketches, row_sketch, values=True):
+    """
+    Describes the approximate metrics of a set of column sketches.
+
+    Args:
+        sketches (dict): ColumnSketch per column
+        row_sketch (RowSketch): Row hash sketch used for duplicates, or None
+        values (bool): Whether distinct counts and top values are sketched too,
+            not only the order statistics
+
+    Returns:
+        dict: Method and error bound per approximate metric
+    """
+    hll_error = round(1.04 / (2 ** (settings.SKETCH_HLL_PRECISION / 2)), 4)
+    summary = {
+        'approximate': True,
+        'metrics': {
+            'unique_count': {'method': 'hyperloglog', 'relative_standard_error': hll_error},
+            'median': {'method': 'ddsketch', 'relative_error': settings.SKETCH_QUANTILE_ACCURACY},
+            'q25': {'method': 'ddsketch', 'relative_error': settings.SKETCH_QUANTILE_ACCURACY},
+            'q75': {'method': 'ddsketch', 'relative_error': settings.SKETCH_QUANTILE_ACCURACY},
+            'outlier_count': {
+                'method': 'ddsketch',
+                'note': 'Values within the relative error of the IQR bounds may be misclassified'
+            },
+            'top_values': {
+                'method': 'misra-gries',
+                'max_count_underestimate': {
+                    col: sketch.frequent.error for col, sketch in sketches.items() if sketch.frequent is not None
+                }
+            }
+        }
+    }
+    if not values:
+        del summary['metrics']['unique_count'], summary['metrics']['top_values']
+    if row_sketch is not None:
+        summary['metrics']['duplicate_rows'] = {
+            'method': 'hash-partitioned row sample',
+            'sample_rate': row_sketch.sample_rate,
+            'absolute_standard_error': row_sketch.duplicate_error()
+        }
+    return summary
@@ -0,0 +1,272 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+import time
+
+from src.core.settings import settings
+
+# Bump when the pipeline output changes so stale responses are never served
+RESPONSE_CACHE_VERSION = '7'
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def _new_hash(kind):
+    """
+    Starts a content hash salted with the pipeline version and every setting that changes the response.
+
+    A new setting that changes the response must be added here, or
+    RESPONSE_CACHE_VERSION bumped when it changes.
+    """
+    digest = hashlib.sha256()
+    geocoding = (
+        f"{settings.GEOCODER_BACKENDS}|{settings.GAZETTEER_PATH}|{settings.NOMINATIM_DOMAIN}|"
+        f"{settings.MAX_REMOTE_GEOCODE_LOCATIONS}"
+    )
+    grouping = (
+        f"{settings.LOCATION_NORMALIZATION}|{settings.LOCATION_QUALIFIER_COLUMN}|{settings.LOCATION_ALIASES_PATH}"
+    )
+    correlation = (
+        f"{settings.CORRELATION_MODE}|{settings.CORRELATION_DENSE_MAX_COLUMNS}|{settings.CORRELATION_THRESHOLD}|"
+        f"{settings.CORRELATION_TOP_K}|{settings.CORRELATION_SAMPLE_ROWS}|{settings.CORRELATION_BLOCK_ROWS}"
+    )
+    profiling = (
+        f"{settings.SKETCH_HLL_PRECISION}|{settings.SKETCH_QUANTILE_ACCURACY}|{settings.SKETCH_TOP_VALUES_CAPACITY}|"
+        f"{settings.SKETCH_DUPLICATE_SAMPLE_SIZE}|{settings.PROFILE_MAX_TRACKED_VALUES}|{settings.CSV_CHUNK_ROWS}"
+    )
+    ingestion = f"{settings.COMPACT_INGESTION}|{settings.COMPACT_CATEGORY_MAX_RATIO}"
+    digest.update(
+        f"{RESPONSE_CACHE_VERSION}|{geocoding}|{grouping}|{correlation}|{profiling}|{ingestion}|{kind}|".encode()
+    )
+    return digest
+
+
+def records_hash(data, variant=''):
+    """
+    Computes the canonical content hash of parsed CSV rows.
+
+    Column order is kept (it decides the location and numeric columns), while
+    JSON formatting differences between clients do not change the hash.
+
+    Args:
+        data (list): JSON data from frontend (list of dicts)
+        variant (str): Response variant (e.g. approximate analytics) salted into the hash
+
+    Returns:
+        str: Hex digest identifying the dataset
+    """
+    digest = _new_hash(f'records{variant}')
+    digest.update(json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=str).encode())
+    return digest.hexdigest()
+
+
+def file_hash(fileobj, variant=''):
+    """
+    Computes the content hash of an uploaded file and rewinds it.
+
+    Args:
+        fileobj (file): Seekable binary file object
+        variant (str): Response variant (e.g. approximate analytics) salted into the hash
+
+    Returns:
+        str: Hex digest identifying the file
+    """
+    digest = _new_hash(f'file{variant}')
+    for block in iter(lambda: fileobj.read(HASH_BLOCK_SIZE), b''):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-level cache of encoded dataset responses keyed by content hash.
+
+    A bounded in-memory LRU sits in front of an optional directory of files
+    shared by all workers. On disk, a file's modification time records when it
+    was written (for the TTL) and its access time when it was last served (for
+    LRU eviction); both are set explicitly, so noatime mounts do not matter.
+    Entries given a shorter TTL are written backdated by the difference.
+    """
+
+    EVICTION_INTERVAL = 20  # Check the disk bound every N writes
+
+    def __init__(self, path, ttl_seconds, max_bytes, disk_max_bytes):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+
+        self._entries = OrderedDict()  # key -> (body, stored_at), stored_at backdated for shorter TTLs
+        self._size = 0
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _file(self, key):
+        return os.path.join(self.path, f"{key}.json")
+
+    def _remember(self, key, body, stored_at):
+        """Adds an entry to the memory level, evicting least recently used ones."""
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[0])
+            self._entries[key] = (body, stored_at)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _get_memory(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            body, stored_at = entry
+            if stored_at + self.ttl_seconds < now:
+                del self._entries[key]
+                self._size -= len(body)
+                return None
+            self._entries.move_to_end(key)
+            return body
+
+    def _get_disk(self, key, now):
+        if not self.path:
+            return None
+        path = self._file(key)
+        try:
+            stored_at = os.stat(path).st_mtime
+            if stored_at + self.ttl_seconds < now:
+                os.remove(path)
+                return None
+            with open(path, 'rb') as f:
+                body = f.read()
+            os.utime(path, (now, stored_at))
+        except FileNotFoundError:
+            return None
+        self._remember(key, body, stored_at)
+        return body
+
+    def get(self, key):
+        """
+        Looks up an encoded response.
+
+        Args:
+            key (str): Content hash of the dataset
+
+        Returns:
+            bytes: The cached response body, or None if missing or expired
+        """
+        now = time.time()
+        body = self._get_memory(key, now)
+        if body is None:
+            body = self._get_disk(key, now)
+
+        with self._lock:
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return body
+
+    def set(self, key, body, ttl_seconds=None):
+        """
+        Stores an encoded response.
+
+        Args:
+            key (str): Content hash of the dataset
+            body (bytes): Encoded response body
+            ttl_seconds (int): Shorter lifetime of this entry (e.g. a response
+                with transient geocoding errors), defaults to the cache TTL
+        """
+        now = time.time()
+        stored_at = now
+        if ttl_seconds is not None and ttl_seconds < self.ttl_seconds:
+            stored_at = now - (self.ttl_seconds - ttl_seconds)
+        self._remember(key, body, stored_at)
+        if not self.path:
+            return
+
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = f"{self._file(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.utime(tmp_path, (now, stored_at))
+        os.replace(tmp_path, self._file(key))
+
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % self.EVICTION_INTERVAL == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Removes expired files and trims the directory to the least recently used bound."""
+        if not self.path or not os.path.isdir(self.path):
+            return
+        cutoff = time.time() - self.ttl_seconds
+        files = []
+        for entry in os.scandir(self.path):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                stat = entry.stat()
+                if stat.st_mtime < cutoff:
+                    os.remove(entry.path)
+                else:
+                    files.append((stat.st_atime, stat.st_size, entry.path))
+            except FileNotFoundError:
+                continue
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Removes every entry and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+        if self.path and os.path.isdir(self.path):
+            for entry in os.scandir(self.path):
+                if entry.name.endswith('.json'):
+                    os.remove(entry.path)
+
+    def stats(self):
+        """
+        Returns cache counters for this process.
+
+        Returns:
+            dict: Hit and miss counts, hit ratio and the memory level's size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups > 0 else 0,
+                'memory_entries': len(self._entries),
+                'memory_bytes': self._size
+            }
+
+
+response_cache = ResponseCache(
+    path=settings.RESPONSE_CACHE_PATH,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    disk_max_bytes=settings.RESPONSE_CACHE_DISK_MAX_BYTES
+)
@@ -0,0 +1,332 @@
+from collections import Counter
+import math
+
+import numpy as np
+import pandas as pd
+
+ROW_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def hash_values(series):
+    """
+    Hashes the values of a column to 64-bit integers.
+
+    Numeric values are hashed as float64, so 1 and 1.0 hash alike even when
+    chunks of the same column were typed differently.
+
+    Args:
+        series (Series): Column values
+
+    Returns:
+        ndarray: uint64 hash per value (nulls hash to a constant)
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return pd.util.hash_array(series.to_numpy(dtype='float64', na_value=np.nan))
+    return pd.util.hash_array(series.to_numpy(dtype=object))
+
+
+def combine_hashes(row_hashes, column_hashes):
+    """Folds one column's value hashes into running per-row hashes."""
+    with np.errstate(over='ignore'):
+        return (row_hashes * ROW_HASH_MULTIPLIER) ^ column_hashes
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count sketch.
+
+    Uses 2**precision one-byte registers; the standard error of the estimate
+    is 1.04 / sqrt(2**precision) (about 0.8% at the default precision of 14).
+    Two sketches with the same precision merge by taking register maxima.
+    """
+
+    def __init__(self, precision=14):
+        if not 11 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 11 and 18")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update(self, hashes):
+        """
+        Adds hashed values.
+
+        Args:
+            hashes (ndarray): uint64 hashes, e.g. from hash_values
+        """
+        if len(hashes) == 0:
+            return
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.intp)
+        remainder = hashes & np.uint64((1 << width) - 1)
+        # Position of the leftmost 1-bit in the remaining bits; exact because width <= 53
+        bit_length = np.frexp(remainder.astype(np.float64))[1]
+        rank = (width - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        """Merges another sketch of the same precision into this one."""
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        """Returns the estimated number of distinct values added."""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros > 0:
+            # Linear counting is more accurate for small cardinalities
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+class QuantileSketch:
+    """
+    Relative-error quantile sketch (DDSketch).
+
+    Values are counted in logarithmic buckets whose width guarantees that any
+    returned quantile is within relative_accuracy of a value of the requested
+    rank. Sketches with the same accuracy merge by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = Counter()
+        self.negative = Counter()
+        self.zero_count = 0
+        self.count = 0
+        self.minimum = None
+        self.maximum = None
+        self._buckets = None
+
+    def _add(self, store, magnitudes):
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self.log_gamma).astype(np.int64), return_counts=True)
+        store.update(dict(zip(keys.tolist(), counts.tolist())))
+
+    def update(self, values):
+        """
+        Adds values.
+
+        Args:
+            values (ndarray): float64 values without NaN
+        """
+        if len(values) == 0:
+            return
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        self._add(self.positive, values[values > 0])
+        self._add(self.negative, -values[values < 0])
+        self.zero_count += int(np.count_nonzero(values == 0))
+        self.count += len(values)
+        chunk_min, chunk_max = float(values.min()), float(values.max())
+        self.minimum = chunk_min if self.minimum is None else min(self.minimum, chunk_min)
+        self.maximum = chunk_max if self.maximum is None else max(self.maximum, chunk_max)
+        self._buckets = None
+
+    def merge(self, other):
+        """Merges another sketch of the same accuracy into this one."""
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        for value in (other.minimum, other.maximum):
+            if value is not None:
+                self.minimum = value if self.minimum is None else min(self.minimum, value)
+                self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self._buckets = None
+
+    def _sorted_buckets(self):
+        """Returns bucket representative values (ascending) and their counts."""
+        if self._buckets is None:
+            negative_keys = sorted(self.negative, reverse=True)
+            positive_keys = sorted(self.positive)
+            keys = np.array(negative_keys + positive_keys, dtype=np.float64)
+            values = 2 * np.power(self.gamma, keys) / (self.gamma + 1)
+            values[:len(negative_keys)] *= -1
+            counts = [self.negative[k] for k in negative_keys] + [self.positive[k] for k in positive_keys]
+            if self.zero_count:
+                position = len(negative_keys)
+                values = np.insert(values, position, 0.0)
+                counts.insert(position, self.zero_count)
+            self._buckets = (values, np.cumsum(counts, dtype=np.int64))
+        return self._buckets
+
+    def quantile(self, q):
+        """
+        Returns the approximate q-quantile, or None if no values were added.
+
+        Args:
+            q (float): Quantile between 0 and 1
+        """
+        if self.count == 0:
+            return None
+        values, cumulative = self._sorted_buckets()
+        # Same rank as pandas' linear interpolation, rounded to the nearest value
+        rank = int(round(q * (self.count - 1)))
+        value = float(values[np.searchsorted(cumulative, rank, side='right')])
+        return min(max(value, self.minimum), self.maximum)
+
+    def count_outside(self, lower, upper):
+        """Returns the approximate number of values below lower or above upper."""
+        if self.count == 0:
+            return 0
+        values, cumulative = self._sorted_buckets()
+        counts = np.diff(cumulative, prepend=0)
+        return int(counts[(values < lower) | (values > upper)].sum())
+
+    def outlier_count(self):
+        """Approximate IQR outlier count from the sketched quartiles."""
+        q25 = self.quantile(0.25)
+        q75 = self.quantile(0.75)
+        if q25 is None:
+            return 0
+        iqr = q75 - q25
+        return self.count_outside(q25 - 1.5 * iqr, q75 + 1.5 * iqr)
+
+
+class FrequentItems:
+    """
+    Misra-Gries heavy-hitters summary (the mergeable form of Space-Saving).
+
+    Keeps at most `capacity` counters. Counts are exact until that is
+    exceeded; afterwards every reported count underestimates the true count
+    by at most `error`, which never exceeds rows / (capacity + 1).
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = Counter()
+        self.error = 0
+
+    def update(self, counts):
+        """
+        Adds value counts.
+
+        Args:
+            counts (dict): Value -> count, e.g. from value_counts(sort=False)
+        """
+        self.counts.update(counts)
+        self._compact()
+
+    def merge(self, other):
+        """Merges another summary into this one."""
+        self.counts.update(other.counts)
+        self.error += other.error
+        self._compact()
+
+    def _compact(self):
+        if len(self.counts) <= self.capacity:
+            return
+        threshold = sorted(self.counts.values(), reverse=True)[self.capacity]
+        self.error += threshold
+        self.counts = Counter({value: count - threshold for value, count in self.counts.items() if count > threshold})
+
+    def top(self, n):
+        """Returns the n most frequent values as (value, count) pairs, ties in first-seen order."""
+        return self.counts.most_common(n)
+
+
+class ColumnSketch:
+    """
+    Mergeable approximate profile of one column: distinct count, plus
+    optionally quantiles (numeric columns) and most frequent values.
+    """
+
+    def __init__(self, track_quantiles, track_values, hll_precision, relative_accuracy, capacity):
+        self.distinct = HyperLogLog(hll_precision)
+        self.quantiles = QuantileSketch(relative_accuracy) if track_quantiles else None
+        self.frequent = FrequentItems(capacity) if track_values else None
+
+    def update(self, series, hashes=None):
+        """
+        Adds one chunk of the column.
+
+        Args:
+            series (Series): Column values
+            hashes (ndarray): Precomputed hash_values(series), if available
+        """
+        if hashes is None:
+            hashes = hash_values(series)
+        not_null = series.notna().to_numpy()
+        self.distinct.update(hashes[not_null])
+        if self.quantiles is not None and pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            self.quantiles.update(series.to_numpy(dtype='float64', na_value=np.nan)[not_null])
+        if self.frequent is not None:
+            self.frequent.update(series.value_counts(sort=False).to_dict())
+
+    def merge(self, other):
+        """Merges the sketch of another chunk of the same column."""
+        self.distinct.merge(other.distinct)
+        if self.quantiles is not None and other.quantiles is not None:
+            self.quantiles.merge(other.quantiles)
+        if self.frequent is not None and other.frequent is not None:
+            self.frequent.merge(other.frequent)
+
+    def outlier_count(self):
+        """Approximate IQR outlier count from the sketched quartiles."""
+        return self.quantiles.outlier_count()
+
+
+class RowSketch:
+    """
+    Estimates duplicate rows from a hash-partitioned sample of row hashes.
+
+    A row is sampled when its hash falls below a threshold, so all copies of
+    a row are either kept or dropped together and duplicates among the sample
+    scale up without bias. The count is exact while every row fits in
+    max_samples; beyond that the threshold is halved as often as needed.
+    Two sketches merge by concatenating samples at the lower threshold.
+    """
+
+    def __init__(self, max_samples):
+        self.max_samples = max_samples
+        self.rows = 0
+        self.level = 0  # Sample rate is 2 ** -level
+        self.samples = np.empty(0, dtype=np.uint64)
+
+    @property
+    def sample_rate(self):
+        return 2.0 ** -self.level
+
+    def _keep(self, hashes):
+        if self.level == 0:
+            return hashes
+        return hashes[(hashes >> np.uint64(64 - self.level)) == 0]
+
+    def _shrink(self):
+        while len(self.samples) > self.max_samples and self.level < 63:
+            self.level += 1
+            self.samples = self._keep(self.samples)
+
+    def update(self, row_hashes):
+        """
+        Adds one chunk of rows.
+
+        Args:
+            row_hashes (ndarray): uint64 hash per row (see combine_hashes)
+        """
+        self.rows += len(row_hashes)
+        self.samples = np.concatenate([self.samples, self._keep(row_hashes)])
+        self._shrink()
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.level = max(self.level, other.level)
+        self.samples = np.concatenate([self._keep(self.samples), self._keep(other.samples)])
+        self._shrink()
+
+    def duplicate_rows(self):
+        """Estimated number of rows that repeat an earlier row."""
+        sampled_duplicates = len(self.samples) - len(np.unique(self.samples))
+        return int(round(sampled_duplicates / self.sample_rate))
+
+    def duplicate_error(self):
+        """Approximate standard error of duplicate_rows (0 while the count is exact)."""
+        rate = self.sample_rate
+        return int(math.ceil(math.sqrt(self.duplicate_rows() * (1 - rate) / rate)))
@@ -0,0 +1,142 @@
+from collections import OrderedDict
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.core.settings import settings
+
+
+def cell_coordinates(latitude, longitude, zoom):
+    """
+    Maps coordinates to grid cells of a zoom level.
+
+    Zoom level z splits longitude and latitude into 2**z equal steps, so each
+    cell (z, x, y) contains exactly the four cells (z + 1, 2x..2x+1, 2y..2y+1)
+    of the next level, like a quadtree or geohash prefix.
+
+    Args:
+        latitude (ndarray): Latitudes in degrees
+        longitude (ndarray): Longitudes in degrees
+        zoom (int): Zoom level
+
+    Returns:
+        tuple: (x, y) integer cell columns and rows
+    """
+    size = 1 << zoom
+    x = np.floor((np.asarray(longitude, dtype=float) + 180) / 360 * size)
+    y = np.floor((np.asarray(latitude, dtype=float) + 90) / 180 * size)
+    return np.clip(x, 0, size - 1).astype(np.int64), np.clip(y, 0, size - 1).astype(np.int64)
+
+
+class SpatialIndex:
+    """
+    Pre-aggregated grid of geocoded points at every zoom level up to max_zoom.
+
+    Each level keeps one entry per non-empty cell, sorted by y * 2**zoom + x,
+    with the summed significantCol value, the point count and the points'
+    mean position. A bounding box query only binary-searches the rows of the
+    box, so its cost depends on the cells returned, not on the points.
+    """
+
+    def __init__(self, globe_df, max_zoom):
+        latitude = pd.to_numeric(globe_df['latitude'], errors='coerce').to_numpy(dtype=float)
+        longitude = pd.to_numeric(globe_df['longitude'], errors='coerce').to_numpy(dtype=float)
+        values = pd.to_numeric(globe_df['significantCol'], errors='coerce').to_numpy(dtype=float)
+        names = globe_df['name'].to_numpy(dtype=object)
+
+        # Locations that could not be geocoded are not drawn
+        located = np.isfinite(latitude) & np.isfinite(longitude)
+        self.latitude = latitude[located]
+        self.longitude = longitude[located]
+        self.values = np.nan_to_num(values[located])
+        self.names = names[located]
+        self.max_zoom = max_zoom
+        self.points = int(located.sum())
+        self.levels = [self._build_level(zoom) for zoom in range(max_zoom + 1)]
+
+    def _build_level(self, zoom):
+        x, y = cell_coordinates(self.latitude, self.longitude, zoom)
+        keys, first, inverse, counts = np.unique(
+            y * (1 << zoom) + x, return_index=True, return_inverse=True, return_counts=True
+        )
+        return {
+            'keys': keys,
+            'count': counts,
+            'value': np.bincount(inverse, weights=self.values, minlength=len(keys)),
+            'latitude': np.bincount(inverse, weights=self.latitude, minlength=len(keys)) / counts,
+            'longitude': np.bincount(inverse, weights=self.longitude, minlength=len(keys)) / counts,
+            'first': first
+        }
+
+    def query(self, zoom, west=-180.0, south=-90.0, east=180.0, north=90.0):
+        """
+        Returns the non-empty cells of a zoom level inside a bounding box.
+
+        A box whose west edge is east of its east edge crosses the antimeridian.
+
+        Args:
+            zoom (int): Zoom level, clamped to 0..max_zoom
+            west (float): Western longitude of the box
+            south (float): Southern latitude of the box
+            east (float): Eastern longitude of the box
+            north (float): Northern latitude of the box
+
+        Returns:
+            pd.DataFrame: One row per cell with x, y, name (only for single-point
+            cells), latitude, longitude, significantCol (sum) and count
+        """
+        zoom = min(max(int(zoom), 0), self.max_zoom)
+        level = self.levels[zoom]
+        size = 1 << zoom
+
+        (x_west, x_east), (y_south, y_north) = cell_coordinates(
+            [south, north], [west, east], zoom
+        )
+        x_ranges = [(x_west, x_east)] if west <= east else [(x_west, size - 1), (0, x_east)]
+        rows = np.arange(min(y_south, y_north), max(y_south, y_north) + 1) * size
+
+        slices = []
+        for x_start, x_stop in x_ranges:
+            starts = np.searchsorted(level['keys'], rows + x_start, side='left')
+            stops = np.searchsorted(level['keys'], rows + x_stop, side='right')
+            slices.extend(np.arange(start, stop) for start, stop in zip(starts, stops) if stop > start)
+        selected = np.sort(np.concatenate(slices)) if slices else np.array([], dtype=np.int64)
+
+        counts = level['count'][selected]
+        names = self.names[level['first'][selected]]
+        return pd.DataFrame({
+            'x': level['keys'][selected] % size,
+            'y': level['keys'][selected] // size,
+            'name': np.where(counts == 1, names, None),
+            'latitude': level['latitude'][selected],
+            'longitude': level['longitude'][selected],
+            'significantCol': level['value'][selected],
+            'count': counts
+        })
+
+
+class SpatialIndexRegistry:
+    """Keeps the spatial indexes of the most recently used datasets in memory."""
+
+    def __init__(self, max_datasets):
+        self.max_datasets = max_datasets
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dataset_id):
+        with self._lock:
+            index = self._indexes.get(dataset_id)
+            if index is not None:
+                self._indexes.move_to_end(dataset_id)
+            return index
+
+    def put(self, dataset_id, index):
+        with self._lock:
+            self._indexes[dataset_id] = index
+            self._indexes.move_to_end(dataset_id)
+            while len(self._indexes) > self.max_datasets:
+                self._indexes.popitem(last=False)
+
+
+spatial_indexes = SpatialIndexRegistry(settings.SPATIAL_INDEX_MAX_DATASETS)
@@ -0,0 +1,538 @@
+from collections import Counter
+import gzip
+import math
+
+import numpy as np
+import pandas as pd
+
+from src.core.settings import settings
+from src.helper.dtype_converter import infer_frame_types
+from src.services.analytical_data import get_correlation_analysis
+from src.services.correlation import CorrelationAccumulator
+from src.services.core import get_location_column_candidates, get_location_type, get_numeric_columns_after_location
+from src.services.location_keys import location_name_map, normalize_locations
+from src.services.metrics import STAGE_GROUPBY, STAGE_LOCATION_DETECTION, STAGE_TYPE_CONVERSION, stage_timer
+from src.services.profiling import approximation_summary
+from src.services.sketches import ColumnSketch, QuantileSketch, RowSketch, combine_hashes, hash_values
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def open_csv_stream(fileobj):
+    """
+    Wraps an uploaded file so gzip-compressed CSVs are decompressed on the fly.
+
+    Args:
+        fileobj (file): Binary file object positioned at the start of the upload
+
+    Returns:
+        file: Binary file object yielding the raw CSV bytes
+    """
+    magic = fileobj.read(2)
+    fileobj.seek(0)
+    if magic == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=fileobj, mode='rb')
+    return fileobj
+
+
+def iter_csv_chunks(fileobj, chunk_rows):
+    """
+    Parses a CSV in bounded-size chunks of typed rows.
+
+    Values are read as strings (empty cells stay empty strings, like the JSON
+    endpoint receives them) and typed column by column per chunk.
+
+    Args:
+        fileobj (file): Binary file object with CSV content
+        chunk_rows (int): Number of rows per chunk
+
+    Yields:
+        DataFrame: Typed chunk
+    """
+    reader = pd.read_csv(
+        fileobj,
+        chunksize=chunk_rows,
+        dtype=str,
+        keep_default_na=False,
+        na_filter=False,
+        skipinitialspace=True
+    )
+    for chunk in reader:
+        chunk.columns = [str(col).strip() for col in chunk.columns]
+        with stage_timer(STAGE_TYPE_CONVERSION):
+            typed = infer_frame_types(chunk)
+        yield typed
+
+
+def _is_numeric(series):
+    """Numeric columns as the JSON path types them (core.py): booleans count as numbers."""
+    return pd.api.types.is_numeric_dtype(series)
+
+
+def _is_number(series):
+    """Columns of numeric_analysis and the correlation matrix, which leave booleans out."""
+    return _is_numeric(series) and not pd.api.types.is_bool_dtype(series)
+
+
+class ColumnProfile:
+    """
+    Running statistics of one column, updated chunk by chunk.
+
+    Numeric moments are merged with Chan's parallel variance formula, so the
+    state never grows with the number of rows. Value counts are exact until a
+    column has more than PROFILE_MAX_TRACKED_VALUES distinct values; after that
+    only the most frequent values are kept and the column is reported as
+    truncated (its distinct count and top value counts are lower bounds). With a sketch, distinct counts,
+    quartiles, outliers and top values come from the (mergeable) sketch instead.
+    With only a quantile sketch, quartiles and outliers are sketched while the
+    value counts stay exact.
+    """
+
+    def __init__(self, name, max_tracked_values, sketch=None, quantiles=None):
+        self.name = name
+        self.max_tracked_values = max_tracked_values
+        self.sketch = sketch
+        self.quantiles = quantiles
+        self.dtype = None
+        self.numeric = True
+        self.rows = 0
+        self.null_count = 0
+
+        # Numeric moments
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.zeros_count = 0
+        self.negative_count = 0
+        self.positive_count = 0
+
+        # Value frequencies
+        self.value_counts = Counter()
+        self.truncated = False
+
+    def _merge_dtype(self, dtype):
+        dtype = str(dtype)
+        if self.dtype is None or self.dtype == dtype:
+            self.dtype = dtype
+        elif self.numeric and dtype in ('int64', 'float64') and self.dtype in ('int64', 'float64'):
+            self.dtype = 'float64'
+        else:
+            self.dtype = 'object'
+
+    def update(self, series, hashes=None):
+        """
+        Adds one chunk of the column.
+
+        Args:
+            series (Series): Typed values of this column in the chunk
+            hashes (ndarray): hash_values(series), used by the sketch if there is one
+        """
+        self.rows += len(series)
+        self.null_count += int(series.isna().sum())
+
+        if self.numeric and not _is_numeric(series):
+            # The column no longer types as numeric: its numeric stats no longer apply
+            self.numeric = False
+        self._merge_dtype(series.dtype)
+        if self.dtype == 'object':
+            # Chunks typed differently (e.g. bool and int) make an object column, as a full parse would
+            self.numeric = False
+
+        if self.numeric:
+            values = series.dropna()
+            if len(values) > 0:
+                self._update_moments(values)
+                if self.quantiles is not None:
+                    # Booleans count as 0/1, as in the full path's order statistics
+                    self.quantiles.update(values.to_numpy(dtype='float64'))
+
+        if self.sketch is not None:
+            self.sketch.update(series, hashes)
+            return
+
+        # Counter keeps first-seen order, so ties rank like value_counts on the full column
+        self.value_counts.update(series.value_counts(sort=False).to_dict())
+        if len(self.value_counts) > self.max_tracked_values:
+            self.value_counts = Counter(dict(self.value_counts.most_common(self.max_tracked_values)))
+            self.truncated = True
+
+    def _update_moments(self, values):
+        n_b = len(values)
+        mean_b = float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+
+        n_a = self.count
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * n_b / n
+        self.m2 = self.m2 + m2_b + delta ** 2 * n_a * n_b / n
+        self.count = n
+
+        self.total = self.total + values.sum().item()
+        chunk_min = values.min().item()
+        chunk_max = values.max().item()
+        self.minimum = chunk_min if self.minimum is None else min(self.minimum, chunk_min)
+        self.maximum = chunk_max if self.maximum is None else max(self.maximum, chunk_max)
+        self.zeros_count += int((values == 0).sum())
+        self.negative_count += int((values < 0).sum())
+        self.positive_count += int((values > 0).sum())
+
+    @property
+    def unique_count(self):
+        """Distinct non-null values (a lower bound once value counts were truncated)."""
+        if self.sketch is not None:
+            return self.sketch.distinct.estimate()
+        return len(self.value_counts)
+
+    def top_values(self, n):
+        """Returns the n most frequent values as (value, count) pairs."""
+        if self.sketch is not None:
+            return self.sketch.frequent.top(n)
+        return self.value_counts.most_common(n)
+
+    def _quantile_sketch(self):
+        return self.sketch.quantiles if self.sketch is not None else self.quantiles
+
+    def _quantile(self, q):
+        quantiles = self._quantile_sketch()
+        return quantiles.quantile(q) if quantiles is not None else None
+
+    def to_dict(self, total_rows):
+        """
+        Returns the column entry of the analytics dict.
+
+        Args:
+            total_rows (int): Rows in the whole dataset
+
+        Returns:
+            dict: Same layout as get_analytical_data's per-column analysis;
+                order statistics (median, quartiles, outliers) are None
+                unless the column or its quantiles are sketched, and 'values_truncated' is set
+                when unique_count and the top value counts are lower bounds
+        """
+        col_data = {
+            'data_type': self.dtype,
+            'non_null_count': self.rows - self.null_count,
+            'null_count': self.null_count,
+            'null_percentage': round((self.null_count / total_rows) * 100, 2) if total_rows > 0 else 0,
+            'unique_count': self.unique_count,
+            'uniqueness_ratio': round(self.unique_count / total_rows, 4) if total_rows > 0 else 0
+        }
+        if self.truncated:
+            col_data['values_truncated'] = True
+
+        if self.numeric:
+            has_values = self.count > 0
+            col_data['numeric_stats'] = {
+                'min': float(self.minimum) if has_values else None,
+                'max': float(self.maximum) if has_values else None,
+                'mean': round(self.mean, 2) if has_values else None,
+                'median': self._quantile(0.5),
+                'std': round(math.sqrt(self.m2 / (self.count - 1)), 2) if self.count > 1 else None,
+                'q25': self._quantile(0.25),
+                'q75': self._quantile(0.75),
+                'sum': float(self.total) if has_values else None,
+                'zeros_count': self.zeros_count,
+                'negative_count': self.negative_count,
+                'positive_count': self.positive_count,
+                'outlier_count': None,
+                'outlier_percentage': None
+            }
+            quantiles = self._quantile_sketch()
+            if quantiles is not None and has_values:
+                outlier_count = quantiles.outlier_count()
+                col_data['numeric_stats']['outlier_count'] = outlier_count
+                col_data['numeric_stats']['outlier_percentage'] = round((outlier_count / total_rows) * 100, 2)
+        else:
+            top_values = self.top_values(10)
+            col_data['categorical_stats'] = {
+                'top_values': [
+                    {'value': str(val), 'count': int(count), 'percentage': round((count / total_rows) * 100, 2)}
+                    for val, count in top_values
+                ],
+                'most_common': str(top_values[0][0]) if top_values else None,
+                'most_common_count': int(top_values[0][1]) if top_values else None
+            }
+
+        return col_data
+
+
+class StreamingAggregator:
+    """
+    Incrementally aggregates a dataset that arrives in chunks.
+
+    The location column and the numeric columns after it are detected on the
+    first chunk. Every chunk is then folded into per-location sums and row
+    counts plus per-column running profiles and the pairwise sums of the
+    correlation matrix, so memory depends on the number of columns and
+    distinct locations, not on the number of rows.
+
+    The order statistics of the numeric columns (median, quartiles, outliers)
+    and the duplicate rows cannot be merged exactly, so they are always
+    sketched and listed in the 'approximation' section. In approximate mode
+    every column carries a full mergeable sketch, which also estimates the
+    distinct counts and top values; otherwise those stay exact.
+    """
+
+    LOCATION_LIST_LIMIT = 50
+
+    def __init__(self, max_tracked_values=None, approximate=False, location_column=None):
+        self.max_tracked_values = max_tracked_values or settings.PROFILE_MAX_TRACKED_VALUES
+        self.approximate = approximate
+        self.row_sketch = RowSketch(settings.SKETCH_DUPLICATE_SAMPLE_SIZE)
+        self.rows = 0
+        self.columns = None
+        self.memory_usage_bytes = 0
+        self.profiles = {}
+        # Detected on the first chunk unless given (e.g. when re-reading a stored dataset)
+        self.location_column = location_column
+        self.numeric_columns = []
+        self.location_sums = None
+        self.location_counts = Counter()
+        self.location_list = []
+        self.location_names = None
+        self.correlation = None
+
+    def update(self, chunk):
+        """
+        Folds one typed chunk into the aggregate state.
+
+        Args:
+            chunk (DataFrame): Typed rows
+        """
+        if self.columns is None:
+            self.columns = chunk.columns.tolist()
+            self.profiles = {
+                col: ColumnProfile(
+                    col, self.max_tracked_values, self._new_sketch(chunk[col]), self._new_quantiles(chunk[col])
+                )
+                for col in self.columns
+            }
+            with stage_timer(STAGE_LOCATION_DETECTION):
+                if self.location_column is None:
+                    candidates = get_location_column_candidates(chunk)
+                    if candidates:
+                        self.location_column = candidates[0]['column']
+                if self.location_column is not None:
+                    self.numeric_columns = get_numeric_columns_after_location(chunk, self.location_column)
+            self.correlation = CorrelationAccumulator(
+                [col for col in self.columns if _is_number(chunk[col])], settings.CORRELATION_BLOCK_ROWS
+            )
+
+        self.rows += len(chunk)
+        self.memory_usage_bytes += int(chunk.memory_usage(deep=True).sum())
+        row_hashes = np.zeros(len(chunk), dtype=np.uint64)
+        for col in self.columns:
+            hashes = hash_values(chunk[col])
+            self.profiles[col].update(chunk[col], hashes)
+            row_hashes = combine_hashes(row_hashes, hashes)
+        self.row_sketch.update(row_hashes)
+
+        # Columns that stopped typing as numeric are left out here and dropped from the matrix
+        self.correlation.update(chunk[[col for col in self.correlation.columns if self.profiles[col].numeric]])
+
+        if self.location_column is not None:
+            self._update_locations(chunk)
+
+    def _new_sketch(self, series):
+        if not self.approximate:
+            return None
+        return ColumnSketch(
+            track_quantiles=_is_numeric(series),
+            track_values=True,
+            hll_precision=settings.SKETCH_HLL_PRECISION,
+            relative_accuracy=settings.SKETCH_QUANTILE_ACCURACY,
+            capacity=settings.SKETCH_TOP_VALUES_CAPACITY
+        )
+
+    def _new_quantiles(self, series):
+        # In approximate mode the column sketch holds the quantiles
+        if self.approximate or not _is_numeric(series):
+            return None
+        return QuantileSketch(settings.SKETCH_QUANTILE_ACCURACY)
+
+    def _update_locations(self, chunk):
+        # Columns that stopped typing as numeric are dropped, as a full parse would
+        self.numeric_columns = [col for col in self.numeric_columns if self.profiles[col].numeric]
+        locations = chunk[self.location_column]
+
+        if len(self.location_list) < self.LOCATION_LIST_LIMIT:
+            for loc in locations.dropna().unique():
+                if loc not in self.location_list:
+                    self.location_list.append(loc)
+                    if len(self.location_list) == self.LOCATION_LIST_LIMIT:
+                        break
+
+        # Counter keeps first-seen order, so ties rank like value_counts on the full column
+        self.location_counts.update(locations.value_counts(sort=False).to_dict())
+
+        with stage_timer(STAGE_GROUPBY):
+            sums = chunk.groupby(self.location_column)[self.numeric_columns].sum()
+            if self.location_sums is None:
+                self.location_sums = sums
+            else:
+                previous = self.location_sums[[col for col in self.location_sums.columns if col in self.numeric_columns]]
+                self.location_sums = pd.concat([previous, sums]).groupby(level=0).sum()
+
+    def grouped_frame(self):
+        """
+        Returns the per-location sums in the layout geocoding expects.
+
+        With LOCATION_NORMALIZATION the sums of the spellings of one place are
+        added up under its canonical name (a qualifier column is not used here)
+        and location_names maps every spelling to its name.
+
+        Returns:
+            DataFrame: One row per location with the summed numeric columns
+        """
+        if self.location_column is None:
+            raise ValueError("No location column found in data.")
+        if self.location_sums is None:
+            return pd.DataFrame(columns=[self.location_column])
+        grouped = self.location_sums[self.numeric_columns].sort_index()
+        if settings.LOCATION_NORMALIZATION and not pd.api.types.is_numeric_dtype(grouped.index):
+            spellings = grouped.index.to_series()
+            names = normalize_locations(
+                spellings,
+                get_location_type(self.location_column),
+                weights=[self.location_counts[loc] for loc in spellings]
+            )
+            self.location_names = location_name_map(spellings, names)
+            with stage_timer(STAGE_GROUPBY):
+                grouped = grouped.groupby(names, sort=True, observed=True).sum()
+        return grouped.rename_axis(self.location_column).reset_index()
+
+    def analytics(self):
+        """
+        Returns the analytics dict of everything seen so far.
+
+        Returns:
+            dict: Same layout as get_analytical_data; the metrics that need
+                the full dataset in memory are estimated from the sketches
+                and described in 'approximation'
+        """
+        total_rows = self.rows
+        columns = self.columns or []
+        total_cells = total_rows * len(columns)
+        empty_cells = sum(profile.null_count for profile in self.profiles.values())
+
+        analytics = {
+            'overview': {
+                'total_rows': total_rows,
+                'total_columns': len(columns),
+                'column_names': columns,
+                'memory_usage_bytes': self.memory_usage_bytes
+            },
+            'columns': {col: self.profiles[col].to_dict(total_rows) for col in columns},
+            'location_analysis': {},
+            'numeric_analysis': {},
+            'data_quality': {},
+            'patterns': {},
+            'recommendations': []
+        }
+
+        location_column = self.location_column
+        if location_column:
+            analytics['location_analysis'] = {
+                'detected_location_column': location_column,
+                'unique_locations': len(self.location_counts),
+                'location_list': list(self.location_list),
+                'most_common_locations': [
+                    {'location': str(loc), 'count': int(count)}
+                    for loc, count in self.location_counts.most_common(10)
+                ],
+                'associated_numeric_columns': list(self.numeric_columns)
+            }
+        else:
+            analytics['location_analysis'] = {
+                'detected_location_column': None,
+                'message': 'No location column detected in dataset'
+            }
+
+        numeric_columns = [
+            col for col in columns if self.profiles[col].numeric and self.profiles[col].dtype != 'bool'
+        ]
+        if numeric_columns:
+            analytics['numeric_analysis'] = {
+                'total_numeric_columns': len(numeric_columns),
+                'column_names': numeric_columns,
+                'correlation_matrix': {},
+                'total_sum': {col: float(self.profiles[col].total) for col in numeric_columns},
+                'overall_statistics': {
+                    'total_values': sum(self.profiles[col].count for col in numeric_columns),
+                    'total_nulls': sum(self.profiles[col].null_count for col in numeric_columns)
+                }
+            }
+            if len(numeric_columns) > 1:
+                analytics['numeric_analysis'].update(
+                    get_correlation_analysis(None, self.correlation.select(numeric_columns))
+                )
+
+        duplicate_rows = self.row_sketch.duplicate_rows()
+        analytics['data_quality'] = {
+            'completeness_score': round(((total_cells - empty_cells) / total_cells) * 100, 2) if total_cells > 0 else 0,
+            'duplicate_rows': duplicate_rows,
+            'duplicate_percentage': round((duplicate_rows / total_rows) * 100, 2) if total_rows > 0 else 0,
+            'columns_with_nulls': [col for col in columns if self.profiles[col].null_count > 0],
+            'columns_with_high_nulls': [
+                col for col in columns
+                if total_rows > 0 and (self.profiles[col].null_count / total_rows) > 0.3
+            ],
+            'total_cells': total_cells,
+            'filled_cells': total_cells - empty_cells,
+            'empty_cells': empty_cells
+        }
+
+        analytics['patterns'] = {
+            'potential_categorical_columns': [
+                col for col in columns
+                if 1 < self.profiles[col].unique_count < 20
+            ]
+        }
+
+        if duplicate_rows:
+            analytics['recommendations'].append(
+                f"Found {duplicate_rows} duplicate rows. Consider removing duplicates."
+            )
+
+        if analytics['data_quality']['columns_with_high_nulls']:
+            analytics['recommendations'].append(
+                f"Columns with >30% missing data: {', '.join(analytics['data_quality']['columns_with_high_nulls'])}. Consider imputation or removal."
+            )
+
+        if location_column and numeric_columns:
+            analytics['recommendations'].append(
+                f"Location data detected. You can create geographic visualizations using '{location_column}' with metrics like {', '.join(numeric_columns[:3])}."
+            )
+
+        if self.approximate:
+            sketches = {col: profile.sketch for col, profile in self.profiles.items()}
+            analytics['approximation'] = approximation_summary(sketches, self.row_sketch)
+        else:
+            analytics['approximation'] = approximation_summary({}, self.row_sketch, values=False)
+
+        return analytics
+
+
+def aggregate_csv_stream(fileobj, chunk_rows=None, approximate=False, writer=None):
+    """
+    Parses and aggregates an uploaded CSV chunk by chunk.
+
+    Args:
+        fileobj (file): Binary file object with CSV (optionally gzip) content
+        chunk_rows (int): Rows per chunk, defaults to CSV_CHUNK_ROWS
+        approximate (bool): Sketch order statistics, distinct counts and duplicates
+        writer (DatasetWriter): Optional dataset store writer receiving every typed chunk
+
+    Returns:
+        StreamingAggregator: The aggregate state after the whole file
+    """
+    aggregator = StreamingAggregator(approximate=approximate)
+    for chunk in iter_csv_chunks(open_csv_stream(fileobj), chunk_rows or settings.CSV_CHUNK_ROWS):
+        aggregator.update(chunk)
+        if writer is not None:
+            writer.append(chunk)
+    return aggregator
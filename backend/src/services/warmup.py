@@ -0,0 +1,34 @@
+from src.core.settings import settings
+from src.core.startup import startup_report
+
+
+def warm_up():
+    """
+    Initializes the process-wide state of the dataset pipeline ahead of the
+    first request: the pipeline modules (pandas, NumPy, geopy), the geocoder
+    backends with their HTTP clients, the gazetteer and location alias
+    indexes, the geocode cache schema and the geocode scheduler.
+
+    All of them are singletons, so in a serverless container this runs once
+    during initialization and every invocation reuses them. Each step is
+    timed in the startup report.
+    """
+    with startup_report.step('import pipeline'):
+        import src.services.pipeline  # noqa: F401
+    with startup_report.step('geocoder backends'):
+        from src.services.geocoders import get_geocoder_backends
+        backends = get_geocoder_backends()
+    if any(backend.name == 'gazetteer' for backend in backends):
+        with startup_report.step('gazetteer'):
+            from src.services.gazetteer import get_gazetteer
+            get_gazetteer()
+    if settings.LOCATION_NORMALIZATION:
+        with startup_report.step('location aliases'):
+            from src.services.location_keys import get_location_aliases
+            get_location_aliases()
+    with startup_report.step('geocode cache'):
+        from src.services.geocode_cache import geocode_cache
+        geocode_cache.stats()
+    with startup_report.step('geocode scheduler'):
+        from src.services.geocode_scheduler import get_geocode_scheduler
+        get_geocode_scheduler()
@@ -0,0 +1,18 @@
+import os
+import shutil
+import tempfile
+
+# The service reads its settings at import time, so configure it before any
+# test imports it: offline geocoding, no response cache on disk and caches and
+# stored datasets in a temporary directory, never the caller's data/
+_data_dir = tempfile.mkdtemp(prefix="tests-")
+os.environ.setdefault("FRONTEND_URI", "http://localhost:3000")
+os.environ["GEOCODER_BACKENDS"] = "gazetteer"
+os.environ["GEOCODE_CACHE_PATH"] = os.path.join(_data_dir, "geocode_cache.db")
+os.environ["RESPONSE_CACHE_PATH"] = ""
+os.environ["DATASET_STORE_PATH"] = os.path.join(_data_dir, "datasets")
+os.environ["JOB_STORE_PATH"] = os.path.join(_data_dir, "jobs")
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_data_dir, ignore_errors=True)
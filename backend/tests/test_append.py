@@ -0,0 +1,198 @@
+import io
+import json
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services import append
+from src.services.append import AppendStateRegistry
+from src.services.dataset_store import dataset_store
+
+API = '/api/v1/dataset'
+CITIES = ['Kathmandu', 'Delhi', 'Paris', 'Tokyo', 'Lima', 'Atlantis']
+
+
+@pytest.fixture(scope='module')
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture(scope='module')
+def frames():
+    rng = np.random.default_rng(7)
+
+    def make(rows, extra=()):
+        return pd.DataFrame({
+            'City': rng.choice(CITIES + list(extra), rows),
+            'Sales': rng.normal(0, 1e3, rows).round(2),
+            'Qty': rng.integers(-5, 100, rows),
+            'Note': rng.choice(['a', 'b', 'c'], rows)
+        })
+
+    # The appends bring new locations, including another spelling of one
+    return make(2000), make(400, ['Berlin', 'USA']), make(500, ['Nairobi', 'U.S.A.'])
+
+
+def records(frame):
+    return [{key: str(value) for key, value in row.items()} for row in frame.to_dict('records')]
+
+
+def csv_file(frame, name):
+    buffer = io.BytesIO()
+    frame.to_csv(buffer, index=False)
+    return {'file': (name, buffer.getvalue())}
+
+
+def upload(client, frame, via):
+    if via == 'records':
+        return client.post(f'{API}/', json=records(frame)).json()
+    return client.post(f'{API}/upload', files=csv_file(frame, 'upload.csv')).json()
+
+
+def append_rows(client, dataset_id, frame, via):
+    if via == 'records':
+        return client.post(f'{API}/{dataset_id}/append', json=records(frame)).json()
+    return client.post(f'{API}/{dataset_id}/append/upload', files=csv_file(frame, 'append.csv')).json()
+
+
+def sketched_metrics(data):
+    """Numeric stats a streamed response declares as sketch estimates."""
+    approximation = data['analytical_data'].get('approximation') or {}
+    sketched = {
+        metric for metric, detail in approximation.get('metrics', {}).items()
+        if detail.get('method') == 'ddsketch'
+    }
+    if 'outlier_count' in sketched:
+        sketched.add('outlier_percentage')
+    return sketched
+
+
+def comparable(data, sketched=()):
+    """
+    The response without what differs between equal datasets (their id and
+    in-memory size) and without the given sketched metrics.
+    """
+    data = json.loads(json.dumps(data))
+    data.pop('dataset_id')
+    analytics = data['analytical_data']
+    analytics['overview'].pop('memory_usage_bytes', None)
+    if sketched:
+        analytics.pop('approximation', None)
+    for column in analytics['columns'].values():
+        for metric in sketched:
+            column.get('numeric_stats', {}).pop(metric, None)
+    return data
+
+
+def assert_sketched_quantiles(data, frame):
+    """Sketched quantiles must sit at (about) their rank in the actual values."""
+    metrics = data['analytical_data'].get('approximation', {}).get('metrics', {})
+    for name, column in data['analytical_data']['columns'].items():
+        stats = column.get('numeric_stats')
+        if not stats:
+            continue
+        values = pd.to_numeric(frame[name]).to_numpy()
+        for metric, q in [('q25', 0.25), ('median', 0.5), ('q75', 0.75)]:
+            if metric in metrics:
+                rank = np.mean(values <= stats[metric])
+                assert abs(rank - q) <= 0.01, (name, metric, rank)
+
+
+def assert_same(actual, expected, path=''):
+    if isinstance(expected, dict):
+        assert isinstance(actual, dict) and set(actual) == set(expected), path
+        for key in expected:
+            assert_same(actual[key], expected[key], f'{path}/{key}')
+    elif isinstance(expected, list):
+        assert isinstance(actual, list) and len(actual) == len(expected), path
+        for index, (a, e) in enumerate(zip(actual, expected)):
+            assert_same(a, e, f'{path}[{index}]')
+    elif isinstance(expected, float) and isinstance(actual, float):
+        assert math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-9), path
+    else:
+        assert actual == expected, path
+
+
+def query(client, dataset_id, body):
+    response = client.post(f'{API}/{dataset_id}/query', json=body).json()
+    assert response['status'] == 200, response
+    return response['data']
+
+
+@pytest.mark.parametrize('via', ['records', 'csv'])
+def test_append_matches_uploading_all_rows(client, frames, via):
+    base, first, second = frames
+    uploaded = upload(client, base, via)
+    assert uploaded['status'] == 200, uploaded
+    appended = append_rows(client, uploaded['data']['dataset_id'], first, via)
+    appended = append_rows(client, appended['data']['dataset_id'], second, via)
+    expected = upload(client, pd.concat(frames, ignore_index=True), via)
+
+    assert appended['status'] == 200, appended
+    if via == 'csv':
+        # Uploaded files are streamed like the appends, down to the merged sketches
+        assert_same(comparable(appended['data']), comparable(expected['data']))
+    else:
+        # Parsed records get exact order statistics, which appends sketch
+        sketched = sketched_metrics(appended['data'])
+        assert sketched
+        assert_same(comparable(appended['data'], sketched), comparable(expected['data'], sketched))
+    assert_sketched_quantiles(appended['data'], pd.concat(frames, ignore_index=True))
+
+
+def test_append_state_is_rebuilt_from_the_store(client, frames, monkeypatch):
+    base, first, _ = frames
+    uploaded = upload(client, base, 'records')
+    # As in another worker process: no state in memory, the stored dataset is read back
+    monkeypatch.setattr(append, 'append_states', AppendStateRegistry(16))
+    appended = append_rows(client, uploaded['data']['dataset_id'], first, 'records')
+    expected = upload(client, pd.concat([base, first], ignore_index=True), 'records')
+
+    sketched = sketched_metrics(appended['data'])
+    assert_same(comparable(appended['data'], sketched), comparable(expected['data'], sketched))
+    assert_sketched_quantiles(appended['data'], pd.concat([base, first], ignore_index=True))
+
+
+def test_appended_version_is_stored_as_a_chain(client, frames):
+    base, first, second = frames
+    uploaded = upload(client, base, 'csv')
+    appended = append_rows(client, uploaded['data']['dataset_id'], first, 'csv')
+    appended = append_rows(client, appended['data']['dataset_id'], second, 'csv')
+    expected = upload(client, pd.concat(frames, ignore_index=True), 'csv')
+
+    stored = dataset_store.get(appended['data']['dataset_id'])
+    assert len(stored.segments) == 3
+    assert stored.rows == sum(len(frame) for frame in frames)
+    # Only the appended rows are written for the new version
+    assert stored.manifest['parent'] is not None
+
+    for body in [
+        {'metric': 'Sales', 'aggregation': 'sum'},
+        {'metric': 'Qty', 'aggregation': 'max', 'group_by': 'Note'},
+        {'metric': 'Sales', 'aggregation': 'mean', 'filters': [{'column': 'City', 'op': 'in', 'value': ['Berlin', 'Paris']}]},
+        {'aggregation': 'count', 'filters': [{'column': 'City', 'op': 'eq', 'value': 'United States'}]},
+    ]:
+        assert_same(
+            query(client, appended['data']['dataset_id'], body),
+            query(client, expected['data']['dataset_id'], body)
+        )
+
+
+def test_repeated_append_returns_the_same_version(client, frames):
+    base, first, _ = frames
+    dataset_id = upload(client, base, 'records')['data']['dataset_id']
+
+    once = append_rows(client, dataset_id, first, 'records')['data']['dataset_id']
+    again = append_rows(client, dataset_id, first, 'records')['data']['dataset_id']
+
+    assert once == again != dataset_id
+
+
+def test_append_to_unknown_dataset(client, frames):
+    response = append_rows(client, 'unknown', frames[1], 'records')
+
+    assert response['status'] == 404
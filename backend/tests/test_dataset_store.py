@@ -0,0 +1,181 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.services.dataset_store import AGGREGATIONS, FILTER_OPERATORS, DatasetStore
+
+LOCATION_NAMES = {'USA': 'United States', 'U.S.A.': 'United States', 'France': 'France', 'Japan': 'Japan'}
+COORDINATES = pd.DataFrame({
+    'name': ['United States', 'France', 'Japan'],
+    'latitude': [39.8, 46.6, None],
+    'longitude': [-98.6, 2.2, None]
+})
+
+# One filter per operator, on a numeric and on a dictionary column where it applies
+FILTERS = {
+    'eq': [{'column': 'Qty', 'op': 'eq', 'value': 3}, {'column': 'Segment', 'op': 'eq', 'value': 'a'}],
+    'ne': [{'column': 'Sales', 'op': 'ne', 'value': '10.5'}, {'column': 'Country', 'op': 'ne', 'value': 'United States'}],
+    'in': [{'column': 'Qty', 'op': 'in', 'value': [1, 2, 3]}, {'column': 'Country', 'op': 'in', 'value': ['USA', 'Japan']}],
+    'not_in': [{'column': 'Qty', 'op': 'not_in', 'value': [0, 4]}, {'column': 'Segment', 'op': 'not_in', 'value': ['b']}],
+    'lt': [{'column': 'Sales', 'op': 'lt', 'value': 0}],
+    'le': [{'column': 'Qty', 'op': 'le', 'value': 2}],
+    'gt': [{'column': 'Sales', 'op': 'gt', 'value': -5}],
+    'ge': [{'column': 'Qty', 'op': 'ge', 'value': '3'}],
+    'is_null': [{'column': 'Sales', 'op': 'is_null'}, {'column': 'Segment', 'op': 'is_null'}],
+    'not_null': [{'column': 'Sales', 'op': 'not_null'}, {'column': 'Country', 'op': 'not_null'}],
+}
+
+
+@pytest.fixture(scope='module')
+def frame():
+    rng = np.random.default_rng(3)
+    rows = 600
+    sales = rng.normal(0, 20, rows).round(1)
+    sales[rng.random(rows) < 0.1] = np.nan
+    sales[:5] = 10.5
+    return pd.DataFrame({
+        'Country': pd.Series(rng.choice(['USA', 'U.S.A.', 'France', 'Japan', None], rows), dtype=object),
+        'Sales': sales,
+        'Qty': rng.integers(0, 5, rows),
+        'Segment': pd.Series(rng.choice(['a', 'b', 'c', None], rows), dtype=object)
+    })
+
+
+@pytest.fixture(scope='module', params=['single', 'chain'])
+def dataset(request, frame, tmp_path_factory):
+    """The frame stored in one piece, or as a version appended to a stored first half."""
+    store = DatasetStore(str(tmp_path_factory.mktemp('datasets')), ttl_seconds=3600, max_open=4)
+    half = len(frame) // 2
+    if request.param == 'single':
+        writer = store.writer('full')
+        writer.append(frame.iloc[:half])
+        writer.append(frame.iloc[half:])
+        writer.finish('Country', COORDINATES, LOCATION_NAMES)
+        return store.get('full')
+
+    writer = store.writer('base')
+    writer.append(frame.iloc[:half])
+    writer.finish('Country', COORDINATES, LOCATION_NAMES)
+    writer = store.writer('appended', store.get('base'))
+    writer.append(frame.iloc[half:])
+    writer.finish('Country', COORDINATES, LOCATION_NAMES)
+    stored = store.get('appended')
+    assert len(stored.segments) == 2
+    return stored
+
+
+def reference_mask(frame, condition):
+    """The rows a filter keeps, in pandas."""
+    name, op, value = condition['column'], condition['op'], condition.get('value')
+    column = frame[name]
+    if op == 'is_null':
+        return column.isna()
+    if op == 'not_null':
+        return column.notna()
+
+    targets = value if op in ('in', 'not_in') else [value]
+    if pd.api.types.is_numeric_dtype(column):
+        targets = [float(target) for target in targets]
+    if op in ('lt', 'le', 'gt', 'ge'):
+        return {'lt': column.lt, 'le': column.le, 'gt': column.gt, 'ge': column.ge}[op](targets[0])
+
+    matches = column.isin(targets)
+    if name == 'Country':
+        # Location filters match a value as uploaded or its normalized name
+        matches |= column.map(LOCATION_NAMES).isin(targets)
+    return ~matches if op in ('ne', 'not_in') else matches
+
+
+def reference_query(frame, metric, aggregation, filters, group_by):
+    """
+    name -> (aggregate, count) of the matching rows, as groupby().agg() in
+    pandas gives them, and the number of matching rows with a group.
+    """
+    mask = pd.Series(True, index=frame.index)
+    for condition in filters:
+        mask &= reference_mask(frame, condition)
+    keys = frame['Country'].map(LOCATION_NAMES) if group_by == 'Country' else frame[group_by]
+    mask &= keys.notna()
+    grouped = frame[mask].groupby(keys[mask])
+    if metric is None:
+        sizes = grouped.size()
+        return {name: (size, size) for name, size in sizes.items()}, mask.sum()
+    values = grouped[metric].agg(aggregation)
+    counts = grouped[metric].count()
+    return {name: (values[name], counts[name]) for name in values.index}, mask.sum()
+
+
+def assert_query(dataset, frame, metric=None, aggregation='sum', filters=(), group_by='Country'):
+    groups, matched_rows = dataset.query(metric, aggregation, list(filters), group_by)
+    expected, expected_rows = reference_query(frame, metric, aggregation, filters, group_by)
+
+    actual = {row.name: (row.significantCol, row.count) for row in groups.itertuples(index=False)}
+    assert set(actual) == set(expected)
+    for name, (value, count) in expected.items():
+        actual_value, actual_count = actual[name]
+        assert actual_count == count, name
+        if isinstance(value, float) and math.isnan(value):
+            assert math.isnan(actual_value), name
+        else:
+            assert actual_value == pytest.approx(value, rel=1e-12), name
+    assert matched_rows == expected_rows
+
+
+@pytest.mark.parametrize('op', FILTER_OPERATORS)
+def test_filters_match_pandas(dataset, frame, op):
+    for condition in FILTERS[op]:
+        assert_query(dataset, frame, 'Sales', 'sum', [condition])
+
+
+def test_filters_combine(dataset, frame):
+    assert_query(dataset, frame, 'Qty', 'mean', [FILTERS['gt'][0], FILTERS['not_in'][1], FILTERS['in'][1]])
+
+
+@pytest.mark.parametrize('aggregation', AGGREGATIONS)
+@pytest.mark.parametrize('metric', ['Sales', 'Qty'])
+def test_aggregations_match_pandas(dataset, frame, metric, aggregation):
+    assert_query(dataset, frame, metric, aggregation)
+    assert_query(dataset, frame, metric, aggregation, [FILTERS['ne'][1]])
+
+
+@pytest.mark.parametrize('group_by', ['Country', 'Segment', 'Qty'])
+def test_group_by_matches_pandas(dataset, frame, group_by):
+    assert_query(dataset, frame, 'Sales', 'mean', group_by=group_by)
+    assert_query(dataset, frame, None, 'count', [FILTERS['lt'][0]], group_by=group_by)
+
+
+def test_integer_metrics_keep_integer_results(dataset):
+    groups, _ = dataset.query('Qty', 'max')
+
+    assert groups['significantCol'].dtype == np.int64
+
+
+def test_location_groups_carry_their_coordinates(dataset):
+    groups, _ = dataset.query(None, 'count')
+    coordinates = {row.name: (row.latitude, row.longitude) for row in groups.itertuples(index=False)}
+
+    assert coordinates == {'United States': (39.8, -98.6), 'France': (46.6, 2.2), 'Japan': (None, None)}
+
+
+def test_location_filter_matches_each_spelling(dataset, frame):
+    groups, matched_rows = dataset.query(None, 'count', [{'column': 'Country', 'op': 'eq', 'value': 'U.S.A.'}])
+
+    assert groups['name'].tolist() == ['United States']
+    assert matched_rows == (frame['Country'] == 'U.S.A.').sum()
+
+
+@pytest.mark.parametrize('kwargs, message', [
+    ({'metric': 'Sales', 'aggregation': 'median'}, 'Unknown aggregation'),
+    ({'metric': 'Missing'}, 'Unknown column'),
+    ({'metric': 'Segment'}, 'not numeric'),
+    ({'aggregation': 'sum'}, 'metric column is required'),
+    ({'metric': 'Sales', 'filters': [{'column': 'Sales', 'op': 'like', 'value': 1}]}, 'Unknown filter operator'),
+    ({'metric': 'Sales', 'filters': [{'column': 'Segment', 'op': 'lt', 'value': 'b'}]}, 'needs a numeric column'),
+    ({'metric': 'Sales', 'filters': [{'column': 'Sales', 'op': 'gt', 'value': 'abc'}]}, 'needs a number'),
+    ({'metric': 'Sales', 'filters': [{'column': 'Qty', 'op': 'in', 'value': 3}]}, 'needs a list'),
+])
+def test_invalid_queries_are_rejected(dataset, kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        dataset.query(**kwargs)
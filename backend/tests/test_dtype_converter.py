@@ -0,0 +1,82 @@
+import random
+
+import pandas as pd
+import pytest
+
+from src.helper.dtype_converter import build_typed_frame, convert_values
+
+
+def assert_parity(data):
+    """build_typed_frame must give the frame of the reference row-wise conversion."""
+    expected = pd.DataFrame(convert_values(data))
+    actual = build_typed_frame(data)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=True, check_exact=True)
+
+
+@pytest.mark.parametrize('values', [
+    ['1', '2', '-3', '+4'],                       # int
+    ['1.5', '2', '-3.25', '1e3'],                 # float, and ints promoted to float
+    ['true', 'False', 'TRUE', 'false'],           # bool strings
+    ['inf', '-Infinity', 'nan', 'NaN'],           # inf/nan
+    ['1_000', '2_5', '3'],                        # underscores accepted by int()
+    ['1_0.5', '1__0', '_1'],                      # underscores rejected by int()/float()
+    ['١٢٣', '٤٥', '7'],                           # Unicode (Arabic-Indic) digits
+    ['9223372036854775807', '-9223372036854775808'],  # int64 bounds
+    ['9223372036854775808', '1'],                 # int64 overflow
+    ['99999999999999999999999', '2.5'],           # overflow mixed with floats
+    ['1', 'a', 'true', '2.5'],                    # mixed column
+    ['', '1', '2'],                               # empty string
+    ['', '', ''],
+    [' 12 ', '\t3\n', '4'],                       # surrounding whitespace
+    ['Kathmandu', 'Pokhara', 'Kathmandu'],        # text
+])
+def test_string_columns(values):
+    assert_parity([{'col': value} for value in values])
+
+
+@pytest.mark.parametrize('values', [
+    [1, 2, 3],
+    [1.5, None, 3],
+    [True, False, True],
+    [1, '2', 3.5],
+    [None, None],
+])
+def test_non_string_values(values):
+    assert_parity([{'col': value} for value in values])
+
+
+def test_missing_keys():
+    assert_parity([
+        {'location': 'Nepal', 'count': '1', 'flag': 'true'},
+        {'location': 'India', 'ratio': '0.5'},
+        {'count': '3', 'flag': 'false'},
+        {'location': 'China', 'count': 'n/a', 'ratio': '2'},
+    ])
+
+
+def test_missing_keys_in_numeric_column():
+    assert_parity([{'a': '1', 'b': '2'}, {'a': '3'}, {'b': '4'}])
+
+
+def test_empty():
+    assert_parity([])
+    assert_parity([{}, {}])
+
+
+def test_random_rows():
+    pool = [
+        '0', '7', '-12', '+3', '1_000', '٣', '9223372036854775808', '-9223372036854775809',
+        '0.5', '-1e-3', '1E5', 'inf', '-inf', 'nan', 'Infinity',
+        'true', 'false', 'True', 'FALSE',
+        '', ' ', 'abc', 'Nepal', '12abc', '1.2.3', '_1', '1__0',
+    ]
+    rng = random.Random(0)
+    for _ in range(200):
+        columns = [f'c{i}' for i in range(rng.randint(1, 4))]
+        # Each column draws from a few values of the pool, so pure int/float/bool columns come up too
+        choices = {col: rng.sample(pool, rng.randint(1, 4)) for col in columns}
+        data = []
+        for _ in range(rng.randint(1, 30)):
+            row = {col: rng.choice(choices[col]) for col in columns if rng.random() > 0.1}
+            data.append(row)
+        assert_parity(data)
@@ -0,0 +1,273 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from src.core.settings import settings
+from src.services import core, geocode_scheduler, geocoders
+from src.services import geocode_cache as geocode_cache_module
+from src.services.geocode_cache import GeocodeCache
+from src.services.geocode_scheduler import GeocodeScheduler, TokenBucket
+
+# Places known to the stub Nominatim server
+PLACES = {
+    'springfield': (39.8, -89.6),
+    'shelbyville': (39.4, -88.8),
+    'capital city': (38.6, -90.2),
+    'ogdenville': (41.9, -87.6),
+    'north haverbrook': (44.5, -93.1),
+    'brockway': (40.1, -76.3),
+}
+BACKOFF_SECONDS = 0.05
+MAX_RETRIES = 2
+TIMEOUT_SECONDS = 0.2
+
+
+class StubNominatim(ThreadingHTTPServer):
+    """Answers /search like Nominatim and records every request it receives."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.requests = []  # (monotonic time, query)
+        self.slow = {}  # query -> number of upcoming requests answered after the client timeout
+        self.lock = threading.Lock()
+
+    def hits(self, query=None):
+        with self.lock:
+            return [t for t, q in self.requests if query is None or q == query]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlparse(self.path).query).get('q', [''])[0].casefold()
+        with server.lock:
+            server.requests.append((time.monotonic(), query))
+            slow = server.slow.get(query, 0)
+            if slow:
+                server.slow[query] = slow - 1
+        if slow:
+            time.sleep(TIMEOUT_SECONDS * 3)
+
+        places = []
+        if query in PLACES:
+            latitude, longitude = PLACES[query]
+            places.append({'lat': str(latitude), 'lon': str(longitude), 'display_name': query})
+        body = json.dumps(places).encode()
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass  # The client already gave up on a slow answer
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeClock:
+    """Stands in for the time module of the geocode cache, so TTLs can be stepped through."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def nominatim(monkeypatch):
+    server = StubNominatim()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setenv('NO_PROXY', '127.0.0.1')
+    monkeypatch.setattr(settings, 'NOMINATIM_DOMAIN', f'127.0.0.1:{server.server_port}')
+    monkeypatch.setattr(settings, 'NOMINATIM_SCHEME', 'http')
+    monkeypatch.setattr(settings, 'NOMINATIM_TIMEOUT', TIMEOUT_SECONDS)
+    monkeypatch.setattr(settings, 'NOMINATIM_RATE_LIMIT', 0)
+    monkeypatch.setattr(settings, 'GEOCODER_BACKENDS', 'nominatim')
+    monkeypatch.setattr(geocoders, '_backends', None)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(geocode_cache_module, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch, clock):
+    cache = GeocodeCache(
+        path=str(tmp_path / 'geocode_cache.db'),
+        ttl_seconds=3600,
+        negative_ttl_seconds=60,
+        error_ttl_seconds=5,
+        max_entries=1000
+    )
+    monkeypatch.setattr(core, 'geocode_cache', cache)
+    monkeypatch.setattr(geocode_scheduler, 'geocode_cache', cache)
+    return cache
+
+
+@pytest.fixture
+def scheduler(monkeypatch, cache):
+    scheduler = GeocodeScheduler(max_workers=4, max_retries=MAX_RETRIES, retry_backoff_seconds=BACKOFF_SECONDS)
+    monkeypatch.setattr(geocode_scheduler, '_scheduler', scheduler)
+    return scheduler
+
+
+def count_attempts(monkeypatch):
+    """Records the time of each geocoder call."""
+    backend = geocoders.get_geocoder_backends()[0]
+    attempts = []
+    geocode = backend.geocode
+
+    def spy(location_name, location_type='city'):
+        attempts.append(time.monotonic())
+        return geocode(location_name, location_type)
+
+    monkeypatch.setattr(backend, 'geocode', spy)
+    return attempts
+
+
+def test_token_bucket_allows_a_burst_then_paces_requests():
+    bucket = TokenBucket(rate=20, capacity=3)
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.04
+
+    for _ in range(4):
+        bucket.acquire()
+    assert time.monotonic() - start >= 4 / 20 * 0.9
+
+
+def test_token_bucket_without_rate_never_blocks():
+    bucket = TokenBucket(rate=0)
+    start = time.monotonic()
+    for _ in range(100):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.05
+
+
+def test_concurrent_requests_respect_the_rate_limit(nominatim, scheduler, monkeypatch):
+    rate = 10
+    monkeypatch.setattr(settings, 'NOMINATIM_RATE_LIMIT', rate)
+    names = [name.title() for name in PLACES]
+
+    results = scheduler.geocode_many(names)
+
+    assert {name: (r['latitude'], r['longitude']) for name, r in results.items()} == {
+        name.title(): coords for name, coords in PLACES.items()
+    }
+    times = sorted(nominatim.hits())
+    assert len(times) == len(names)
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert min(gaps) >= 1 / rate * 0.8
+
+
+def test_identical_concurrent_lookups_share_one_request(nominatim, scheduler):
+    results = scheduler.geocode_many(['Springfield', 'springfield', ' SPRINGFIELD '])
+
+    assert len(nominatim.hits('springfield')) == 1
+    assert {r['latitude'] for r in results.values()} == {PLACES['springfield'][0]}
+    assert set(results) == {'Springfield', 'springfield', ' SPRINGFIELD '}
+
+
+def test_timeouts_are_retried_with_backoff(nominatim, scheduler, monkeypatch):
+    attempts = count_attempts(monkeypatch)
+    nominatim.slow['shelbyville'] = 100
+
+    result = core.get_location_coordinates('Shelbyville')
+
+    # Each attempt is a single request; the HTTP client leaves retries to the scheduler
+    assert len(attempts) == MAX_RETRIES + 1
+    assert len(nominatim.hits('shelbyville')) == MAX_RETRIES + 1
+    gaps = [b - a for a, b in zip(attempts, attempts[1:])]
+    for retry, gap in enumerate(gaps):
+        assert gap >= BACKOFF_SECONDS * (2 ** retry)
+    assert result['latitude'] is None and result['longitude'] is None
+    assert result['error_message']
+
+
+def test_timeout_followed_by_success(nominatim, scheduler, monkeypatch):
+    attempts = count_attempts(monkeypatch)
+    nominatim.slow['ogdenville'] = 1
+
+    result = core.get_location_coordinates('Ogdenville')
+
+    assert len(attempts) == 2
+    assert (result['latitude'], result['longitude']) == PLACES['ogdenville']
+    assert 'error_message' not in result
+
+
+def test_cache_hits_send_no_requests(nominatim, scheduler, cache):
+    first = core.get_location_coordinates('Springfield')
+    missing = core.get_location_coordinates('Nowhere')
+    assert len(nominatim.hits()) == 2
+
+    assert core.get_location_coordinates('springfield ') == dict(first, location='springfield ')
+    assert core.get_location_coordinates('Nowhere') == missing
+    assert len(nominatim.hits()) == 2
+    assert missing['latitude'] is None
+    assert cache.stats()['hits'] == 2
+
+
+def test_offline_resolution_uses_cache_only(nominatim, scheduler):
+    assert core.lookup_location_offline('Brockway') is None
+    core.get_location_coordinates('Brockway')
+
+    assert core.lookup_location_offline('Brockway')['latitude'] == PLACES['brockway'][0]
+    assert len(nominatim.hits()) == 1
+
+
+def test_cached_outcomes_expire_after_their_ttl(nominatim, scheduler, clock, monkeypatch):
+    nominatim.slow['capital city'] = 100
+    core.get_location_coordinates('Springfield')
+    core.get_location_coordinates('Nowhere')
+    core.get_location_coordinates('Capital City')
+    hits = len(nominatim.hits())
+
+    # Errors expire first
+    clock.now += 10
+    assert core.lookup_location_offline('Capital City') is None
+    assert core.lookup_location_offline('Nowhere')['latitude'] is None
+    nominatim.slow.clear()
+    assert core.get_location_coordinates('Capital City')['latitude'] == PLACES['capital city'][0]
+    assert len(nominatim.hits()) == hits + 1
+
+    # Then "not found" results, while found locations are still served
+    clock.now += 60
+    assert core.lookup_location_offline('Nowhere') is None
+    assert core.lookup_location_offline('Springfield')['latitude'] == PLACES['springfield'][0]
+    core.get_location_coordinates('Nowhere')
+    assert len(nominatim.hits('nowhere')) == 2
+
+    clock.now += 3600
+    assert core.lookup_location_offline('Springfield') is None
+
+
+def test_cache_bound_evicts_least_recently_used(tmp_path, clock):
+    cache = GeocodeCache(str(tmp_path / 'bounded.db'), 3600, 60, 5, max_entries=2)
+    for name in ['a', 'b', 'c']:
+        clock.now += 1
+        cache.set(name, {'latitude': 1.0, 'longitude': 2.0})
+    clock.now += 1
+    cache.get('a')
+    cache.evict()
+
+    assert cache.get('a') is not None
+    assert cache.get('b') is None
+    assert cache.get('c') is not None
@@ -0,0 +1,133 @@
+import json
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.helper.dtype_converter import build_typed_frame
+from src.helper.serializer import encode_json
+from src.services.analytical_data import get_analytical_data
+from src.services.dataset import Dataset
+from src.services.streaming import StreamingAggregator
+
+# Numeric stats a streamed profile estimates from its quantile sketch
+SKETCHED_STATS = ('median', 'q25', 'q75', 'outlier_count', 'outlier_percentage')
+QUARTILES = (('q25', 0.25), ('median', 0.5), ('q75', 0.75))
+
+
+@pytest.fixture(scope='module')
+def frame():
+    rng = np.random.default_rng(11)
+    rows = 3000
+    sales = rng.lognormal(5, 1, rows).round(2)
+    frame = pd.DataFrame({
+        'City': rng.choice(['Kathmandu', 'Delhi', 'Paris', 'Tokyo', 'Lima'], rows),
+        'Sales': sales.astype(str),
+        'Qty': rng.integers(-5, 50, rows).astype(str),
+        'Ratio': rng.normal(0, 1, rows).round(3).astype(str),
+        'Segment': rng.choice(['a', 'b', 'c', 'd'], rows),
+        'Active': rng.choice(['true', 'false'], rows)
+    }).astype(object)
+    # Nulls, a column that is mostly numbers and some duplicate rows
+    frame.loc[rng.random(rows) < 0.05, 'Sales'] = None
+    frame.loc[rng.random(rows) < 0.02, 'City'] = None
+    frame.loc[rng.random(rows) < 0.01, 'Ratio'] = 'n/a'
+    frame = pd.concat([frame, frame.iloc[:40]], ignore_index=True)
+    return build_typed_frame(frame.to_dict('records'))
+
+
+def stream(frame, chunks, approximate=False):
+    aggregator = StreamingAggregator(approximate=approximate)
+    for rows in np.array_split(np.arange(len(frame)), chunks):
+        aggregator.update(frame.iloc[rows].reset_index(drop=True))
+    return aggregator
+
+
+def plain(analytics, stats=()):
+    """The analytics as the client receives them, without their memory usage and the given stats."""
+    analytics = json.loads(encode_json(analytics))
+    analytics['overview'].pop('memory_usage_bytes')
+    for column in analytics['columns'].values():
+        for stat in stats:
+            column.get('numeric_stats', {}).pop(stat, None)
+    return analytics
+
+
+def assert_sketched_quantile(estimate, values, q, relative_error):
+    """A sketched quantile is within the relative error of a value at that rank."""
+    exact = [np.quantile(values, q, method='lower'), np.quantile(values, q, method='higher')]
+    bounds = [value * (1 + sign * relative_error) for value in exact for sign in (-1, 1)]
+    assert min(bounds) - 1e-9 <= estimate <= max(bounds) + 1e-9
+
+
+def assert_same(actual, expected, path=''):
+    if isinstance(expected, dict):
+        assert isinstance(actual, dict) and set(actual) == set(expected), path
+        for key in expected:
+            assert_same(actual[key], expected[key], f'{path}/{key}')
+    elif isinstance(expected, list):
+        assert isinstance(actual, list) and len(actual) == len(expected), path
+        for index, (a, e) in enumerate(zip(actual, expected)):
+            assert_same(a, e, f'{path}[{index}]')
+    elif isinstance(expected, float) and isinstance(actual, float):
+        assert math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-9), path
+    else:
+        assert actual == expected, path
+
+
+@pytest.mark.parametrize('chunks', [1, 7])
+def test_exact_streaming_matches_frame_profile(frame, chunks):
+    reference = get_analytical_data(Dataset(frame))
+    analytics = stream(frame, chunks).analytics()
+    expected, actual = plain(reference), plain(analytics)
+
+    approximation = actual.pop('approximation')
+    assert set(approximation['metrics']) == {'median', 'q25', 'q75', 'outlier_count', 'duplicate_rows'}
+    assert approximation['metrics']['duplicate_rows']['absolute_standard_error'] == 0
+    comparable = plain(analytics, SKETCHED_STATS)
+    comparable.pop('approximation')
+    assert_same(comparable, plain(reference, SKETCHED_STATS))
+
+    for name, column in actual['columns'].items():
+        stats = column.get('numeric_stats')
+        if stats is None:
+            continue
+        values = frame[name].dropna().to_numpy(dtype=np.float64)
+        for stat, q in QUARTILES:
+            assert_sketched_quantile(stats[stat], values, q, approximation['metrics'][stat]['relative_error'])
+        exact = expected['columns'][name]['numeric_stats']['outlier_count']
+        assert abs(stats['outlier_count'] - exact) <= 0.01 * len(values), name
+
+
+def test_chunking_does_not_change_the_result(frame):
+    whole = plain(stream(frame, 1).analytics())
+
+    for chunks in (3, 16):
+        assert plain(stream(frame, chunks).analytics()) == whole
+
+
+def test_approximate_streaming_matches_sketch_profile(frame):
+    expected = plain(get_analytical_data(Dataset(frame), approximate=True))
+    actual = plain(stream(frame, 5, approximate=True).analytics())
+
+    assert set(actual) == set(expected)
+    assert set(actual['approximation']['metrics']) == set(expected['approximation']['metrics'])
+    error = actual['approximation']['metrics']['unique_count']['relative_standard_error']
+    for name, column in actual['columns'].items():
+        assert set(column) == set(expected['columns'][name])
+        assert column['null_count'] == expected['columns'][name]['null_count']
+        exact = frame[name].nunique()
+        assert abs(column['unique_count'] - exact) <= max(4 * error * exact, 1), name
+
+
+def test_grouped_frame_matches_groupby(frame):
+    aggregator = stream(frame, 4)
+    grouped = aggregator.grouped_frame()
+
+    names = frame['City'].map(aggregator.location_names or {}).fillna(frame['City'])
+    expected = frame.groupby(names)[aggregator.numeric_columns].sum()
+    assert grouped['City'].astype(str).tolist() == expected.index.tolist()
+    pd.testing.assert_frame_equal(
+        grouped[aggregator.numeric_columns], expected.reset_index(drop=True), check_dtype=False
+    )
@@ -1,32 +1,42 @@
 "use client";
 
-import { useState } from "react";
+import { useMemo, useState } from "react";
 import { X, AlertCircle, Map } from "lucide-react";
 import GlobeTab from "@/components/GlobeTab";
-import { LocationData } from "@/types/location";
+import { GlobeColumns } from "@/types/location";
+import { ColumnarTable, columnarToRows } from "@/lib/api";
 import { AnalyticalData } from "@/types/analytics";
 import TableTab from "@/components/TableTab";
 import AnalyticsTab from "@/components/AnalyticsTab";
 import FileUpload from "@/components/FileUpload";
 
 export default function LocationDashboard() {
-  const [locations, setLocations] = useState<LocationData[]>([]);
-  const [data, setData] = useState<any[]>([]);
+  const [locations, setLocations] = useState<GlobeColumns | null>(null);
+  const [data, setData] = useState<ColumnarTable | null>(null);
   const [analyticalData, setAnalyticalData] = useState<AnalyticalData | null>(
     null,
   );
   const [fileName, setFileName] = useState("");
   const [significantCol, setSignificantCol] = useState("");
+  const [datasetId, setDatasetId] = useState<string | null>(null);
   const [activeTab, setActiveTab] = useState<"globe" | "table" | "stats">(
     "globe",
   );
 
+  // Row objects are only built for the table view
+  const showTable = activeTab === "table";
+  const tableRows = useMemo(
+    () => (showTable && data ? columnarToRows(data) : []),
+    [showTable, data],
+  );
+
   const clearData = () => {
-    setData([]);
-    setLocations([]);
+    setData(null);
+    setLocations(null);
     setAnalyticalData(null);
     setFileName("");
     setSignificantCol("");
+    setDatasetId(null);
   };
 
   return (
@@ -54,13 +64,14 @@ export default function LocationDashboard() {
         </div>
 
         {/* Upload Section */}
-        {data.length === 0 ? (
+        {!data || !locations || data.rows === 0 ? (
           <FileUpload
             setFileName={setFileName}
             setData={setData}
             setLocations={setLocations}
             setSignificantCol={setSignificantCol}
             setAnalyticalData={setAnalyticalData}
+            setDatasetId={setDatasetId}
           />
         ) : (
           <>
@@ -94,10 +105,11 @@ export default function LocationDashboard() {
                   locations={locations}
                   significantCol={significantCol}
                   analyticalData={analyticalData}
+                  datasetId={datasetId}
                 />
               )}
 
-              {activeTab === "table" && <TableTab csvData={data} />}
+              {activeTab === "table" && <TableTab csvData={tableRows} />}
 
               {activeTab === "stats" && (
                 <AnalyticsTab analyticsData={analyticalData} />
@@ -7,8 +7,9 @@ import {
   AlertCircle,
 } from "lucide-react";
 import { useRef, useState } from "react";
-import { apiPostData } from "@/lib/api";
+import { ColumnarTable, apiPostDataColumnar, globeColumns } from "@/lib/api";
 import { AnalyticalData } from "@/types/analytics";
+import { GlobeColumns } from "@/types/location";
 
 export default function FileUpload({
   setFileName,
@@ -16,12 +17,14 @@ export default function FileUpload({
   setLocations,
   setSignificantCol,
   setAnalyticalData,
+  setDatasetId,
 }: {
   setFileName: (name: string) => void;
-  setData: (data: any[]) => void;
-  setLocations: (data: any[]) => void;
+  setData: (data: ColumnarTable | null) => void;
+  setLocations: (globe: GlobeColumns | null) => void;
   setSignificantCol: (col: string) => void;
   setAnalyticalData: (data: AnalyticalData | null) => void;
+  setDatasetId: (id: string | null) => void;
 }) {
   const fileInputRef = useRef<HTMLInputElement>(null);
   const [isDragging, setIsDragging] = useState(false);
@@ -58,41 +61,29 @@ export default function FileUpload({
         );
       });
 
-      const response = await apiPostData({ jsonData });
+      // Columnar response: globe_data and full_data arrive as typed column buffers
+      const response = await apiPostDataColumnar({ jsonData });
       console.log("Response from server:", response);
 
       if (response && response.status === 200) {
-        // Parse JSON strings from backend
-        const parsedFullData =
-          typeof response.data.full_data === "string"
-            ? JSON.parse(response.data.full_data)
-            : response.data.full_data;
-
-        const parsedGlobeData =
-          typeof response.data.globe_data === "string"
-            ? JSON.parse(response.data.globe_data)
-            : response.data.globe_data;
-
-        console.log("Parsed full data:", parsedFullData);
-        console.log("Parsed globe data:", parsedGlobeData);
-        console.log("Analytical data:", response.data.analytical_data);
-
-        setData(parsedFullData || []);
-        setLocations(parsedGlobeData || []);
-        setSignificantCol(response.data.significant_columns?.[0] || "");
-        setAnalyticalData(response.data.analytical_data || null);
+        // Kept as typed columns; the table view builds row objects when opened
+        setData(response.tables.full_data);
+        setLocations(globeColumns(response.tables.globe_data));
+        setSignificantCol(response.significant_columns?.[0] || "");
+        setAnalyticalData(response.analytical_data || null);
+        setDatasetId(response.dataset_id || null);
         setFileName(file.name);
       } else {
         setError(response.statusText || "Failed to process CSV file on server");
-        setData([]);
-        setLocations([]);
+        setData(null);
+        setLocations(null);
         setAnalyticalData(null);
         setFileName("");
       }
     } catch (err) {
       setError("Failed to process CSV file");
-      setData([]);
-      setLocations([]);
+      setData(null);
+      setLocations(null);
       setAnalyticalData(null);
       console.error(err);
     } finally {
@@ -40,27 +40,34 @@
 
 "use client";
 
-import { useState } from "react";
+import { useMemo, useState } from "react";
 import GlobeVisualization from "./GlobeVisualization";
-import { LocationData } from "@/types/location";
+import { GlobeColumns, LocationData } from "@/types/location";
 import { AnalyticalData } from "@/types/analytics";
+import { locationAt } from "@/lib/api";
 import { MapPin, TrendingUp } from "lucide-react";
 
 interface Props {
-  locations: LocationData[];
+  locations: GlobeColumns;
   significantCol: string;
   analyticalData: AnalyticalData | null;
+  datasetId: string | null;
 }
 
-export default function GlobeTab({ locations, significantCol, analyticalData }: Props) {
+export default function GlobeTab({ locations, significantCol, analyticalData, datasetId }: Props) {
   const [clickedLabel, setClickedLabel] = useState<LocationData | null>(
-    locations.length > 0 ? locations[0] : null
+    locations.length > 0 ? locationAt(locations, 0) : null
   );
 
-  // Get top locations by significant column value
-  const topLocations = [...locations]
-    .sort((a, b) => b.significantCol - a.significantCol)
-    .slice(0, 10);
+  // Get top locations by significant column value; only those become objects
+  const topLocations = useMemo(
+    () =>
+      Array.from({ length: locations.length }, (_, i) => i)
+        .sort((a, b) => locations.significantCol[b] - locations.significantCol[a])
+        .slice(0, 10)
+        .map((i) => locationAt(locations, i)),
+    [locations],
+  );
 
   return (
     <div className="grid grid-cols-1 lg:grid-cols-4 gap-6">
@@ -182,6 +189,7 @@ export default function GlobeTab({ locations, significantCol, analyticalData }:
         <div className="rounded-xl shadow-2xl border border-slate-700 h-[700px]">
           <GlobeVisualization
             locations={locations}
+            datasetId={datasetId}
             clickedLabel={clickedLabel}
             setClickedLabel={setClickedLabel}
           />
@@ -1,43 +1,134 @@
 "use client";
 
 import { useState, useEffect, useRef, useMemo, useCallback } from "react";
-import { LocationData } from "@/types/location";
+import { GlobeColumns, LocationData } from "@/types/location";
+import { apiGetCells, locationAt } from "@/lib/api";
 import dynamic from "next/dynamic";
 
 const Globe = dynamic(() => import("react-globe.gl"), { ssr: false });
 
+// Above this many locations the globe draws grid cells of the visible area instead
+const MAX_LABELS = 500;
+// Cells across the visible area; sets the zoom level requested for a camera altitude
+const CELLS_ACROSS_VIEW = 16;
+
+// Bounding box and grid zoom level seen from a camera position (altitude in globe radii)
+const viewCells = ({ lat, lng, altitude }: { lat: number; lng: number; altitude: number }) => {
+  // Angular radius of the visible cap, up to the horizon
+  const radius = (Math.acos(1 / (1 + altitude)) * 180) / Math.PI;
+  const zoom = Math.max(0, Math.round(Math.log2((360 * CELLS_ACROSS_VIEW) / (2 * radius))));
+  const south = Math.max(-90, lat - radius);
+  const north = Math.min(90, lat + radius);
+  const lngRadius = radius / Math.max(Math.cos((Math.max(Math.abs(south), Math.abs(north)) * Math.PI) / 180), 1e-6);
+  if (south === -90 || north === 90 || lngRadius >= 180) {
+    return { zoom, west: -180, south, east: 180, north };
+  }
+  const wrap = (value: number) => ((((value + 180) % 360) + 360) % 360) - 180;
+  return { zoom, west: wrap(lng - lngRadius), south, east: wrap(lng + lngRadius), north };
+};
+
+// A globe label only carries its index into the typed columns
+type Label = { index: number };
+
+// Locations with coordinates and a name
+const validLabels = (globe: GlobeColumns): Label[] => {
+  const labels: Label[] = [];
+  for (let i = 0; i < globe.length; i++) {
+    if (!Number.isNaN(globe.latitude[i]) && !Number.isNaN(globe.longitude[i]) && globe.name.codes[i] >= 0) {
+      labels.push({ index: i });
+    }
+  }
+  return labels;
+};
+
+// Cells of the spatial index in the same column layout as the uploaded locations
+const cellColumns = (cells: any[]): GlobeColumns => ({
+  length: cells.length,
+  name: {
+    codes: Int32Array.from(cells, (_, i) => i),
+    dictionary: cells.map((cell) => cell.name ?? `${cell.count} locations`),
+  },
+  latitude: Float64Array.from(cells, (cell) => cell.latitude),
+  longitude: Float64Array.from(cells, (cell) => cell.longitude),
+  significantCol: Float64Array.from(cells, (cell) => cell.significantCol ?? NaN),
+});
+
 export default function GlobeVisualization({
   locations,
+  datasetId,
   clickedLabel,
 
   setClickedLabel,
 }: {
-  locations: LocationData[];
+  locations: GlobeColumns;
+  datasetId?: string | null;
   clickedLabel: LocationData | null;
   setClickedLabel: (label: LocationData | null) => void;
 }) {
   const [dimensions, setDimensions] = useState({ width: 0, height: 0 });
   const [hoveredLabel, setHoveredLabel] = useState<LocationData | null>(null);
+  const [cells, setCells] = useState<GlobeColumns | null>(null);
   const globeEl = useRef<any>(null);
   const containerRef = useRef<HTMLDivElement>(null);
   const resizeTimeoutRef = useRef<NodeJS.Timeout>(undefined);
+  const cellsTimeoutRef = useRef<NodeJS.Timeout>(undefined);
+  const cellsRequestRef = useRef(0);
 
   // Filter out invalid locations (missing coordinates)
-  const validLocations = useMemo(
-    () =>
-      locations.filter(
-        (loc) => loc.latitude !== null && loc.longitude !== null && loc.name,
-      ),
-    [locations],
+  const validLocations = useMemo(() => validLabels(locations), [locations]);
+
+  // Large datasets: aggregated cells of the visible area from the dataset's spatial index
+  const showCells = Boolean(datasetId) && validLocations.length > MAX_LABELS;
+  const globe = showCells && cells ? cells : locations;
+  const labels = useMemo(
+    () => (globe === locations ? validLocations : validLabels(globe)),
+    [globe, locations, validLocations],
   );
 
+  const fetchCells = useCallback(
+    (view: { lat: number; lng: number; altitude: number }) => {
+      if (!showCells || !datasetId) return;
+      if (cellsTimeoutRef.current) {
+        clearTimeout(cellsTimeoutRef.current);
+      }
+      cellsTimeoutRef.current = setTimeout(async () => {
+        const request = ++cellsRequestRef.current;
+        try {
+          const response: any = await apiGetCells({ datasetId, ...viewCells(view) });
+          // Drop responses of views the camera already left
+          if (request !== cellsRequestRef.current || response?.status !== 200) return;
+          setCells(cellColumns(response.data.cells));
+        } catch (err) {
+          console.error(err);
+        }
+      }, 300);
+    },
+    [showCells, datasetId],
+  );
+
+  // First cells for the initial view; later ones follow the camera
+  useEffect(() => {
+    setCells(null);
+    if (showCells) {
+      fetchCells(globeEl.current?.pointOfView() ?? { lat: 0, lng: 0, altitude: 2.5 });
+    }
+    return () => {
+      if (cellsTimeoutRef.current) {
+        clearTimeout(cellsTimeoutRef.current);
+      }
+    };
+  }, [showCells, fetchCells]);
+
   const normalizeSize = useMemo(() => {
-    if (validLocations.length === 0) return () => 0.5;
+    if (labels.length === 0) return () => 0.5;
 
-    const values = validLocations.map((loc) => loc.significantCol);
-    console.log("Significant column values:", values);
-    const min = Math.min(...values);
-    const max = Math.max(...values);
+    let min = Infinity;
+    let max = -Infinity;
+    for (const { index } of labels) {
+      const value = globe.significantCol[index];
+      if (value < min) min = value;
+      if (value > max) max = value;
+    }
 
     // Handle edge case where all values are the same
     if (min === max) return () => 1.5; // Return middle value
@@ -47,7 +138,7 @@ export default function GlobeVisualization({
     const MAX_SIZE = 2;
     return (value: number) =>
       MIN_SIZE + ((value - min) / (max - min)) * (MAX_SIZE - MIN_SIZE);
-  }, [validLocations]);
+  }, [labels, globe]);
 
   // Debounced resize handler
   const updateDimensions = useCallback(() => {
@@ -68,19 +159,25 @@ export default function GlobeVisualization({
   }, [updateDimensions]);
 
   // Handle label click
-  const handleLabelClick = useCallback((label: LocationData) => {
-    setClickedLabel(label);
-  }, []);
+  const handleLabelClick = useCallback(
+    (label: Label) => {
+      setClickedLabel(locationAt(globe, label.index));
+    },
+    [globe],
+  );
 
   // Handle label hover
-  const handleLabelHover = useCallback((label: LocationData | null) => {
-    setHoveredLabel(label);
+  const handleLabelHover = useCallback(
+    (label: Label | null) => {
+      setHoveredLabel(label ? locationAt(globe, label.index) : null);
 
-    // Change cursor style
-    if (containerRef.current) {
-      containerRef.current.style.cursor = label ? "pointer" : "default";
-    }
-  }, []);
+      // Change cursor style
+      if (containerRef.current) {
+        containerRef.current.style.cursor = label ? "pointer" : "default";
+      }
+    },
+    [globe],
+  );
 
   // Measure container dimensions on mount
   useEffect(() => {
@@ -158,24 +255,27 @@ export default function GlobeVisualization({
           height={dimensions.height}
           globeImageUrl="//unpkg.com/three-globe/example/img/earth-night.jpg"
           backgroundImageUrl="//unpkg.com/three-globe/example/img/night-sky.png"
-          labelsData={validLocations}
-          labelLat={(d: object) => (d as LocationData).latitude}
-          labelLng={(d: object) => (d as LocationData).longitude}
-          labelText={(d: object) => (d as LocationData).name}
+          labelsData={labels}
+          labelLat={(d: object) => globe.latitude[(d as Label).index]}
+          labelLng={(d: object) => globe.longitude[(d as Label).index]}
+          labelText={(d: object) =>
+            globe.name.dictionary[globe.name.codes[(d as Label).index]]
+          }
           labelSize={(d: object) =>
-            normalizeSize((d as LocationData).significantCol)
+            normalizeSize(globe.significantCol[(d as Label).index])
           }
           labelDotRadius={(d: object) =>
-            normalizeSize((d as LocationData).significantCol)
+            normalizeSize(globe.significantCol[(d as Label).index])
           }
           labelColor={() => "rgba(255, 165, 0, 0.75)"}
           labelResolution={2}
           onLabelClick={(label: object) =>
-            handleLabelClick(label as LocationData)
+            handleLabelClick(label as Label)
           }
           onLabelHover={(label: object | null) =>
-            handleLabelHover(label as LocationData | null)
+            handleLabelHover(label as Label | null)
           }
+          onZoom={fetchCells}
           showAtmosphere={true}
           atmosphereColor="#aaaaaa"
           atmosphereAltitude={0.15}
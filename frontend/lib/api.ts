@@ -1,5 +1,5 @@
-// export default api;
 import axios from "axios";
+import { GlobeColumns, LocationData } from "@/types/location";
 
 // For server-side API calls
 const apiBaseUrl =
@@ -39,4 +39,189 @@ api.interceptors.response.use(
 export const apiPostData = ({ jsonData }: { jsonData: any }) =>
   api.post("dataset/", jsonData);
 
+// Raw CSV (or .csv.gz) upload, parsed and aggregated in chunks on the server
+export const apiUploadCsv = ({ file }: { file: File }) => {
+  const formData = new FormData();
+  formData.append("file", file);
+  return api.post("dataset/upload", formData, {
+    headers: { "Content-Type": "multipart/form-data" },
+  });
+};
+
+// Columnar binary responses: globe_data/full_data as typed arrays instead of row objects
+export const COLUMNAR_MEDIA_TYPE = "application/vnd.location-dashboard.columnar";
+
+export type ColumnarColumn =
+  | Float64Array // float64, null as NaN
+  | Int32Array // int32
+  | Uint8Array // bool
+  | { codes: Int32Array; dictionary: string[] }; // strings, code -1 is null
+
+export type ColumnarTable = {
+  rows: number;
+  columns: Record<string, ColumnarColumn>;
+};
+
+// Views each column buffer in place (buffers are 8-byte aligned little-endian)
+export const decodeColumnar = (buffer: ArrayBuffer) => {
+  const view = new DataView(buffer);
+  const magic = new TextDecoder().decode(new Uint8Array(buffer, 0, 4));
+  if (magic !== "LDC1") {
+    throw new Error("Unexpected columnar response");
+  }
+  const headerLength = view.getUint32(4, true);
+  const header = JSON.parse(
+    new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)),
+  );
+  const bodyStart = Math.ceil((8 + headerLength) / 8) * 8;
+
+  const tables: Record<string, ColumnarTable> = {};
+  for (const [name, table] of Object.entries<any>(header.tables)) {
+    const columns: Record<string, ColumnarColumn> = {};
+    for (const col of table.columns) {
+      const offset = bodyStart + col.offset;
+      if (col.type === "float64") {
+        columns[col.name] = new Float64Array(buffer, offset, table.rows);
+      } else if (col.type === "int32") {
+        columns[col.name] = new Int32Array(buffer, offset, table.rows);
+      } else if (col.type === "bool") {
+        columns[col.name] = new Uint8Array(buffer, offset, table.rows);
+      } else {
+        columns[col.name] = {
+          codes: new Int32Array(buffer, offset, table.rows),
+          dictionary: col.dictionary,
+        };
+      }
+    }
+    tables[name] = { rows: table.rows, columns };
+  }
+  return { ...header.meta, tables };
+};
+
+// Row objects for components that still expect them (e.g. the table view)
+export const columnarToRows = (table: ColumnarTable) => {
+  const rows: Record<string, any>[] = Array.from({ length: table.rows }, () => ({}));
+  for (const [name, column] of Object.entries(table.columns)) {
+    for (let i = 0; i < table.rows; i++) {
+      if ("codes" in column) {
+        rows[i][name] = column.codes[i] < 0 ? null : column.dictionary[column.codes[i]];
+      } else if (column instanceof Uint8Array) {
+        rows[i][name] = column[i] === 1;
+      } else {
+        rows[i][name] = Number.isNaN(column[i]) ? null : column[i];
+      }
+    }
+  }
+  return rows;
+};
+
+// Typed globe_data columns, viewed in place; significantCol arrives as float64 or int32
+export const globeColumns = (table: ColumnarTable): GlobeColumns => {
+  const name = table.columns.name;
+  const significantCol = table.columns.significantCol;
+  return {
+    length: table.rows,
+    name: "codes" in name ? name : { codes: new Int32Array(table.rows).fill(-1), dictionary: [] },
+    latitude: table.columns.latitude as Float64Array,
+    longitude: table.columns.longitude as Float64Array,
+    significantCol:
+      significantCol instanceof Float64Array || significantCol instanceof Int32Array
+        ? significantCol
+        : new Float64Array(table.rows),
+  };
+};
+
+// One location of the globe columns as an object, for the few places that show a single location
+export const locationAt = (globe: GlobeColumns, index: number): LocationData => {
+  const code = globe.name.codes[index];
+  return {
+    name: code < 0 ? "" : globe.name.dictionary[code],
+    latitude: globe.latitude[index],
+    longitude: globe.longitude[index],
+    significantCol: globe.significantCol[index],
+  };
+};
+
+export const apiPostDataColumnar = async ({ jsonData }: { jsonData: any }) => {
+  const buffer = (await api.post("dataset/", jsonData, {
+    headers: { Accept: COLUMNAR_MEDIA_TYPE },
+    responseType: "arraybuffer",
+  })) as unknown as ArrayBuffer;
+  // Errors are still sent as JSON ({ status, statusText })
+  const magic = new TextDecoder().decode(new Uint8Array(buffer, 0, Math.min(4, buffer.byteLength)));
+  if (magic !== "LDC1") {
+    return JSON.parse(new TextDecoder().decode(buffer));
+  }
+  return decodeColumnar(buffer);
+};
+
+// Aggregated globe cells of an uploaded dataset for a zoom level and bounding box
+export const apiGetCells = ({
+  datasetId,
+  zoom,
+  west = -180,
+  south = -90,
+  east = 180,
+  north = 90,
+}: {
+  datasetId: string;
+  zoom: number;
+  west?: number;
+  south?: number;
+  east?: number;
+  north?: number;
+}) =>
+  api.get(`dataset/${datasetId}/cells`, {
+    params: { zoom, west, south, east, north },
+  });
+
+// Re-aggregate a stored dataset (metric, sum/mean/count/min/max, filters, group-by) without re-uploading
+export type DatasetFilter = {
+  column: string;
+  op: "eq" | "ne" | "in" | "not_in" | "lt" | "le" | "gt" | "ge" | "is_null" | "not_null";
+  value?: any;
+};
+
+export const apiQueryDataset = ({
+  datasetId,
+  metric,
+  aggregation = "sum",
+  filters = [],
+  groupBy,
+}: {
+  datasetId: string;
+  metric?: string;
+  aggregation?: "sum" | "mean" | "count" | "min" | "max";
+  filters?: DatasetFilter[];
+  groupBy?: string;
+}) =>
+  api.post(`dataset/${datasetId}/query`, {
+    metric,
+    aggregation,
+    filters,
+    group_by: groupBy,
+  });
+
+// Append rows to an uploaded dataset; the response is the updated dataset with the id of the new version
+export const apiAppendData = ({ datasetId, jsonData }: { datasetId: string; jsonData: any }) =>
+  api.post(`dataset/${datasetId}/append`, jsonData);
+
+export const apiAppendCsv = ({ datasetId, file }: { datasetId: string; file: File }) => {
+  const formData = new FormData();
+  formData.append("file", file);
+  return api.post(`dataset/${datasetId}/append/upload`, formData, {
+    headers: { "Content-Type": "multipart/form-data" },
+  });
+};
+
+// Background jobs: submit returns a job id, progress is streamed as server-sent events
+export const apiCreateJob = ({ jsonData }: { jsonData: any }) =>
+  api.post("dataset/jobs", jsonData);
+
+export const apiGetJob = ({ jobId }: { jobId: string }) =>
+  api.get(`dataset/jobs/${jobId}`);
+
+export const jobEventsUrl = (jobId: string) =>
+  `${apiBaseUrl}/dataset/jobs/${jobId}/events`;
+
 export default api;
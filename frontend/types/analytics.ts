@@ -64,6 +64,10 @@ export type AnalyticalData = {
       column2: string;
       correlation: number;
     }>;
+    // Set when the matrix is sparse: "threshold", "top_k" or "none"
+    correlation_mode?: string;
+    // Set when correlations were estimated on a sample of rows
+    correlation_sample_rows?: number;
   };
   data_quality: {
     completeness_score: number;
@@ -4,3 +4,12 @@ export type LocationData = {
   latitude: number;
   significantCol?: number;
 };
+
+// globe_data of a columnar response: one entry per location, read by index
+export type GlobeColumns = {
+  length: number;
+  name: { codes: Int32Array; dictionary: string[] };
+  latitude: Float64Array;
+  longitude: Float64Array;
+  significantCol: Float64Array | Int32Array;
+};